@@ -0,0 +1,332 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Analytics Module
+
+This module keeps a columnar summary of every saved character (name,
+class, level, gold, quests completed) for leaderboards and per-class
+statistics, without loading each save with character_manager.
+"""
+
+import os
+from array import array
+from bisect import bisect_left, insort
+from heapq import merge
+from itertools import islice
+
+from character_manager import SAVE_DIR
+
+# Numeric columns that can be ranked and aggregated
+NUMERIC_COLUMNS = ('level', 'gold', 'quests')
+
+# Sorted indexes pack (value, row) into one int: value * ROW_LIMIT + row
+ROW_LIMIT = 1 << 32
+
+# A refresh that changes more rows than this re-sorts the indexes once
+# instead of updating them row by row
+BULK_REBUILD = 1000
+
+SUMMARY_FILE = "data/save_summary.txt"
+
+SAVE_SUFFIX = "_save.txt"
+
+
+class SaveSummary:
+    """
+    Columnar summary of the save store
+
+    Each character is a row; row numbers stay fixed while the character
+    exists (freed rows are reused), so indexes can refer to rows by number.
+    For every numeric column there is, per class, a sorted list of packed
+    (value, row) keys and a running total. update() and remove() keep them
+    current, so top-K is a merge of the per-class list ends and per-class
+    statistics are a few lookups.
+    """
+
+    def __init__(self, save_directory=SAVE_DIR):
+        self.save_directory = save_directory
+        self.names = []
+        self.classes = []
+        self.columns = {column: array('q') for column in NUMERIC_COLUMNS}
+        self.mtimes = array('d')
+        self.rows = {}  # name -> row
+        self._free = []  # Rows of removed characters
+        self._sorted = None  # column -> class -> sorted keys, built on first query
+        self._totals = None  # column -> class -> sum
+
+    def __len__(self):
+        return len(self.rows)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def update(self, name, char_class, level, gold, quests, mtime=0.0):
+        """Add or replace one character's row"""
+        row = self.rows.get(name)
+        if row is None:
+            row = self._new_row(name)
+        else:
+            self._unindex(row)
+        self.classes[row] = char_class
+        self.columns['level'][row] = level
+        self.columns['gold'][row] = gold
+        self.columns['quests'][row] = quests
+        self.mtimes[row] = mtime
+        self._index(row)
+
+    def update_character(self, character, mtime=0.0):
+        """Add or replace a row from a character dictionary (e.g. after saving it)"""
+        self.update(character['name'], character['class'], character['level'],
+                    character['gold'], len(character['completed_quests']), mtime)
+
+    def remove(self, name):
+        row = self.rows.pop(name, None)
+        if row is None:
+            return False
+        self._unindex(row)
+        self.names[row] = None
+        self._free.append(row)
+        return True
+
+    def refresh(self):
+        """
+        Bring the summary up to date with the save directory
+
+        Only saves that are new or modified since the last refresh (by file
+        modification time) are read; rows whose save is gone are removed.
+
+        Returns: Number of rows added, changed or removed
+        """
+        changed = []
+        seen = set()
+        if os.path.isdir(self.save_directory):
+            with os.scandir(self.save_directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(SAVE_SUFFIX):
+                        continue
+                    name = entry.name[:-len(SAVE_SUFFIX)]
+                    seen.add(name)
+                    mtime = entry.stat().st_mtime
+                    row = self.rows.get(name)
+                    if row is None or self.mtimes[row] != mtime:
+                        changed.append((name, entry.path, mtime))
+        removed = [name for name in self.rows if name not in seen]
+
+        if len(changed) + len(removed) > BULK_REBUILD:
+            self._sorted = self._totals = None  # Re-sort once on the next query
+        for name in removed:
+            self.remove(name)
+        for name, path, mtime in changed:
+            values = read_save_summary(path)
+            if values is None:
+                self.remove(name)  # Unreadable save: leave it out
+            else:
+                self.update(name, *values, mtime=mtime)
+        return len(changed) + len(removed)
+
+    def _new_row(self, name):
+        if self._free:
+            row = self._free.pop()
+            self.names[row] = name
+        else:
+            row = len(self.names)
+            self.names.append(name)
+            self.classes.append(None)
+            for column in self.columns.values():
+                column.append(0)
+            self.mtimes.append(0.0)
+        self.rows[name] = row
+        return row
+
+    def _index(self, row):
+        if self._sorted is None:
+            return
+        char_class = self.classes[row]
+        for column in NUMERIC_COLUMNS:
+            value = self.columns[column][row]
+            insort(self._sorted[column].setdefault(char_class, []), value * ROW_LIMIT + row)
+            totals = self._totals[column]
+            totals[char_class] = totals.get(char_class, 0) + value
+
+    def _unindex(self, row):
+        if self._sorted is None:
+            return
+        char_class = self.classes[row]
+        for column in NUMERIC_COLUMNS:
+            value = self.columns[column][row]
+            keys = self._sorted[column][char_class]
+            del keys[bisect_left(keys, value * ROW_LIMIT + row)]
+            self._totals[column][char_class] -= value
+
+    def _ensure_indexes(self):
+        if self._sorted is not None:
+            return
+        self._sorted = {column: {} for column in NUMERIC_COLUMNS}
+        self._totals = {column: {} for column in NUMERIC_COLUMNS}
+        for column in NUMERIC_COLUMNS:
+            values = self.columns[column]
+            by_class = self._sorted[column]
+            for row in self.rows.values():
+                by_class.setdefault(self.classes[row], []).append(values[row] * ROW_LIMIT + row)
+            for char_class, keys in by_class.items():
+                keys.sort()
+                self._totals[column][char_class] = sum(key // ROW_LIMIT for key in keys)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def get_row(self, row):
+        return {
+            'name': self.names[row],
+            'class': self.classes[row],
+            'level': self.columns['level'][row],
+            'gold': self.columns['gold'][row],
+            'quests': self.columns['quests'][row]
+        }
+
+    def top(self, k, column='level', char_class=None):
+        """
+        Top k characters by a numeric column, highest first
+
+        Ties are broken by row (most recently added first).
+        """
+        self._ensure_indexes()
+        by_class = self._sorted[column]
+        if char_class is not None:
+            lists = [by_class.get(char_class, [])]
+        else:
+            lists = list(by_class.values())
+        best = merge(*(reversed(keys) for keys in lists), reverse=True)
+        return [self.get_row(key % ROW_LIMIT) for key in islice(best, k)]
+
+    def group_by_class(self, column='gold'):
+        """
+        Per-class distribution of a numeric column
+
+        Returns: {class: {'count', 'total', 'mean', 'min', 'p25', 'median', 'p75', 'max'}}
+        """
+        self._ensure_indexes()
+        groups = {}
+        for char_class, keys in self._sorted[column].items():
+            count = len(keys)
+            if count == 0:
+                continue
+            total = self._totals[column][char_class]
+            groups[char_class] = {
+                'count': count,
+                'total': total,
+                'mean': total / count,
+                'min': keys[0] // ROW_LIMIT,
+                'p25': keys[count // 4] // ROW_LIMIT,
+                'median': keys[count // 2] // ROW_LIMIT,
+                'p75': keys[(3 * count) // 4] // ROW_LIMIT,
+                'max': keys[-1] // ROW_LIMIT
+            }
+        return groups
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, filename=SUMMARY_FILE):
+        """Write the summary so the next run only re-reads changed saves"""
+        with open(filename, "w", encoding="utf-8") as f:
+            for name, row in self.rows.items():
+                f.write(_format_row(name, self.classes[row],
+                                    [self.columns[column][row] for column in NUMERIC_COLUMNS],
+                                    self.mtimes[row]))
+
+    @classmethod
+    def load(cls, filename=SUMMARY_FILE, save_directory=SAVE_DIR):
+        """
+        Load a saved summary; missing or unreadable files give an empty one
+
+        A later line for the same name replaces an earlier one (see
+        record_save). Call refresh() afterwards to pick up saves changed
+        since it was written.
+        """
+        summary = cls(save_directory)
+        if not os.path.exists(filename):
+            return summary
+        try:
+            with open(filename, "r", encoding="utf-8") as f:
+                for line in f:
+                    name, char_class, level, gold, quests, mtime = line.rstrip("\n").rsplit("\t", 5)
+                    summary.update(name, char_class, int(level), int(gold), int(quests), float(mtime))
+        except (ValueError, UnicodeDecodeError):
+            return cls(save_directory)
+        return summary
+
+
+def _format_row(name, char_class, values, mtime):
+    """One line of a summary file: name, class, numeric columns and save mtime, tab-separated"""
+    return "\t".join([name, char_class] + [str(value) for value in values] + [repr(mtime)]) + "\n"
+
+
+def record_save(character, save_directory=SAVE_DIR, filename=SUMMARY_FILE):
+    """
+    Bring a saved summary file up to date with a character that was just saved
+
+    Appends the character's row instead of rewriting the file, so it costs
+    the same however many characters there are; SaveSummary.save() writes
+    the file compactly again. The save's modification time is recorded, so
+    refresh() won't read that save again.
+
+    Returns: True if the row was written
+    """
+    path = os.path.join(save_directory, f"{character['name']}{SAVE_SUFFIX}")
+    try:
+        mtime = os.stat(path).st_mtime
+        with open(filename, "a", encoding="utf-8") as f:
+            f.write(_format_row(character['name'], character['class'],
+                                [character['level'], character['gold'], len(character['completed_quests'])],
+                                mtime))
+        return True
+    except OSError:
+        return False
+
+
+# ============================================================================
+# SAVE FILE READING
+# ============================================================================
+
+def read_save_summary(path):
+    """
+    Read just the summary fields from a save file
+
+    Follows character_manager's "KEY: value" save format.
+
+    Returns: (class, level, gold, quests completed), or None if unreadable
+    """
+    fields = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                key, sep, value = line.rstrip("\n").partition(": ")
+                if sep and key in ("CLASS", "LEVEL", "GOLD", "COMPLETED_QUESTS"):
+                    fields[key] = value
+        quests = fields.get("COMPLETED_QUESTS", "")
+        return (fields["CLASS"], int(fields["LEVEL"]), int(fields["GOLD"]),
+                quests.count(",") + 1 if quests else 0)
+    except (OSError, KeyError, ValueError, UnicodeDecodeError):
+        return None
+
+
+# ============================================================================
+# DISPLAY FUNCTIONS
+# ============================================================================
+
+def display_leaderboard(summary, k=10, column='level', char_class=None):
+    title = f"{char_class.upper()}S " if char_class else ""
+    print(f"\n=== TOP {k} {title}BY {column.upper()} ===")
+    for rank, row in enumerate(summary.top(k, column, char_class), 1):
+        print(f"{rank}. {row['name']} ({row['class']}) - Level {row['level']}, "
+              f"Gold {row['gold']}, Quests {row['quests']}")
+
+
+def display_class_stats(summary, column='gold'):
+    print(f"\n=== {column.upper()} BY CLASS ===")
+    for char_class, stats in sorted(summary.group_by_class(column).items()):
+        print(f"{char_class}: {stats['count']} characters, mean {stats['mean']:.1f}, "
+              f"median {stats['median']}, range {stats['min']}-{stats['max']}")
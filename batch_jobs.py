@@ -0,0 +1,124 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Batch Jobs Module
+
+Work functions for main.py's batch commands (migrate, grant, simulate) and
+run_batch, which spreads them over a process pool in chunks and reports
+progress. Each work function takes a chunk of tasks (save names or battle
+numbers) and returns one result per task.
+"""
+
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import character_manager
+import combat_system
+import inventory_system
+import quest_handler
+from custom_exceptions import (
+    CharacterNotFoundError,
+    CharacterDeadError,
+    InvalidSaveDataError,
+    SaveFileCorruptedError
+)
+
+# Saves or battles handed to a worker at a time
+BATCH_CHUNK = 64
+
+# Settings for the batch workers, set by _init_batch in each worker process
+batch_settings = {}
+
+
+def _init_batch(settings):
+    batch_settings.clear()
+    batch_settings.update(settings)
+
+
+def run_batch(label, worker, tasks, workers, settings):
+    """
+    Run worker(chunk of tasks) over every task, printing progress to stderr
+
+    With workers > 1 the chunks run on a process pool; with 1 they run
+    here. Each call of worker returns one result per task.
+
+    Returns: List of results (in completion order)
+    """
+    chunks = [tasks[i:i + BATCH_CHUNK] for i in range(0, len(tasks), BATCH_CHUNK)]
+    results = []
+    pool = None
+    if workers > 1 and len(chunks) > 1:
+        pool = ProcessPoolExecutor(workers, initializer=_init_batch, initargs=(settings,))
+        finished = (future.result() for future in
+                    as_completed([pool.submit(worker, chunk) for chunk in chunks]))
+    else:
+        _init_batch(settings)
+        finished = map(worker, chunks)
+    try:
+        for chunk_results in finished:
+            results.extend(chunk_results)
+            print(f"\r{label}: {len(results)}/{len(tasks)}", end="", file=sys.stderr, flush=True)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    if tasks:
+        print(file=sys.stderr)
+    return results
+
+
+def _update_saves(names, update):
+    """Load, update and re-save each character; returns (name, error or None) pairs"""
+    save_directory = batch_settings['save_directory']
+    results = []
+    for name in names:
+        try:
+            character = character_manager.load_character(name, save_directory)
+            character_manager.validate_character_data(character)
+            update(character)
+            if not character_manager.save_character(character, save_directory):
+                raise SaveFileCorruptedError(name)
+            results.append((name, None))
+        except (CharacterNotFoundError, InvalidSaveDataError, SaveFileCorruptedError,
+                CharacterDeadError, ValueError) as e:
+            results.append((name, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def migrate_saves(names):
+    # Loading fills in fields older saves lack (splitting equipment bonuses
+    # out of old stats needs the item effects); stats are recounted from the catalog
+    inventory_system.register_item_data(batch_settings['items'])
+    quests = batch_settings['quests']
+    return _update_saves(names, lambda character: quest_handler.rebuild_quest_stats(character, quests))
+
+
+def grant_saves(names):
+    def grant(character):
+        if batch_settings['gold']:
+            character_manager.add_gold(character, batch_settings['gold'])
+        if batch_settings['xp']:
+            character_manager.gain_experience(character, batch_settings['xp'])
+    return _update_saves(names, grant)
+
+
+def simulate_battles(numbers):
+    """Fight one battle per number; each is seeded from the base seed and its number"""
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")  # Battles narrate every turn
+    try:
+        results = []
+        for number in numbers:
+            random.seed(batch_settings['seed'] + number)
+            character = character_manager.create_character(f"sim_{number}", batch_settings['class'])
+            for level in range(1, batch_settings['level']):
+                character_manager.gain_experience(character, level * 100)
+            if batch_settings['enemy']:
+                enemy = combat_system.create_enemy(batch_settings['enemy'])
+            else:
+                enemy = combat_system.get_random_enemy_for_level(character['level'])
+            outcome = combat_system.SimpleBattle(character, enemy).start_battle()
+            results.append((outcome['winner'], outcome.get('xp_gained', 0), outcome.get('gold_gained', 0)))
+        return results
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
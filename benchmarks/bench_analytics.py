@@ -0,0 +1,62 @@
+"""
+Benchmark: leaderboard and per-class analytics
+
+Fills an analytics.SaveSummary with 1M synthetic characters (in memory)
+and times the one-off index sort, top-100 queries, per-class gold
+distribution and an incremental update. A refresh over real save files
+is timed on a smaller temporary save directory.
+
+Run: python benchmarks/bench_analytics.py [character_count]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+import character_manager
+
+CHARACTERS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+SAVE_FILES = 2000
+CLASSES = ['Warrior', 'Mage', 'Rogue', 'Cleric']
+
+
+def timed(label, func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"  {label:<34} {elapsed * 1000:10.3f} ms")
+
+
+def fill(summary, count):
+    rng = random.Random(7)
+    for i in range(count):
+        summary.update(f"hero_{i}", CLASSES[i % 4], rng.randint(1, 60),
+                       rng.randint(0, 100_000), rng.randint(0, 40))
+
+
+if __name__ == "__main__":
+    print(f"=== ANALYTICS BENCHMARK ({CHARACTERS} characters) ===")
+    summary = analytics.SaveSummary()
+    timed("load rows", lambda: fill(summary, CHARACTERS))
+    timed("sort indexes (first query)", lambda: summary.top(1))
+    timed("top 100 by level", lambda: summary.top(100, 'level'), 100)
+    timed("top 100 Mages by gold", lambda: summary.top(100, 'gold', 'Mage'), 100)
+    timed("gold distribution per class", lambda: summary.group_by_class('gold'), 100)
+    rng = random.Random(1)
+    timed("update one character", lambda: summary.update(
+        f"hero_{rng.randrange(CHARACTERS)}", 'Rogue', 30, rng.randint(0, 100_000), 5), 1000)
+
+    print(f"Save directory refresh ({SAVE_FILES} saves):")
+    with tempfile.TemporaryDirectory() as save_dir:
+        for i in range(SAVE_FILES):
+            character = character_manager.create_character(f"saved_{i}", CLASSES[i % 4])
+            character_manager.save_character(character, save_dir)
+        on_disk = analytics.SaveSummary(save_dir)
+        timed("first refresh (reads every save)", on_disk.refresh)
+        timed("refresh, nothing changed", on_disk.refresh)
@@ -0,0 +1,72 @@
+"""
+Benchmark: item catalog queries
+
+Builds a synthetic 1M-item catalog and compares game_data's indexed
+queries (type / cost range / effect stat) with a full scan.
+
+Run: python benchmarks/bench_catalog.py [item_count]
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import game_data
+
+TYPES = ['weapon', 'armor', 'consumable']
+STATS = ['strength', 'magic', 'max_health', 'health']
+QUERIES = 200
+
+
+def make_catalog(count, rng):
+    items = {}
+    for i in range(count):
+        item_id = f"item_{i}"
+        items[item_id] = {
+            'item_id': item_id,
+            'name': item_id,
+            'type': TYPES[i % 3],
+            'effect': f"{STATS[rng.randrange(4)]}:5",
+            'cost': rng.randrange(1, 100000),
+            'description': ''
+        }
+    return items
+
+
+def scan(items, item_type, max_cost, stat):
+    return [item for item in items.values()
+            if item['type'] == item_type and item['cost'] <= max_cost
+            and (stat is None or item['effect'].split(":", 1)[0] == stat)]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    rng = random.Random(3)
+    print(f"=== CATALOG QUERY BENCHMARK ({count} items) ===")
+    items = make_catalog(count, rng)
+
+    start = time.perf_counter()
+    index = game_data.build_item_index(items)
+    print(f"  build_item_index:              {time.perf_counter() - start:8.2f} s")
+
+    queries = [(rng.choice(TYPES), rng.randrange(1, 200), rng.choice(STATS + [None]))
+               for _ in range(QUERIES)]
+
+    start = time.perf_counter()
+    indexed_hits = 0
+    for item_type, max_cost, stat in queries:
+        indexed_hits += len(game_data.query_items(index, item_type=item_type, max_cost=max_cost, stat=stat))
+    indexed = (time.perf_counter() - start) / QUERIES
+
+    scan_queries = queries[:5]
+    start = time.perf_counter()
+    scan_hits = 0
+    for item_type, max_cost, stat in scan_queries:
+        scan_hits += len(scan(items, item_type, max_cost, stat))
+    scanned = (time.perf_counter() - start) / len(scan_queries)
+
+    print(f"  indexed query (cost <= ~200):  {indexed * 1e6:8.1f} us/query ({indexed_hits / QUERIES:.0f} hits avg)")
+    print(f"  full scan:                     {scanned * 1e6:8.1f} us/query")
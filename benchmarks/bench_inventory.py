@@ -0,0 +1,102 @@
+"""
+Benchmark: inventory operations on very large inventories
+
+Fills 10k-slot inventories and times has_item, count_item,
+remove/add and display against the old flat-list implementation.
+
+Run: python benchmarks/bench_inventory.py
+"""
+
+import os
+import sys
+import time
+import random
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import inventory_system
+
+SLOTS = 10000
+DISTINCT_ITEMS = 500
+OPERATIONS = 2000
+
+
+def timed(label, func, repeat):
+    # Silence display_inventory's output while timing, not the result line
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed / repeat * 1e6:10.2f} us/op")
+
+
+def bench_counted(item_ids, rng):
+    print("Counted inventory (inventory_system):")
+    char = {'name': 'Bench', 'inventory': []}
+    for i in range(SLOTS):
+        inventory_system.add_item_to_inventory(char, item_ids[i % DISTINCT_ITEMS])
+
+    timed("has_item", lambda: inventory_system.has_item(char, rng.choice(item_ids)), OPERATIONS)
+    timed("count_item", lambda: inventory_system.count_item(char, rng.choice(item_ids)), OPERATIONS)
+
+    def remove_and_add():
+        item_id = rng.choice(item_ids)
+        inventory_system.remove_item_from_inventory(char, item_id)
+        inventory_system.add_item_to_inventory(char, item_id)
+    timed("remove + add", remove_and_add, OPERATIONS)
+
+    timed("display_inventory", lambda: inventory_system.display_inventory(char, {}), 50)
+
+
+def bench_list(item_ids, rng):
+    print("Flat list (previous implementation):")
+    inventory = [item_ids[i % DISTINCT_ITEMS] for i in range(SLOTS)]
+
+    timed("has_item", lambda: rng.choice(item_ids) in inventory, OPERATIONS)
+    timed("count_item", lambda: inventory.count(rng.choice(item_ids)), OPERATIONS)
+
+    def remove_and_add():
+        item_id = rng.choice(item_ids)
+        inventory.remove(item_id)
+        inventory.append(item_id)
+    timed("remove + add", remove_and_add, OPERATIONS)
+
+    def display():
+        counted = {}
+        for item_id in inventory:
+            counted[item_id] = counted.get(item_id, 0) + 1
+        for item_id, qty in counted.items():
+            print(f"- {item_id} x{qty}")
+    timed("display_inventory", display, 50)
+
+
+def bench_bulk(item_ids, rng):
+    print("Bulk loot of 5000 items into an empty inventory:")
+    loot = [rng.choice(item_ids) for _ in range(5000)]
+
+    def one_by_one():
+        char = {'inventory': []}
+        for item_id in loot:
+            inventory_system.add_item_to_inventory(char, item_id)
+    timed("add_item_to_inventory loop", one_by_one, 20)
+    timed("add_items", lambda: inventory_system.add_items({'inventory': []}, loot), 20)
+
+    src = {'inventory': []}
+    dst = {'inventory': []}
+    inventory_system.add_items(src, loot)
+
+    def round_trip():
+        inventory_system.transfer_items(src, dst, loot)
+        inventory_system.transfer_items(dst, src, loot)
+    timed("transfer_items there and back", round_trip, 20)
+
+
+if __name__ == "__main__":
+    print(f"=== INVENTORY BENCHMARK ({SLOTS} slots, {DISTINCT_ITEMS} distinct items) ===")
+    inventory_system.MAX_INVENTORY_SIZE = SLOTS
+    item_ids = [f"item_{i:04d}" for i in range(DISTINCT_ITEMS)]
+    bench_counted(item_ids, random.Random(1))
+    bench_list(item_ids, random.Random(1))
+    bench_bulk(item_ids, random.Random(2))
@@ -0,0 +1,92 @@
+"""
+Benchmark: memory per worker with and without prefork sharing
+
+Builds a synthetic catalog (quests and items shaped like the loaded game
+data, frozen with game_data.freeze_catalog) and starts worker processes
+three ways:
+  - every worker loads its own catalog (no sharing)
+  - prefork: the parent loads it once, then forks
+  - prefork after gc.freeze() (game_server.freeze_shared_state)
+Each worker reads the whole catalog and runs a garbage collection, as a
+busy server would, then reports its RSS and PSS from /proc (Linux only).
+
+Run: python benchmarks/bench_prefork.py [quest_count] [workers]
+"""
+
+import gc
+import os
+import signal
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import game_data
+import game_server
+
+QUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+
+def build_catalog():
+    quests = {}
+    items = {}
+    for i in range(QUESTS):
+        quests[f"quest_{i}"] = {
+            'quest_id': f"quest_{i}", 'title': f"Quest {i}", 'description': f"Synthetic quest number {i}",
+            'reward_xp': 10 + i % 500, 'reward_gold': 5 + i % 300, 'required_level': 1 + i % 50,
+            'prerequisite': f"quest_{i - 1}" if i % 10 else "NONE",
+            'objective': [('defeat', frozenset({f"enemy_{i % 40}"}), 1 + i % 5)]
+        }
+        items[f"item_{i}"] = {
+            'item_id': f"item_{i}", 'name': f"Item {i}", 'type': ('weapon', 'armor', 'consumable')[i % 3],
+            'effect': f"strength:{1 + i % 20}", 'cost': 10 + i % 900, 'description': f"Synthetic item {i}"
+        }
+    return game_data.freeze_catalog(quests), game_data.freeze_catalog(items)
+
+
+def read_catalog(catalog):
+    quests, items = catalog
+    return (sum(quest['reward_xp'] + len(quest['title']) for quest in quests.values()) +
+            sum(item['cost'] + len(item['effect']) for item in items.values()))
+
+
+def measure(label, preloaded):
+    ready_read, ready_write = os.pipe()
+
+    def run_worker(number):
+        catalog = preloaded if preloaded is not None else build_catalog()
+        read_catalog(catalog)
+        gc.collect()
+        os.write(ready_write, b"x")
+        signal.pause()
+
+    pids = game_server.fork_workers(WORKERS, run_worker)
+    for _ in pids:
+        os.read(ready_read, 1)
+    usage = [game_server.process_memory(pid) for pid in pids]
+    game_server.stop_workers(pids)
+    os.close(ready_read)
+    os.close(ready_write)
+
+    rss = sum(u['rss'] for u in usage) / len(usage) / 1024
+    pss = sum(u['pss'] for u in usage) / len(usage) / 1024
+    private = sum(u['private'] for u in usage) / len(usage) / 1024
+    print(f"  {label:<28} {rss:9.1f} {pss:9.1f} {private:9.1f} {pss * WORKERS:10.1f}")
+    return pss
+
+
+if __name__ == "__main__":
+    if game_server.process_memory() is None:
+        sys.exit("This benchmark needs /proc/<pid>/smaps_rollup (Linux).")
+    print(f"=== PREFORK MEMORY BENCHMARK ({QUESTS} quests + {QUESTS} items, {WORKERS} workers) ===")
+    print(f"  {'mode':<28} {'RSS MB':>9} {'PSS MB':>9} {'priv MB':>9} {'total PSS':>10}")
+    own = measure("each worker loads", None)
+
+    catalog = build_catalog()
+    gc.collect()
+    shared = measure("prefork", catalog)
+    game_server.freeze_shared_state()
+    frozen = measure("prefork + gc.freeze", catalog)
+    gc.unfreeze()
+
+    print(f"  PSS saved per worker: {own - shared:.1f} MB (prefork), {own - frozen:.1f} MB (with gc.freeze)")
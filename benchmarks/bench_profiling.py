@@ -0,0 +1,48 @@
+"""
+Benchmark: cost of the profiling hooks
+
+Times calls to a trivial function and to SimpleBattle.start_battle plain,
+through profiling.timed with profiling disabled (the function comes back
+unchanged) and with it enabled (every call is timed and recorded).
+
+Run: python benchmarks/bench_profiling.py [calls]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import profiling
+
+CALLS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+
+def noop(x):
+    return x
+
+
+def per_call(func, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def decorate(enabled):
+    profiling.ENABLED = enabled
+    try:
+        return profiling.timed("bench.noop")(noop)
+    finally:
+        profiling.ENABLED = False
+
+
+if __name__ == "__main__":
+    print(f"=== PROFILING HOOK BENCHMARK ({CALLS} calls) ===")
+    plain = per_call(noop, CALLS)
+    disabled = per_call(decorate(False), CALLS)
+    enabled = per_call(decorate(True), CALLS)
+    print(f"  {'plain call':<28} {plain:8.1f} ns")
+    print(f"  {'timed, profiling disabled':<28} {disabled:8.1f} ns  (same function: {decorate(False) is noop})")
+    print(f"  {'timed, profiling enabled':<28} {enabled:8.1f} ns  (+{enabled - plain:.1f} ns per call)")
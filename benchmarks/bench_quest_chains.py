@@ -0,0 +1,66 @@
+"""
+Benchmark: prerequisite chain resolution
+
+Builds a synthetic catalog where quest i requires quest i-1, 100k deep.
+Times the one-off graph pass (cycle check, depths, shared chains) and
+chain lookups afterwards, against the old walk that built each chain
+with list.insert(0, ...).
+
+Run: python benchmarks/bench_quest_chains.py [depth]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import quest_handler
+
+DEPTH = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+LOOKUPS = 1000
+
+
+def make_chain(depth):
+    quests = {}
+    for i in range(depth):
+        quests[f"quest_{i}"] = {
+            'quest_id': f"quest_{i}",
+            'required_level': 1,
+            'prerequisite': "NONE" if i == 0 else f"quest_{i - 1}"
+        }
+    return quests
+
+
+def insert_walk(quest_id, quest_data_dict):
+    """The original implementation"""
+    chain = []
+    current = quest_id
+    while current != "NONE":
+        chain.insert(0, current)
+        current = quest_data_dict[current].get('prerequisite', 'NONE')
+    return chain
+
+
+if __name__ == "__main__":
+    print(f"=== PREREQUISITE CHAIN BENCHMARK ({DEPTH} deep) ===")
+    quests = make_chain(DEPTH)
+    deepest = f"quest_{DEPTH - 1}"
+
+    start = time.perf_counter()
+    quest_handler.validate_quest_prerequisites(quests)
+    print(f"  {'graph pass at load':<26} {(time.perf_counter() - start) * 1000:10.2f} ms")
+
+    start = time.perf_counter()
+    for i in range(LOOKUPS):
+        chain = quest_handler.get_quest_chain(f"quest_{DEPTH - 1 - i}", quests)
+    elapsed = (time.perf_counter() - start) / LOOKUPS
+    print(f"  {'chain lookup':<26} {elapsed * 1e6:10.2f} us  (deepest: {quest_handler.get_quest_depth(deepest, quests)})")
+
+    # insert(0) is quadratic: time a 10k-deep walk and scale by (DEPTH / 10k)^2
+    sample = min(DEPTH, 10_000)
+    start = time.perf_counter()
+    old_chain = insert_walk(f"quest_{sample - 1}", quests)
+    estimate = (time.perf_counter() - start) * (DEPTH / sample) ** 2
+    print(f"  {'insert(0) walk (est.)':<26} {estimate * 1000:10.2f} ms per lookup")
+    assert old_chain == quest_handler.get_quest_prerequisite_chain(f"quest_{sample - 1}", quests)
@@ -0,0 +1,68 @@
+"""
+Benchmark: quest level-range queries
+
+Builds a synthetic catalog (1M quests by default, levels 1-100) and times
+level-range and multi-key queries (level range + reward_xp floor + not
+completed) through the quest index against a full comprehension scan.
+
+Run: python benchmarks/bench_quest_queries.py [quest_count]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import quest_handler
+
+QUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+REPEAT = 5
+
+
+def make_quests(count):
+    rng = random.Random(42)
+    return {
+        f"quest_{i}": {
+            'quest_id': f"quest_{i}",
+            'required_level': rng.randint(1, 100),
+            'reward_xp': rng.randrange(10, 5000, 10),
+            'reward_gold': 10,
+            'prerequisite': "NONE"
+        }
+        for i in range(count)
+    }
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = func()
+    elapsed = (time.perf_counter() - start) / REPEAT
+    print(f"  {label:<34} {elapsed * 1000:10.2f} ms  ({len(result)} quests)")
+
+
+if __name__ == "__main__":
+    print(f"=== QUEST QUERY BENCHMARK ({QUESTS} quests) ===")
+    quests = make_quests(QUESTS)
+    character = {'completed_quests': [f"quest_{i}" for i in range(0, QUESTS, 10)],
+                 'active_quests': []}
+    completed = set(character['completed_quests'])
+
+    start = time.perf_counter()
+    quest_handler.register_quests(quests)
+    print(f"  {'index build (once, at load)':<34} {(time.perf_counter() - start) * 1000:10.2f} ms")
+
+    print("Levels 40-42:")
+    timed("scan", lambda: [q for q in quests.values() if 40 <= q.get('required_level', 1) <= 42])
+    timed("index", lambda: quest_handler.get_quests_by_level(quests, 40, 42))
+    timed("index, first 10 only", lambda: list(zip(range(10),
+                                                    quest_handler.iter_quests_by_level(quests, 40, 42))))
+
+    print("Levels 40-42, reward_xp >= 4500, not completed:")
+    timed("scan", lambda: [q for q in quests.values()
+                           if 40 <= q.get('required_level', 1) <= 42 and
+                           q.get('reward_xp', 0) >= 4500 and q['quest_id'] not in completed])
+    timed("index", lambda: list(quest_handler.query_quests(quests, 40, 42, min_xp=4500,
+                                                           character=character)))
@@ -0,0 +1,87 @@
+"""
+Benchmark: game server command latency under concurrent sessions
+
+Starts game_server.py in a subprocess (saves go to a temporary directory),
+opens 1k, 5k and 10k client connections, waits until every session is
+connected, then has each one play a scripted game. Reports p50/p99/max
+latency from sending a command to receiving the whole reply, and overall
+command throughput.
+
+Needs a file descriptor limit above the largest session count
+(ulimit -n); each side holds one socket per session.
+
+Run: python benchmarks/bench_server.py [session_counts, e.g. 1000,5000,10000]
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from game_server import DEFAULT_HOST, REPLY_END
+
+SESSION_COUNTS = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else [1000, 5000, 10000]
+
+# Connections being opened at once
+CONNECT_BATCH = 500
+
+SCRIPT = ['1', 'Client', '1', '1', '3', '2', '4', 'first_steps', '6', 'first_steps', '7',
+          '5', '1', '', '', '2', 'health_potion', '1', '6', '8', '2', '4', '6', '3']
+
+
+async def open_session(port, connect_slots):
+    async with connect_slots:
+        reader, writer = await asyncio.open_connection(DEFAULT_HOST, port)
+        await reader.readuntil(REPLY_END)
+    return reader, writer
+
+
+async def play(reader, writer, start, latencies):
+    await start.wait()
+    for command in SCRIPT:
+        sent = time.perf_counter()
+        writer.write(command.encode() + b"\n")
+        await reader.readuntil(REPLY_END)
+        latencies.append(time.perf_counter() - sent)
+    writer.close()
+
+
+async def run(port, sessions):
+    connect_slots = asyncio.Semaphore(CONNECT_BATCH)
+    connections = await asyncio.gather(*(open_session(port, connect_slots) for _ in range(sessions)))
+    start = asyncio.Event()
+    latencies = []
+    players = [asyncio.create_task(play(reader, writer, start, latencies))
+               for reader, writer in connections]
+    began = time.perf_counter()
+    start.set()
+    await asyncio.gather(*players)
+    return latencies, time.perf_counter() - began
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as save_dir:
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "game_server.py"), "0", save_dir],
+                                  cwd=ROOT, stdout=subprocess.PIPE, text=True)
+        try:
+            port = int(server.stdout.readline().rsplit(":", 1)[1])
+            print("=== GAME SERVER BENCHMARK ===")
+            print(f"  {'sessions':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'commands/s':>11}")
+            for sessions in SESSION_COUNTS:
+                latencies, elapsed = asyncio.run(run(port, sessions))
+                latencies.sort()
+                print(f"  {sessions:>8} {percentile(latencies, 0.50) * 1000:9.2f} "
+                      f"{percentile(latencies, 0.99) * 1000:9.2f} {latencies[-1] * 1000:9.2f} "
+                      f"{len(latencies) / elapsed:11.0f}")
+        finally:
+            server.terminate()
+            server.wait()
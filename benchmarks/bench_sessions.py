@@ -0,0 +1,69 @@
+"""
+Benchmark: end-to-end session replay
+
+Replays recorded command scripts through fresh game_session.GameSessions
+(create a character, browse and accept quests, shop, fight, save, reload)
+against the real data files and reports sessions and commands per second.
+Saves go to a temporary directory. A session log written by
+game_session.write_session_log can be replayed instead of the built-in
+scripts.
+
+Run: python benchmarks/bench_sessions.py [session_count] [session_log]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import combat_system
+import game_data
+import game_session
+import inventory_system
+import quest_handler
+import shop_system
+
+SESSIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+SESSION_LOG = sys.argv[2] if len(sys.argv) > 2 else None
+
+SCRIPTS = [
+    # Browse menus and accept a quest
+    ['1', 'Browser', '2', '1', '2', '3', '2', '4', 'first_steps', '1', '7', '6', '3'],
+    # Shop: filter the catalog, buy, view the cart, check out
+    ['1', 'Shopper', '3', '5', '1', 'consumable', '', '2', 'health_potion', '2', '5', '6', '8',
+     '2', '6', '3'],
+    # Fight, accept and complete a quest, save, reload
+    ['1', 'Fighter', '1', '3', '4', 'first_steps', '6', 'first_steps', '7', '4', '1', '6',
+     '2', '1', '1', '6', '3'],
+]
+
+
+def load_catalogs():
+    quests = game_data.load_quests()
+    items = game_data.load_items()
+    quest_handler.register_quests(quests)
+    combat_system.register_abilities(game_data.load_abilities())
+    inventory_system.register_item_data(items)
+    return quests, items
+
+
+if __name__ == "__main__":
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    quests, items = load_catalogs()
+    shop = shop_system.Shop(items)
+    scripts = game_session.read_session_log(SESSION_LOG) if SESSION_LOG else SCRIPTS
+    sessions = [scripts[i % len(scripts)] for i in range(SESSIONS)]
+    random.seed(1)
+
+    print(f"=== SESSION REPLAY BENCHMARK ({SESSIONS} sessions) ===")
+    with tempfile.TemporaryDirectory() as save_dir:
+        start = time.perf_counter()
+        commands = game_session.replay_sessions(sessions, quests, items, shop, save_dir)
+        elapsed = time.perf_counter() - start
+    print(f"  {commands} commands in {elapsed:.3f} s")
+    print(f"  {SESSIONS / elapsed:10.0f} sessions/s")
+    print(f"  {commands / elapsed:10.0f} commands/s")
+    print(f"  {elapsed / commands * 1e6:10.1f} us/command")
@@ -0,0 +1,72 @@
+"""
+Benchmark: shop checkout throughput
+
+Simulates thousands of shoppers, each filling a cart with several items
+(and some sales) and checking out through shop_system.Shop, and compares
+with calling purchase_item/sell_item once per item.
+
+Run: python benchmarks/bench_shop.py
+"""
+
+import os
+import sys
+import time
+import random
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import game_data
+import inventory_system
+import shop_system
+
+SHOPPERS = 5000
+CART_SIZE = 8
+
+
+def make_shoppers(item_ids, rng):
+    shoppers = []
+    for i in range(SHOPPERS):
+        char = {'name': f"shopper_{i}", 'gold': 10 ** 6, 'inventory': []}
+        inventory_system.add_items(char, [rng.choice(item_ids) for _ in range(4)])
+        shoppers.append(char)
+    return shoppers
+
+
+def bench_carts(items, item_ids):
+    rng = random.Random(7)
+    shoppers = make_shoppers(item_ids, rng)
+    shop = shop_system.Shop(items)
+    start = time.perf_counter()
+    for char in shoppers:
+        cart = shop_system.Cart()
+        for _ in range(CART_SIZE):
+            cart.add(rng.choice(item_ids))
+        cart.add_sale(next(iter(char['inventory'])))
+        shop.checkout(char, cart)
+    elapsed = time.perf_counter() - start
+    print(f"  Cart checkout:           {SHOPPERS / elapsed:10.0f} shoppers/s")
+
+
+def bench_single_items(items, item_ids):
+    rng = random.Random(7)
+    shoppers = make_shoppers(item_ids, rng)
+    start = time.perf_counter()
+    for char in shoppers:
+        for _ in range(CART_SIZE):
+            item_id = rng.choice(item_ids)
+            inventory_system.purchase_item(char, item_id, items[item_id])
+        item_id = next(iter(char['inventory']))
+        inventory_system.sell_item(char, item_id, items[item_id])
+    elapsed = time.perf_counter() - start
+    print(f"  purchase_item/sell_item: {SHOPPERS / elapsed:10.0f} shoppers/s")
+
+
+if __name__ == "__main__":
+    print(f"=== SHOP BENCHMARK ({SHOPPERS} shoppers, {CART_SIZE} items per cart) ===")
+    items = game_data.load_items(os.path.join(ROOT, "data", "items.txt"))
+    inventory_system.register_item_data(items)
+    inventory_system.MAX_INVENTORY_SIZE = 1000
+    item_ids = list(items)
+    bench_carts(items, item_ids)
+    bench_single_items(items, item_ids)
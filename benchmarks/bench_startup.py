@@ -0,0 +1,82 @@
+"""
+Benchmark: import time and time to first menu
+
+Each measurement runs in a fresh interpreter (bytecode is compiled first,
+so compiling isn't counted):
+  - import main
+  - import main, create a session and render the main menu
+  - the whole python main.py process exiting from the main menu, less a
+    bare "python -c pass"
+Prints the median of several runs against a budget and exits with status
+1 if any median is over its budget.
+
+Run: python benchmarks/bench_startup.py [runs]
+"""
+
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+
+# Budgets in milliseconds
+IMPORT_BUDGET = 5.0
+FIRST_MENU_BUDGET = 8.0
+PROCESS_BUDGET = 10.0
+
+IMPORT_CODE = """
+import time
+start = time.perf_counter()
+import main
+print((time.perf_counter() - start) * 1000)
+"""
+
+FIRST_MENU_CODE = """
+import time
+start = time.perf_counter()
+import main
+main.new_session().start()
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def in_process(code):
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True,
+                            text=True, check=True).stdout
+    return float(output)
+
+
+def wall_time(args, stdin=""):
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=ROOT, input=stdin, capture_output=True,
+                   text=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def report(label, samples, budget):
+    median = statistics.median(samples)
+    status = "ok" if median <= budget else "OVER BUDGET"
+    print(f"  {label:<32} {median:8.2f} ms  (budget {budget:.1f} ms)  {status}")
+    return median <= budget
+
+
+if __name__ == "__main__":
+    compileall.compile_dir(ROOT, maxlevels=0, quiet=1)
+    print(f"=== STARTUP BENCHMARK (median of {RUNS} runs) ===")
+    imports = [in_process(IMPORT_CODE) for _ in range(RUNS)]
+    menus = [in_process(FIRST_MENU_CODE) for _ in range(RUNS)]
+    bare = statistics.median(wall_time(["-c", "pass"]) for _ in range(RUNS))
+    processes = [wall_time(["main.py"], "3\n") - bare for _ in range(RUNS)]
+
+    within = [
+        report("import main", imports, IMPORT_BUDGET),
+        report("import + first menu", menus, FIRST_MENU_BUDGET),
+        report("main.py run beyond bare python", processes, PROCESS_BUDGET)
+    ]
+    print(f"  (bare interpreter start: {bare:.1f} ms)")
+    sys.exit(0 if all(within) else 1)
@@ -0,0 +1,59 @@
+"""
+Benchmark: shared stash contention
+
+64 threads deposit into and withdraw from account stashes through
+inventory_system.StashService. Runs once with every thread on the same
+stash (worst-case contention) and once spread over 16 accounts.
+
+Run: python benchmarks/bench_stash.py
+"""
+
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import inventory_system
+
+THREADS = 64
+OPERATIONS = 2000  # deposit + withdraw pairs per thread
+BATCH = {'gem': 2, 'health_potion': 3, 'iron_sword': 1}
+
+
+def worker(service, account, character, barrier):
+    barrier.wait()
+    for _ in range(OPERATIONS):
+        service.deposit(account, character, BATCH)
+        service.withdraw(account, character, BATCH)
+
+
+def run(accounts):
+    service = inventory_system.StashService()
+    barrier = threading.Barrier(THREADS + 1)
+    threads = []
+    for i in range(THREADS):
+        character = {'name': f"char_{i}", 'inventory': {}}
+        inventory_system.add_items(character, BATCH)
+        thread = threading.Thread(target=worker,
+                                  args=(service, f"account_{i % accounts}", character, barrier))
+        thread.start()
+        threads.append(thread)
+
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    transfers = THREADS * OPERATIONS * 2
+    print(f"  {accounts:>3} stash(es): {transfers / elapsed:10.0f} transfers/s "
+          f"({elapsed / transfers * 1e6:.2f} us each)")
+
+
+if __name__ == "__main__":
+    print(f"=== STASH CONTENTION BENCHMARK ({THREADS} threads) ===")
+    inventory_system.MAX_INVENTORY_SIZE = 100
+    run(1)
+    run(16)
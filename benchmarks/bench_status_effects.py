@@ -0,0 +1,83 @@
+"""
+Benchmark: status effects in battle
+
+Stacks hundreds of status effects on both sides of a SimpleBattle and
+measures the cost of a round. Compares the timer wheel in
+combat_system.StatusEffects with a naive list that is scanned every round.
+
+Run: python benchmarks/bench_status_effects.py
+"""
+
+import os
+import sys
+import time
+import random
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import combat_system
+
+
+def make_battle():
+    hero = {'name': 'Hero', 'class': 'Warrior', 'health': 10 ** 9, 'max_health': 10 ** 9,
+            'strength': 15, 'magic': 5}
+    dragon = {'name': 'Dragon', 'health': 10 ** 9, 'max_health': 10 ** 9,
+              'strength': 25, 'magic': 15}
+    return combat_system.SimpleBattle(hero, dragon)
+
+
+def stack_effects(battle, count, rng):
+    effect_ids = list(combat_system.STATUS_EFFECTS)
+    for _ in range(count):
+        target = battle.character if rng.random() < 0.5 else battle.enemy
+        battle.apply_status(target, rng.choice(effect_ids), rng.randint(1, 50))
+
+
+def naive_round(effects, turn):
+    """Reference: scan every active effect each round"""
+    remaining = []
+    for target, effect_id, expires in effects:
+        effect = combat_system.STATUS_EFFECTS[effect_id]
+        if effect['kind'] == 'damage':
+            target['health'] -= effect['amount']
+        elif effect['kind'] == 'heal':
+            target['health'] += effect['amount']
+        if expires > turn:
+            remaining.append((target, effect_id, expires))
+    return remaining
+
+
+def bench(stack_count, rounds=200):
+    rng = random.Random(stack_count)
+    battle = make_battle()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        stack_effects(battle, stack_count, rng)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            # Keep the stack count roughly steady
+            stack_effects(battle, stack_count // 25, rng)
+            battle.end_round()
+        wheel_time = time.perf_counter() - start
+
+    rng = random.Random(stack_count)
+    battle = make_battle()
+    targets = [battle.character, battle.enemy]
+    effect_ids = list(combat_system.STATUS_EFFECTS)
+    effects = [(rng.choice(targets), rng.choice(effect_ids), rng.randint(1, 50))
+               for _ in range(stack_count)]
+    start = time.perf_counter()
+    for turn in range(1, rounds + 1):
+        effects.extend((rng.choice(targets), rng.choice(effect_ids), turn + rng.randint(1, 50))
+                       for _ in range(stack_count // 25))
+        effects = naive_round(effects, turn)
+    naive_time = time.perf_counter() - start
+
+    print(f"{stack_count:>6} stacks: timer wheel {wheel_time / rounds * 1e6:8.1f} us/round, "
+          f"naive scan {naive_time / rounds * 1e6:8.1f} us/round")
+
+
+if __name__ == "__main__":
+    print("=== STATUS EFFECT BENCHMARK ===")
+    for count in (100, 500, 2000, 10000):
+        bench(count)
@@ -10,6 +10,7 @@ This module handles character creation, loading, and saving.
 """
 
 import os
+import profiling
 from custom_exceptions import (
     CharacterNotFoundError,
     InvalidSaveDataError,
@@ -20,6 +21,17 @@ from custom_exceptions import (
 
 SAVE_DIR = "data/save_games"
 
+# Runtime-only bookkeeping that is rebuilt after loading, never written to saves
+TRANSIENT_KEYS = {"stats_version"}
+
+# Keys starting with this hold runtime objects other modules keep on the
+# character (e.g. quest_handler's quest state); they are never saved either
+RUNTIME_KEY_PREFIX = "_"
+
+# Stat modifier sources used by battle status effects; they only last for
+# one battle, so they are never saved
+STATUS_MODIFIER_PREFIX = "status_"
+
 
 ALLOWED_CLASSES = ["Warrior", "Mage", "Cleric", "Rogue"]  # added Rogue
 
@@ -52,27 +64,53 @@ def create_character(name, char_class):
         'active_quests': [],
         'completed_quests': [],
         'equipped_weapon': None,     # <-- ensure exists
-        'equipped_armor': None       # <-- ensure exists
+        'equipped_armor': None,      # <-- ensure exists
+        'equipment': {'weapon': None, 'armor': None, 'helm': None, 'ring1': None, 'ring2': None},
+        'base_stats': {
+            'max_health': stats['health'],
+            'strength': stats['strength'],
+            'magic': stats['magic']
+        },
+        'stat_modifiers': {}         # source -> (stat, value), e.g. equipment
     }
 
     return character
 
 
 
+@profiling.timed("character_manager.save_character")
 def save_character(character, save_directory=SAVE_DIR):
     os.makedirs(save_directory, exist_ok=True)
     filename = os.path.join(save_directory, f"{character['name']}_save.txt")
+    lasting = _stats_without_status_effects(character)
     try:
         with open(filename, "w") as f:
             for key, value in character.items():
+                if key in TRANSIENT_KEYS or key.startswith(RUNTIME_KEY_PREFIX):
+                    continue
+                value = lasting.get(key, value)
                 if isinstance(value, list):
                     value = ",".join(value)
+                elif key == "inventory":
+                    # Counted inventory is written one ID per item, like the list form
+                    value = ",".join(item_id for item_id, quantity in value.items() for _ in range(quantity))
+                elif key == "stat_modifiers":
+                    value = ",".join(f"{source}={stat}:{amount}" for source, (stat, amount) in value.items()
+                                     if not source.startswith(STATUS_MODIFIER_PREFIX))
+                elif key == "equipment":
+                    value = ",".join(f"{slot}={item_id or ''}" for slot, item_id in value.items())
+                elif key == "quest_progress":
+                    value = ",".join(f"{quest_id}={'|'.join(map(str, counts))}"
+                                     for quest_id, counts in value.items())
+                elif isinstance(value, dict):
+                    value = ",".join(f"{k}={v}" for k, v in value.items())
                 f.write(f"{key.upper()}: {value}\n")
         return True
     except (OSError, IOError):
         return False
 
 
+@profiling.timed("character_manager.load_character")
 def load_character(character_name, save_directory=SAVE_DIR):
     filename = os.path.join(save_directory, f"{character_name}_save.txt")
     if not os.path.exists(filename):
@@ -93,6 +131,31 @@ def load_character(character_name, save_directory=SAVE_DIR):
                     # List fields
                 elif key_lower in ["inventory", "active_quests", "completed_quests"]:
                     character[key_lower] = value.split(",") if value else []
+                elif key_lower in ["base_stats", "quest_stats"]:
+                    character[key_lower] = {
+                        stat: int(amount)
+                        for stat, amount in (pair.split("=", 1) for pair in value.split(",") if pair)
+                    }
+                elif key_lower == "equipment":
+                    character[key_lower] = {
+                        slot: item_id or None
+                        for slot, item_id in (pair.split("=", 1) for pair in value.split(",") if pair)
+                    }
+                elif key_lower == "quest_progress":
+                    character[key_lower] = {
+                        quest_id: [int(count) for count in counts.split("|")]
+                        for quest_id, counts in (pair.split("=", 1) for pair in value.split(",") if pair)
+                    }
+                elif key_lower in ["equipped_weapon", "equipped_armor"]:
+                    character[key_lower] = None if value in ("", "None") else value
+                elif key_lower == "stat_modifiers":
+                    modifiers = {}
+                    for pair in value.split(","):
+                        if pair:
+                            source, effect = pair.split("=", 1)
+                            stat, amount = effect.split(":", 1)
+                            modifiers[source] = (stat, int(amount))
+                    character[key_lower] = modifiers
                     # Other fields (name, class, equipment)
                 else:
                     character[key_lower] = value
@@ -102,7 +165,8 @@ def load_character(character_name, save_directory=SAVE_DIR):
             "active_quests":[],
             "completed_quests":[],
             "equipped_weapon": None,
-            "equipped_armor": None
+            "equipped_armor": None,
+            "stat_modifiers": {}
         }
 
         required_keys = [
@@ -114,6 +178,17 @@ def load_character(character_name, save_directory=SAVE_DIR):
         for k in required_keys:
             if k not in character:
                 character[k] = defaults.get(k, None)
+        if "stat_modifiers" not in character:
+            character["stat_modifiers"] = {}
+        # Older saves have no base stats: treat the saved values as base,
+        # less the bonus of any item they were saved wearing
+        if "base_stats" not in character:
+            _add_equipment_modifiers(character)
+        get_base_stats(character)
+        # Older saves may hold battle buffs that were never removed
+        for source in [source for source in character["stat_modifiers"]
+                       if source.startswith(STATUS_MODIFIER_PREFIX)]:
+            remove_stat_modifier(character, source)
 
         return character
     except (ValueError, KeyError):
@@ -148,9 +223,9 @@ def gain_experience(character, xp_amount):
     while character["experience"] >= character["level"] * 100:
         character["experience"] -= character["level"] * 100
         character["level"] += 1
-        character["max_health"] += 10
-        character["strength"] += 2
-        character["magic"] += 2
+        modify_base_stat(character, "max_health", 10)
+        modify_base_stat(character, "strength", 2)
+        modify_base_stat(character, "magic", 2)
         character["health"] = character["max_health"]
 
 
@@ -179,6 +254,139 @@ def revive_character(character):
     return True
 
 
+# ============================================================================
+# DERIVED STATS
+# ============================================================================
+#
+# character['max_health'], ['strength'] and ['magic'] hold the derived value
+# (base + equipment + buffs) so everything that reads them keeps working.
+# The parts are kept in 'base_stats' and 'stat_modifiers' and the derived
+# value is only touched when one of them changes. 'stats_version' goes up on
+# every change so callers (e.g. combat) can cache values computed from stats.
+
+DERIVED_STATS = ["max_health", "strength", "magic"]
+
+
+def get_base_stats(character):
+    """
+    Get the character's base stats (without equipment or buffs)
+
+    Characters and enemies created without base stats get them initialised
+    from their current values minus any active modifiers.
+    """
+    base = character.get("base_stats")
+    if base is None:
+        base = {stat: character.get(stat, 0) for stat in DERIVED_STATS if stat in character}
+        for stat, amount in character.get("stat_modifiers", {}).values():
+            if stat in base:
+                base[stat] -= amount
+        character["base_stats"] = base
+    return base
+
+
+def set_stat_modifier(character, source, stat, amount):
+    """
+    Add or replace a stat modifier from one source (an equipment slot, a buff...)
+
+    Only the affected stat is updated. Returns the new derived value.
+    """
+    base = get_base_stats(character)
+    modifiers = character.setdefault("stat_modifiers", {})
+    if stat not in base:
+        base[stat] = character.get(stat, 0)
+
+    delta = amount
+    if source in modifiers:
+        old_stat, old_amount = modifiers[source]
+        if old_stat == stat:
+            delta -= old_amount
+        else:
+            _apply_stat_delta(character, old_stat, -old_amount)
+    modifiers[source] = (stat, amount)
+    return _apply_stat_delta(character, stat, delta)
+
+
+def remove_stat_modifier(character, source):
+    """
+    Remove a stat modifier, restoring the stat to exactly base + remaining modifiers
+
+    Returns: (stat, amount) that was removed, or None if the source had none
+    """
+    modifiers = character.get("stat_modifiers", {})
+    if source not in modifiers:
+        return None
+    stat, amount = modifiers.pop(source)
+    _apply_stat_delta(character, stat, -amount)
+    return stat, amount
+
+
+def _add_equipment_modifiers(character):
+    """
+    Give each item an old save was wearing its slot's stat modifier
+
+    Saves from before base stats hold stats with equipment bonuses already
+    added in. With the modifiers in place get_base_stats takes the bonuses
+    back out, so unequipping removes them. Uses the item effects registered
+    with inventory_system.register_item_data; unknown items are skipped.
+    """
+    import inventory_system  # Not at the top: inventory_system imports this module
+    modifiers = character["stat_modifiers"]
+    for slot, item_id in inventory_system.get_equipment(character).items():
+        delta = inventory_system.ITEM_STAT_DELTAS.get(item_id)
+        if delta is not None and slot not in modifiers:
+            modifiers[slot] = delta
+
+
+def modify_base_stat(character, stat, amount):
+    """Permanently change a base stat (level up, elixirs). Returns the new derived value."""
+    base = get_base_stats(character)
+    if stat not in base:
+        base[stat] = character.get(stat, 0)
+    base[stat] += amount
+    return _apply_stat_delta(character, stat, amount)
+
+
+def recalculate_stats(character):
+    """
+    Rebuild every derived stat from base stats and modifiers
+
+    Normal updates are incremental; this is for checking or repairing a
+    character whose stat fields were edited by hand.
+    """
+    derived = dict(get_base_stats(character))
+    for stat, amount in character.get("stat_modifiers", {}).values():
+        derived[stat] = derived.get(stat, 0) + amount
+    character.update(derived)
+    if "health" in character and "max_health" in character:
+        character["health"] = min(character["health"], character["max_health"])
+    character["stats_version"] = character.get("stats_version", 0) + 1
+    return derived
+
+
+def _stats_without_status_effects(character):
+    """
+    Derived stats (and health) as they are without battle status effects
+
+    Returns: {stat: value} for only the stats a status effect changes
+    """
+    stats = {}
+    for source, (stat, amount) in character.get("stat_modifiers", {}).items():
+        if source.startswith(STATUS_MODIFIER_PREFIX):
+            stats[stat] = stats.get(stat, character.get(stat, 0)) - amount
+    if "max_health" in stats and "health" in character:
+        stats["health"] = min(character["health"], stats["max_health"])
+    return stats
+
+
+def _apply_stat_delta(character, stat, delta):
+    """Shift one derived stat and bump stats_version"""
+    character[stat] = character.get(stat, 0) + delta
+    if stat == "max_health" and "health" in character:
+        character["health"] = min(character["health"], character["max_health"])
+    character["stats_version"] = character.get("stats_version", 0) + 1
+    return character[stat]
+
+
 # ============================================================================
 # VALIDATION
 # ============================================================================
@@ -195,7 +403,9 @@ def validate_character_data(character):
             raise InvalidSaveDataError(f"Missing key: {key}")
     if not isinstance(character["level"], int) or not isinstance(character["experience"], int):
         raise InvalidSaveDataError("Level and experience must be integers")
-    for list_key in ["inventory", "active_quests", "completed_quests"]:
+    if not isinstance(character["inventory"], (list, dict)):
+        raise InvalidSaveDataError("inventory must be a list or counted inventory")
+    for list_key in ["active_quests", "completed_quests"]:
         if not isinstance(character[list_key], list):
             raise InvalidSaveDataError(f"{list_key} must be a list")
     return True
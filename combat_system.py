@@ -13,9 +13,14 @@ from custom_exceptions import (
     InvalidTargetError,
     CombatNotActiveError,
     CharacterDeadError,
-    AbilityOnCooldownError
+    AbilityOnCooldownError,
+    InvalidAbilityError
 )
 import random
+import character_manager
+import game_events
+import profiling
+from game_data import DEFAULT_ABILITIES
 
 
 # ============================================================================
@@ -107,8 +112,11 @@ class SimpleBattle:
         self.enemy = enemy  # Store reference to enemy
         self.combat_active = True  # Flag to track if battle is ongoing
         self.turn_counter = 0  # Count turns to manage abilities or AI
-        # NOTE: We no longer initialize special_cooldown here; handled in use_special_ability()
+        self.cooldowns = get_cooldowns(character)  # Per-ability cooldowns for the player
+        self.status_effects = StatusEffects()  # Poison, regen, buffs... on either side
+        self._damage_cache = {}  # id(attacker) -> ((attacker version, defender version), damage)
 
+    @profiling.timed("combat_system.SimpleBattle.start_battle")
     def start_battle(self):
         """
         Start the combat loop
@@ -127,23 +135,30 @@ class SimpleBattle:
             raise CharacterDeadError("Character is already dead!")
 
         # Battle loop continues until someone dies or player escapes
-        while self.combat_active:
-            self.player_turn()  # Player acts first
-            if not self.combat_active:  # Could have escaped
-                break
-            winner = self.check_battle_end()
-            if winner:
-                break
-            self.enemy_turn()  # Enemy acts next
-            winner = self.check_battle_end()
-            if winner:
-                break
-            self.turn_counter += 1  # Increment turn counter
+        try:
+            while self.combat_active:
+                self.player_turn()  # Player acts first
+                if not self.combat_active:  # Could have escaped
+                    break
+                winner = self.check_battle_end()
+                if winner:
+                    break
+                self.enemy_turn()  # Enemy acts next
+                winner = self.check_battle_end()
+                if winner:
+                    break
+                self.end_round()
+                winner = self.check_battle_end()  # Damage over time can end the fight
+                if winner:
+                    break
+        finally:
+            self.status_effects.clear()  # Buffs and debuffs don't outlast the battle
 
         # Determine outcome and return rewards (do not apply to character here)
         winner = self.check_battle_end()
         if winner == 'player':
             rewards = get_victory_rewards(self.enemy)
+            game_events.publish('defeat', self.character, (self.enemy.get('name', '').lower(),))
             # Return rewards but DO NOT mutate character['experience'] or character['gold']
             return {'winner': 'player', 'xp_gained': rewards['xp'], 'gold_gained': rewards['gold']}
         elif winner == 'enemy':
@@ -151,12 +166,13 @@ class SimpleBattle:
         else:
             return {'winner': 'escaped', 'xp_gained': 0, 'gold_gained': 0}
 
-    def player_turn(self):
+    def player_turn(self, action='attack', ability_id=None):
         """
         Handle player's turn
 
-        For deterministic testing we default to 'attack'. In a real game this
-        would be replaced with player input or an AI decision.
+        For deterministic testing we default to 'attack'. Callers driving the
+        battle themselves can pass 'special' (optionally with an ability_id)
+        or 'run'.
         """
         # TODO: Implement player turn
         if not self.combat_active:
@@ -164,16 +180,14 @@ class SimpleBattle:
 
         display_combat_stats(self.character, self.enemy)
 
-        # For deterministic integration tests, choose 'attack' by default
-        action = 'attack'  # Replace with player input in a real game
-
         if action == 'attack':
-            damage = self.calculate_damage(self.character, self.enemy)
+            damage = self.cached_damage(self.character, self.enemy)
             self.apply_damage(self.enemy, damage)
             display_battle_log(f"{self.character['name']} attacks {self.enemy['name']} for {damage} damage!")
         elif action == 'special':
             # special ability may raise AbilityOnCooldownError
-            result = use_special_ability(self.character, self.enemy)
+            result = use_special_ability(self.character, self.enemy, ability_id,
+                                         self.cooldowns, self.status_effects)
             display_battle_log(result)
         elif action == 'run':
             if self.attempt_escape():
@@ -181,11 +195,22 @@ class SimpleBattle:
             else:
                 display_battle_log(f"{self.character['name']} failed to escape.")
 
-        # Decrement special cooldown at end of turn if present
-        # TODO: Note: cooldown bookkeeping is optional; we keep it consistent if present.
-        if self.character.get('special_cooldown', 0) > 0:
-            # Explain: we reduce cooldown once per player turn; using get avoids KeyError
-            self.character['special_cooldown'] -= 1
+    def end_round(self):
+        """
+        Finish a round (player turn + enemy turn)
+
+        Cooldowns are stored as "ready on turn N", so advancing the round is a
+        single counter bump rather than a decrement per ability. Status
+        effects tick once and any that run out this turn are removed.
+        """
+        for message in self.status_effects.tick():
+            display_battle_log(message)
+        self.turn_counter += 1
+        self.cooldowns.advance()
+
+    def apply_status(self, target, effect_id, duration, magnitude=None):
+        """Put a status effect on the character or the enemy for duration rounds"""
+        return self.status_effects.apply(target, effect_id, duration, magnitude)
 
     def enemy_turn(self):
         """
@@ -197,7 +222,7 @@ class SimpleBattle:
         if not self.combat_active:
             raise CombatNotActiveError("Cannot take a turn, combat is not active.")
 
-        damage = self.calculate_damage(self.enemy, self.character)
+        damage = self.cached_damage(self.enemy, self.character)
         self.apply_damage(self.character, damage)
         display_battle_log(f"{self.enemy['name']} attacks {self.character['name']} for {damage} damage!")
 
@@ -220,6 +245,21 @@ class SimpleBattle:
         damage = attacker_str - (defender_str // 4)
         return max(1, damage)  # Minimum damage is always 1
 
+    def cached_damage(self, attacker, defender):
+        """
+        calculate_damage, reused until either side's stats change
+
+        Stat changes made through character_manager (equipment, level ups,
+        status effect buffs) bump 'stats_version', which invalidates the entry.
+        """
+        versions = (attacker.get('stats_version', 0), defender.get('stats_version', 0))
+        cached = self._damage_cache.get(id(attacker))
+        if cached is not None and cached[0] == versions:
+            return cached[1]
+        damage = self.calculate_damage(attacker, defender)
+        self._damage_cache[id(attacker)] = (versions, damage)
+        return damage
+
     def apply_damage(self, target, damage):
         """
         Apply damage to a character or enemy
@@ -266,87 +306,331 @@ class SimpleBattle:
         return success
 
 
+# ============================================================================
+# STATUS EFFECTS
+# ============================================================================
+
+# kind 'damage'/'heal' changes health every round, kind 'stat' modifies a
+# stat until it expires. 'target' is who an ability applies the effect to.
+STATUS_EFFECTS = {
+    'poison': {'name': 'Poison', 'kind': 'damage', 'amount': 5, 'target': 'enemy'},
+    'burn': {'name': 'Burn', 'kind': 'damage', 'amount': 8, 'target': 'enemy'},
+    'regen': {'name': 'Regeneration', 'kind': 'heal', 'amount': 5, 'target': 'self'},
+    'strength_up': {'name': 'Strength Up', 'kind': 'stat', 'stat': 'strength', 'amount': 5, 'target': 'self'},
+    'magic_up': {'name': 'Magic Up', 'kind': 'stat', 'stat': 'magic', 'amount': 5, 'target': 'self'},
+    'weaken': {'name': 'Weaken', 'kind': 'stat', 'stat': 'strength', 'amount': -5, 'target': 'enemy'}
+}
+
+
+class StatusEffects:
+    """
+    Active status effects for one battle
+
+    Periodic effects are summed per target when applied, so a tick is one
+    health change per target however many stacks are active. Expiries are
+    kept in a timer wheel keyed by turn, so a round only touches the
+    effects that end on it.
+    """
+
+    def __init__(self):
+        self.turn = 0
+        self.wheel = {}     # turn -> list of effects expiring on that turn
+        self.periodic = {}  # id(target) -> [target, net health change per turn, stack count]
+        self.stacks = {}    # id(target) -> {effect_id: active stack count}
+        self.applied = 0    # Serial number for stat modifier sources
+
+    def apply(self, target, effect_id, duration, magnitude=None):
+        """
+        Add a status effect to target for duration rounds
+
+        Returns: Turn the effect expires on
+        Raises: InvalidAbilityError for an unknown effect or duration < 1
+        """
+        effect = STATUS_EFFECTS.get(effect_id)
+        if effect is None:
+            raise InvalidAbilityError(f"Unknown status effect '{effect_id}'.")
+        if duration < 1:
+            raise InvalidAbilityError("Status effect duration must be at least 1 turn.")
+
+        amount = effect['amount'] if magnitude is None else magnitude
+        key = id(target)
+        self.applied += 1
+        if effect['kind'] == 'stat':
+            # Each stack is its own modifier so it can expire independently
+            character_manager.set_stat_modifier(target, self._source(self.applied), effect['stat'], amount)
+        else:
+            delta = -amount if effect['kind'] == 'damage' else amount
+            entry = self.periodic.setdefault(key, [target, 0, 0])
+            entry[1] += delta
+            entry[2] += 1
+
+        stacks = self.stacks.setdefault(key, {})
+        stacks[effect_id] = stacks.get(effect_id, 0) + 1
+
+        expires = self.turn + duration
+        self.wheel.setdefault(expires, []).append((target, effect_id, amount, self.applied))
+        return expires
+
+    def tick(self):
+        """
+        Run one round: apply periodic health changes, advance the turn and
+        remove effects that expire on the new turn
+
+        Returns: List of battle log messages
+        """
+        messages = []
+        for target, delta, _ in self.periodic.values():
+            if delta < 0:
+                target['health'] = max(0, target.get('health', 0) + delta)
+                messages.append(f"{target.get('name', 'Target')} takes {-delta} damage from status effects!")
+            elif delta > 0:
+                target['health'] = min(target.get('max_health', target.get('health', 0)),
+                                       target.get('health', 0) + delta)
+                messages.append(f"{target.get('name', 'Target')} regenerates {delta} HP!")
+
+        self.turn += 1
+        for target, effect_id, amount, serial in self.wheel.pop(self.turn, ()):
+            self._remove(target, effect_id, amount, serial)
+        return messages
+
+    def _remove(self, target, effect_id, amount, serial):
+        """Undo a single expired effect"""
+        effect = STATUS_EFFECTS[effect_id]
+        key = id(target)
+        if effect['kind'] == 'stat':
+            character_manager.remove_stat_modifier(target, self._source(serial))
+        else:
+            entry = self.periodic[key]
+            entry[1] -= -amount if effect['kind'] == 'damage' else amount
+            entry[2] -= 1
+            if entry[2] == 0:
+                del self.periodic[key]
+
+        stacks = self.stacks[key]
+        stacks[effect_id] -= 1
+        if stacks[effect_id] == 0:
+            del stacks[effect_id]
+
+    @staticmethod
+    def _source(serial):
+        return f"{character_manager.STATUS_MODIFIER_PREFIX}{serial}"
+
+    def clear(self):
+        """Remove every effect still active (the battle is over)"""
+        for turn in sorted(self.wheel):
+            for target, effect_id, amount, serial in self.wheel[turn]:
+                self._remove(target, effect_id, amount, serial)
+        self.wheel.clear()
+
+    def get_active(self, target):
+        """Get {effect_id: stack count} for a target"""
+        return dict(self.stacks.get(id(target), {}))
+
+    def count_active(self):
+        """Total number of active effect stacks in the battle"""
+        return sum(len(effects) for effects in self.wheel.values())
+
+
 # ============================================================================
 # SPECIAL ABILITIES
 # ============================================================================
 
 
-def use_special_ability(character, enemy):
+# Dispatch tables built by register_abilities()
+# ABILITY_TABLE: lowercase class -> tuple of compiled abilities (first is the default)
+# ABILITY_INDEX: ability_id -> compiled ability
+ABILITY_TABLE = {}
+ABILITY_INDEX = {}
+
+# Character key holding that character's CooldownTracker (runtime only, see
+# character_manager.RUNTIME_KEY_PREFIX)
+COOLDOWNS_KEY = "_ability_cooldowns"
+
+
+class CooldownTracker:
     """
-    Use character's class-specific special ability
+    Per-ability cooldowns for one combatant
 
-    Example abilities by class:
-    - Warrior: Power Strike (2x strength damage)
-    - Mage: Fireball (2x magic damage)
-    - Rogue: Critical Strike (3x strength damage, 50% chance)
-    - Cleric: Heal (restore 30 health)
+    Each ability stores the turn it becomes ready again, so advance() is O(1)
+    no matter how many abilities are cooling down.
+    """
 
-    Returns: String describing what happened
-    Raises: AbilityOnCooldownError if ability was used recently
+    def __init__(self):
+        self.turn = 0
+        self.ready_at = {}  # ability_id -> turn the ability is usable again
+
+    def advance(self, turns=1):
+        """Move the clock forward (called once per battle round)"""
+        self.turn += turns
+
+    def is_ready(self, ability_id):
+        return self.ready_at.get(ability_id, 0) <= self.turn
+
+    def remaining(self, ability_id):
+        """Turns left before the ability can be used (0 if ready)"""
+        return max(0, self.ready_at.get(ability_id, 0) - self.turn)
+
+    def trigger(self, ability_id, cooldown):
+        """Start the cooldown for an ability that was just used"""
+        self.ready_at[ability_id] = self.turn + cooldown
+
+
+def get_cooldowns(character):
+    """
+    Get the character's CooldownTracker
+
+    Battles advance it once per round, so a cooldown started in one battle
+    (or outside of battle) carries over until enough rounds have passed.
+    """
+    tracker = character.get(COOLDOWNS_KEY)
+    if tracker is None:
+        tracker = character[COOLDOWNS_KEY] = CooldownTracker()
+    return tracker
+
+
+def compile_ability(ability_data):
     """
-    # TODO: Implement special abilities
+    Turn an ability data dict into a dispatch-ready entry
+
+    The EFFECT string is parsed once here so using the ability is a table
+    lookup plus one handler call.
+
+    Returns: Dictionary with the ability data plus 'handler' and 'args'
+    Raises: InvalidAbilityError if the effect type has no handler or its
+            number isn't an integer
+    """
+    parts = ability_data['effect'].split(":")
+    kind = parts[0]
+    if kind not in ABILITY_EFFECT_HANDLERS:
+        raise InvalidAbilityError(f"Unknown ability effect '{ability_data['effect']}'")
+    if kind == 'status' and parts[1] not in STATUS_EFFECTS:
+        raise InvalidAbilityError(f"Unknown status effect '{parts[1]}'")
+    try:
+        args = (int(parts[1]),) if kind == 'heal' else (parts[1], int(parts[2]))
+    except (IndexError, ValueError):
+        raise InvalidAbilityError(f"Invalid ability effect '{ability_data['effect']}'")
+
+    compiled = dict(ability_data)
+    compiled['handler'] = ABILITY_EFFECT_HANDLERS[kind]
+    compiled['args'] = args
+    return compiled
+
+
+def register_abilities(ability_data_dict):
+    """
+    Build the class -> abilities dispatch table from ability data
+
+    Replaces any previously registered abilities. Abilities keep the order
+    they appear in the data, so the first one listed for a class is its
+    default special ability.
+    """
+    table = {}
+    index = {}
+    for ability_id, ability_data in ability_data_dict.items():
+        compiled = compile_ability(ability_data)
+        index[ability_id] = compiled
+        table.setdefault(ability_data['class'].lower(), []).append(compiled)
+
+    ABILITY_TABLE.clear()
+    ABILITY_TABLE.update({char_class: tuple(abilities) for char_class, abilities in table.items()})
+    ABILITY_INDEX.clear()
+    ABILITY_INDEX.update(index)
 
-    # Initialize cooldown if not yet set
-    if 'special_cooldown' not in character:
-        character['special_cooldown'] = 0
 
-    # Check if ability is on cooldown
-    if character['special_cooldown'] > 0:
-        raise AbilityOnCooldownError("Special ability is on cooldown")
+def get_class_abilities(char_class):
+    """Get the compiled abilities available to a class (may be empty)"""
+    return ABILITY_TABLE.get(char_class.lower(), ())
 
+
+def use_special_ability(character, enemy, ability_id=None, cooldowns=None, status_effects=None):
+    """
+    Use one of the character's class abilities
+
+    Abilities come from the registered ability table (see register_abilities).
+    If ability_id is None the class's first ability is used.
+
+    cooldowns and status_effects are the CooldownTracker and StatusEffects
+    of the battle the ability is used in. Outside of a battle (None) the
+    character's own tracker is used (see get_cooldowns) and status
+    abilities can't be used.
+
+    Returns: String describing what happened
+    Raises: AbilityOnCooldownError if ability was used recently
+            InvalidAbilityError if the ability is unknown, belongs to another
+            class, or costs more health than the character has
+    """
     char_class = character.get('class', '').lower()
-    if char_class == 'warrior':
-        result = warrior_power_strike(character, enemy)
-    elif char_class == 'mage':
-        result = mage_fireball(character, enemy)
-    elif char_class == 'rogue':
-        result = rogue_critical_strike(character, enemy)
-    elif char_class == 'cleric':
-        result = cleric_heal(character)
+    if ability_id is None:
+        abilities = get_class_abilities(char_class)
+        if not abilities:
+            return f"{character.get('name', 'Unknown')} has no special ability."
+        ability = abilities[0]
     else:
-        result = f"{character.get('name', 'Unknown')} has no special ability."
+        ability = ABILITY_INDEX.get(ability_id)
+        if ability is None or ability['class'].lower() != char_class:
+            raise InvalidAbilityError(f"{character.get('name', 'Unknown')} can't use '{ability_id}'.")
 
-    # Set cooldown after using ability (kept simple; tests expect predictable behavior)
-    character['special_cooldown'] = 3  # Example: 3 turns
-    return result
+    if cooldowns is None:
+        cooldowns = get_cooldowns(character)
+    if not cooldowns.is_ready(ability['ability_id']):
+        raise AbilityOnCooldownError(
+            f"{ability['name']} is on cooldown for {cooldowns.remaining(ability['ability_id'])} more turn(s)")
 
+    if ability['handler'] is _ability_status and status_effects is None:
+        raise InvalidAbilityError(f"{ability['name']} can only be used in battle.")
 
-def warrior_power_strike(character, enemy):
-    """Warrior special ability"""
-    # TODO: Implement power strike
-    damage = character.get('strength', 0) * 2
-    enemy['health'] = max(0, enemy.get('health', 0) - damage)
-    return f"{character['name']} uses Power Strike on {enemy['name']} for {damage} damage!"
+    health_cost = ability['health_cost']
+    if health_cost and character.get('health', 0) <= health_cost:
+        raise InvalidAbilityError(f"Not enough health to use {ability['name']}.")
+    character['health'] = character.get('health', 0) - health_cost  # Only once every check passed
 
+    result = ability['handler'](character, enemy, ability, status_effects, *ability['args'])
 
-def mage_fireball(character, enemy):
-    """Mage special ability"""
-    # TODO: Implement fireball
-    damage = character.get('magic', 0) * 2
+    cooldowns.trigger(ability['ability_id'], ability['cooldown'])
+    return result
+
+
+def _ability_damage(character, enemy, ability, status_effects, stat, multiplier):
+    """Effect handler: damage:<stat>:<multiplier>"""
+    damage = character.get(stat, 0) * multiplier
     enemy['health'] = max(0, enemy.get('health', 0) - damage)
-    return f"{character['name']} casts Fireball on {enemy['name']} for {damage} damage!"
+    return f"{character['name']} uses {ability['name']} on {enemy['name']} for {damage} damage!"
 
 
-def rogue_critical_strike(character, enemy):
-    """Rogue special ability"""
-    # TODO: Implement critical strike
-    if random.random() < 0.5:  # 50% chance
-        damage = character.get('strength', 0) * 3
+def _ability_critical(character, enemy, ability, status_effects, stat, multiplier):
+    """Effect handler: critical:<stat>:<multiplier> (50% chance, else a normal hit)"""
+    if random.random() < 0.5:
+        damage = character.get(stat, 0) * multiplier
         enemy['health'] = max(0, enemy.get('health', 0) - damage)
-        return f"{character['name']} lands a Critical Strike on {enemy['name']} for {damage} damage!"
-    else:
-        damage = character.get('strength', 0)
-        enemy['health'] = max(0, enemy.get('health', 0) - damage)
-        return f"{character['name']} attacks normally for {damage} damage."
+        return f"{character['name']} lands a {ability['name']} on {enemy['name']} for {damage} damage!"
+    damage = character.get(stat, 0)
+    enemy['health'] = max(0, enemy.get('health', 0) - damage)
+    return f"{character['name']} attacks normally for {damage} damage."
 
 
-def cleric_heal(character):
-    """Cleric special ability"""
-    # TODO: Implement healing
-    heal_amount = 30
+def _ability_heal(character, enemy, ability, status_effects, amount):
+    """Effect handler: heal:<amount>"""
     character['health'] = min(character.get('max_health', character.get('health', 0)),
-                              character.get('health', 0) + heal_amount)
-    return f"{character['name']} heals for {heal_amount} HP!"
+                              character.get('health', 0) + amount)
+    return f"{character['name']} uses {ability['name']} and heals for {amount} HP!"
+
+
+def _ability_status(character, enemy, ability, status_effects, effect_id, duration):
+    """Effect handler: status:<effect_id>:<duration>"""
+    effect = STATUS_EFFECTS[effect_id]
+    target = character if effect['target'] == 'self' else enemy
+    status_effects.apply(target, effect_id, duration)
+    return f"{character['name']} uses {ability['name']}: {target['name']} is affected by {effect['name']} for {duration} turns!"
+
+
+ABILITY_EFFECT_HANDLERS = {
+    'damage': _ability_damage,
+    'critical': _ability_critical,
+    'heal': _ability_heal,
+    'status': _ability_status
+}
+
+register_abilities(DEFAULT_ABILITIES)
 
 
 # ============================================================================
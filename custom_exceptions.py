@@ -80,6 +80,10 @@ class AbilityOnCooldownError(CombatError):
     """Raised when trying to use an ability that's on cooldown"""
     pass
 
+class InvalidAbilityError(CombatError):
+    """Raised when an ability is unknown or can't be used by this character"""
+    pass
+
 # Quest Exceptions
 class QuestNotFoundError(QuestError):
     """Raised when trying to access a quest that doesn't exist"""
@@ -97,6 +101,14 @@ class QuestNotActiveError(QuestError):
     """Raised when trying to complete a quest that isn't active"""
     pass
 
+class QuestObjectivesIncompleteError(QuestError):
+    """Raised when completing a quest whose objectives aren't done yet"""
+    pass
+
+class CircularPrerequisiteError(QuestError):
+    """Raised when quest prerequisites form a cycle"""
+    pass
+
 # Inventory Exceptions
 class InventoryFullError(InventoryError):
     """Raised when trying to add items to a full inventory"""
@@ -114,6 +126,10 @@ class InvalidItemTypeError(InventoryError):
     """Raised when item type is not recognized"""
     pass
 
+class InvalidQuantityError(InventoryError):
+    """Raised when an item quantity is negative (or zero where one is needed)"""
+    pass
+
 # Save/Load Exceptions
 class SaveFileCorruptedError(GameError):
     """Raised when save file cannot be loaded due to corruption"""
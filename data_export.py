@@ -0,0 +1,217 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Data Export Module
+
+This module exports the quest catalog, item catalog and saved characters
+as NumPy structured arrays (.npy files) for offline balance and economy
+analysis. NumPy is only needed here, not to play the game.
+"""
+
+import os
+import shutil
+import struct
+
+import character_manager
+from inventory_system import parse_item_effect
+from custom_exceptions import CharacterNotFoundError, InvalidSaveDataError, SaveFileCorruptedError
+
+# Rows converted to a NumPy array at a time; bounds memory for big exports
+CHUNK_SIZE = 10_000
+
+QUEST_FIELDS = [
+    ('quest_id', str), ('title', str), ('description', str), ('reward_xp', int),
+    ('reward_gold', int), ('required_level', int), ('prerequisite', str)
+]
+
+ITEM_FIELDS = [
+    ('item_id', str), ('name', str), ('type', str), ('effect_stat', str), ('effect_value', int),
+    ('cost', int), ('stack_size', int), ('description', str)
+]
+
+CHARACTER_FIELDS = [
+    ('name', str), ('class', str), ('level', int), ('health', int), ('max_health', int),
+    ('strength', int), ('magic', int), ('experience', int), ('gold', int),
+    ('active_quests', int), ('completed_quests', int), ('inventory_items', int)
+]
+
+CLASS_WIDTH = 16
+
+# .npy format version 2.0: magic string and version, then a 4-byte header length
+NPY_MAGIC = b"\x93NUMPY\x02\x00"
+
+# The header is padded so the array data starts on a multiple of this
+NPY_ALIGN = 64
+
+
+def _require_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("data_export needs NumPy (pip install numpy)") from None
+    return numpy
+
+
+def make_dtype(fields, widths):
+    """
+    Build a structured dtype from (name, type) fields
+
+    Strings are fixed-width unicode using widths[name]; ints are int64.
+    """
+    numpy = _require_numpy()
+    return numpy.dtype([(name, f"U{max(1, widths[name])}" if kind is str else numpy.int64)
+                        for name, kind in fields])
+
+
+def _string_widths(fields, rows):
+    widths = {name: 1 for name, kind in fields if kind is str}
+    for row in rows:
+        for (name, kind), value in zip(fields, row):
+            if kind is str and len(value) > widths[name]:
+                widths[name] = len(value)
+    return widths
+
+
+# ============================================================================
+# ROWS
+# ============================================================================
+
+def quest_rows(quest_data_dict):
+    for quest in quest_data_dict.values():
+        yield (quest['quest_id'], quest.get('title', ''), quest.get('description', ''),
+               quest.get('reward_xp', 0), quest.get('reward_gold', 0),
+               quest.get('required_level', 1), quest.get('prerequisite', 'NONE'))
+
+
+def item_rows(item_data_dict):
+    for item in item_data_dict.values():
+        stat, value = parse_item_effect(item['effect'])
+        yield (item['item_id'], item.get('name', ''), item['type'], stat, value,
+               item.get('cost', 0), item.get('stack_size', 1), item.get('description', ''))
+
+
+def character_rows(save_directory=character_manager.SAVE_DIR):
+    """Yield one row per readable save, loading a single save at a time"""
+    for name in sorted(character_manager.list_saved_characters(save_directory)):
+        try:
+            character = character_manager.load_character(name, save_directory)
+        except (CharacterNotFoundError, InvalidSaveDataError, SaveFileCorruptedError):
+            continue
+        yield (name, character['class'], character['level'], character['health'],
+               character['max_health'], character['strength'], character['magic'],
+               character['experience'], character['gold'], len(character['active_quests']),
+               len(character['completed_quests']), _count_items(character.get('inventory', [])))
+
+
+def _count_items(inventory):
+    return sum(inventory.values()) if isinstance(inventory, dict) else len(inventory)
+
+
+def quest_dtype(quest_data_dict):
+    return make_dtype(QUEST_FIELDS, _string_widths(QUEST_FIELDS, quest_rows(quest_data_dict)))
+
+
+def item_dtype(item_data_dict):
+    return make_dtype(ITEM_FIELDS, _string_widths(ITEM_FIELDS, item_rows(item_data_dict)))
+
+
+def character_dtype(save_directory=character_manager.SAVE_DIR):
+    """Names are sized from the save file names, so saves aren't read twice"""
+    names = character_manager.list_saved_characters(save_directory)
+    return make_dtype(CHARACTER_FIELDS, {'name': max(map(len, names), default=1),
+                                         'class': CLASS_WIDTH})
+
+
+# ============================================================================
+# ARRAYS AND FILES
+# ============================================================================
+
+def iter_chunks(rows, dtype, chunk_size=CHUNK_SIZE):
+    """Turn an iterator of row tuples into structured arrays of chunk_size rows"""
+    numpy = _require_numpy()
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield numpy.array(chunk, dtype=dtype)
+            chunk = []
+    if chunk:
+        yield numpy.array(chunk, dtype=dtype)
+
+
+def write_npy(filename, rows, dtype, chunk_size=CHUNK_SIZE):
+    """
+    Stream rows into a .npy file, one chunk in memory at a time
+
+    The row count is only known at the end (unreadable saves are skipped),
+    so chunks go to a temporary file first and are copied in after the
+    header.
+
+    Returns: Number of rows written
+    """
+    numpy = _require_numpy()
+    count = 0
+    part = filename + ".part"
+    try:
+        with open(part, "wb") as body:
+            for chunk in iter_chunks(rows, dtype, chunk_size):
+                body.write(chunk.tobytes())
+                count += len(chunk)
+        with open(filename, "wb") as f, open(part, "rb") as body:
+            f.write(npy_header(numpy.lib.format.dtype_to_descr(dtype), count))
+            shutil.copyfileobj(body, f)
+    finally:
+        if os.path.exists(part):
+            os.remove(part)
+    return count
+
+
+def npy_header(descr, count):
+    """
+    .npy header for a one-dimensional array of count records
+
+    descr is the dtype description, e.g. [('name', '<U8'), ('level', '<i8')].
+    The header is a dict literal, padded with spaces and ended with a
+    newline so the data is aligned; building it doesn't need NumPy.
+    """
+    text = repr({'descr': descr, 'fortran_order': False, 'shape': (count,)})
+    padding = -(len(NPY_MAGIC) + 4 + len(text) + 1) % NPY_ALIGN
+    text = (text + " " * padding + "\n").encode("latin1")
+    return NPY_MAGIC + struct.pack("<I", len(text)) + text
+
+
+def quests_to_array(quest_data_dict):
+    numpy = _require_numpy()
+    return numpy.array(list(quest_rows(quest_data_dict)), dtype=quest_dtype(quest_data_dict))
+
+
+def items_to_array(item_data_dict):
+    numpy = _require_numpy()
+    return numpy.array(list(item_rows(item_data_dict)), dtype=item_dtype(item_data_dict))
+
+
+def characters_to_array(save_directory=character_manager.SAVE_DIR):
+    numpy = _require_numpy()
+    return numpy.array(list(character_rows(save_directory)), dtype=character_dtype(save_directory))
+
+
+def export_all(quest_data_dict, item_data_dict, output_directory,
+               save_directory=character_manager.SAVE_DIR, chunk_size=CHUNK_SIZE):
+    """
+    Write quests.npy, items.npy and characters.npy to output_directory
+
+    Returns: {file name: rows written}
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    exports = [
+        ("quests.npy", quest_rows(quest_data_dict), quest_dtype(quest_data_dict)),
+        ("items.npy", item_rows(item_data_dict), item_dtype(item_data_dict)),
+        ("characters.npy", character_rows(save_directory), character_dtype(save_directory))
+    ]
+    return {name: write_npy(os.path.join(output_directory, name), rows, dtype, chunk_size)
+            for name, rows, dtype in exports}
+
+
+def array_to_dicts(array):
+    """Convert a structured array back to a list of dictionaries of Python values"""
+    names = array.dtype.names
+    return [dict(zip(names, row)) for row in array.tolist()]
@@ -10,17 +10,51 @@ This module handles loading and validating game data from text files.
 """
 
 import os
+import re
+from types import MappingProxyType
+from bisect import bisect_left, bisect_right
 from custom_exceptions import (
     InvalidDataFormatError,
     MissingDataFileError,
     CorruptedDataError
 )
+from game_events import EVENT_TYPES
+import profiling
+
+# Fields every ability block has, in the order they are written
+ABILITY_FIELDS = ['ability_id', 'class', 'name', 'effect', 'cooldown', 'health_cost', 'description']
+
+# Built-in abilities: combat_system uses them until data/abilities.txt is
+# registered, and create_default_data_files writes them when the file is missing
+DEFAULT_ABILITIES = {
+    'power_strike': {
+        'ability_id': 'power_strike', 'class': 'Warrior', 'name': 'Power Strike',
+        'effect': 'damage:strength:2', 'cooldown': 3, 'health_cost': 0,
+        'description': 'A heavy blow dealing double strength damage'
+    },
+    'fireball': {
+        'ability_id': 'fireball', 'class': 'Mage', 'name': 'Fireball',
+        'effect': 'damage:magic:2', 'cooldown': 3, 'health_cost': 0,
+        'description': 'Hurls a ball of fire dealing double magic damage'
+    },
+    'critical_strike': {
+        'ability_id': 'critical_strike', 'class': 'Rogue', 'name': 'Critical Strike',
+        'effect': 'critical:strength:3', 'cooldown': 3, 'health_cost': 0,
+        'description': '50% chance to deal triple strength damage'
+    },
+    'heal': {
+        'ability_id': 'heal', 'class': 'Cleric', 'name': 'Heal',
+        'effect': 'heal:30', 'cooldown': 3, 'health_cost': 0,
+        'description': 'Restores 30 health'
+    }
+}
 
 
 # ============================================================================
 # DATA LOADING FUNCTIONS
 # ============================================================================
 
+@profiling.timed("game_data.load_quests")
 def load_quests(filename="data/quests.txt"):
     """
     Load quest data from file
@@ -64,6 +98,7 @@ def load_quests(filename="data/quests.txt"):
     return quests
 
 
+@profiling.timed("game_data.load_items")
 def load_items(filename="data/items.txt"):
     """
     Load item data from file
@@ -103,6 +138,98 @@ def load_items(filename="data/items.txt"):
     return items
 
 
+def load_abilities(filename="data/abilities.txt"):
+    """
+    Load special ability data from file
+
+    Returns: Dictionary of abilities {ability_id: ability_data_dict}
+    Raises: MissingDataFileError, InvalidDataFormatError, CorruptedDataError
+    """
+    if not os.path.exists(filename):
+        raise MissingDataFileError(f"Ability data file '{filename}' not found.")
+
+    abilities = {}
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            block = []
+            for line in f:
+                line = line.strip()
+                if line == "":
+                    # Blank line → end of ability block
+                    if block:
+                        ability = parse_ability_block(block)
+                        abilities[ability['ability_id']] = ability
+                        block = []
+                else:
+                    block.append(line)
+            # Handle last block if file doesn't end with blank line
+            if block:
+                ability = parse_ability_block(block)
+                abilities[ability['ability_id']] = ability
+    except UnicodeDecodeError:
+        raise CorruptedDataError(f"Ability data file '{filename}' is corrupted.")
+    except InvalidDataFormatError:
+        raise
+    except Exception as e:
+        raise InvalidDataFormatError(f"Error loading ability data: {e}")
+
+    return abilities
+
+
+def load_price_state(filename="data/prices.txt"):
+    """
+    Load saved item demand counters (see pricing.PriceTable)
+
+    File format is one block per item:
+        ITEM_ID: health_potion
+        DEMAND: 12
+
+    Returns: Dictionary {item_id: demand}
+    Raises: MissingDataFileError, InvalidDataFormatError, CorruptedDataError
+    """
+    if not os.path.exists(filename):
+        raise MissingDataFileError(f"Price data file '{filename}' not found.")
+
+    state = {}
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            item_id = None
+            for line in f:
+                line = line.strip()
+                if line == "":
+                    continue
+                key, value = line.split(":", 1)
+                key = key.strip().upper()
+                if key == "ITEM_ID":
+                    item_id = value.strip()
+                elif key == "DEMAND" and item_id is not None:
+                    state[item_id] = int(value)
+                    item_id = None
+                else:
+                    raise InvalidDataFormatError(f"Unexpected line '{line}'")
+    except UnicodeDecodeError:
+        raise CorruptedDataError(f"Price data file '{filename}' is corrupted.")
+    except InvalidDataFormatError:
+        raise
+    except Exception as e:
+        raise InvalidDataFormatError(f"Error loading price data: {e}")
+
+    return state
+
+
+def save_price_state(state, filename="data/prices.txt"):
+    """
+    Save item demand counters in the format load_price_state reads
+    """
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(filename, "w", encoding="utf-8") as f:
+        for item_id, demand in state.items():
+            f.write(f"ITEM_ID: {item_id}\nDEMAND: {demand}\n\n")
+    return True
+
+
 def validate_quest_data(quest_dict):
     """
     Validate that quest dictionary has all required fields
@@ -132,13 +259,48 @@ def validate_item_data(item_dict):
         if field not in item_dict:
             raise InvalidDataFormatError(f"Item missing required field '{field}'")
 
-    valid_types = ['weapon', 'armor', 'consumable']
+    valid_types = ['weapon', 'armor', 'helm', 'ring', 'consumable']
     if item_dict['type'] not in valid_types:
         raise InvalidDataFormatError(f"Invalid item type '{item_dict['type']}'")
 
     # Ensure cost is numeric
     if not isinstance(item_dict['cost'], int):
-        raise InvalidDataFormatError(f"Item 'cost' must be an integer")
+        raise InvalidDataFormatError("Item 'cost' must be an integer")
+
+    # STACK_SIZE is optional (items without it take one inventory slot each)
+    stack_size = item_dict.get('stack_size', 1)
+    if not isinstance(stack_size, int) or stack_size < 1:
+        raise InvalidDataFormatError("Item 'stack_size' must be a positive integer")
+
+    return True
+
+
+def validate_ability_data(ability_dict):
+    """
+    Validate that ability dictionary has all required fields
+
+    EFFECT is one of:
+      damage:<stat>:<multiplier>    - deal stat x multiplier damage
+      critical:<stat>:<multiplier>  - 50% chance of stat x multiplier, else stat
+      heal:<amount>                 - restore health
+      status:<effect_id>:<turns>    - apply a status effect (poison, regen...)
+    """
+    for field in ABILITY_FIELDS:
+        if field not in ability_dict:
+            raise InvalidDataFormatError(f"Ability missing required field '{field}'")
+
+    for numeric_field in ['cooldown', 'health_cost']:
+        if not isinstance(ability_dict[numeric_field], int) or ability_dict[numeric_field] < 0:
+            raise InvalidDataFormatError(f"Ability field '{numeric_field}' must be a non-negative integer")
+
+    parts = ability_dict['effect'].split(":")
+    valid_effects = {'damage': 3, 'critical': 3, 'heal': 2, 'status': 3}
+    if parts[0] not in valid_effects or len(parts) != valid_effects[parts[0]]:
+        raise InvalidDataFormatError(f"Invalid ability effect '{ability_dict['effect']}'")
+    # The last part is always the number: multiplier, amount or turns
+    if not parts[-1].isdigit():
+        raise InvalidDataFormatError(
+            f"Ability effect '{ability_dict['effect']}' must end with a non-negative integer")
 
     return True
 
@@ -177,6 +339,114 @@ def create_default_data_files():
                 "DESCRIPTION:Restores 50 health.\n\n"
             )
 
+    # Default ability file
+    ability_file = "data/abilities.txt"
+    if not os.path.exists(ability_file):
+        with open(ability_file, "w", encoding="utf-8") as f:
+            for ability in DEFAULT_ABILITIES.values():
+                for field in ABILITY_FIELDS:
+                    f.write(f"{field.upper()}: {ability[field]}\n")
+                f.write("\n")
+
+
+# ============================================================================
+# CATALOG INDEX
+# ============================================================================
+
+class ItemIndex:
+    """
+    Lookup structures over an item catalog, built once after loading
+
+    Items are grouped by type and by the stat their effect changes, and every
+    group is kept sorted by cost, so "weapons under 200 gold" is a bisect
+    into one list rather than a scan of the whole catalog.
+    """
+
+    def __init__(self, item_data_dict):
+        self.items = item_data_dict
+
+        entries = sorted((item['cost'], item_id) for item_id, item in item_data_dict.items())
+        type_groups = {}
+        stat_groups = {}
+        for cost, item_id in entries:
+            item = item_data_dict[item_id]
+            type_groups.setdefault(item['type'], []).append((cost, item_id))
+            stat = item['effect'].split(":", 1)[0].strip()
+            stat_groups.setdefault(stat, []).append((cost, item_id))
+
+        # Each index is (sorted costs, item IDs in the same order)
+        self.all = _split_pairs(entries)
+        self.by_type = {key: _split_pairs(group) for key, group in type_groups.items()}
+        self.by_stat = {key: _split_pairs(group) for key, group in stat_groups.items()}
+
+    def get_item_stat(self, item_id):
+        return self.items[item_id]['effect'].split(":", 1)[0].strip()
+
+
+def _split_pairs(pairs):
+    """[(cost, item_id), ...] -> ([costs], [item_ids])"""
+    return [cost for cost, _ in pairs], [item_id for _, item_id in pairs]
+
+
+def build_item_index(item_data_dict):
+    """Build an ItemIndex for a loaded item catalog"""
+    return ItemIndex(item_data_dict)
+
+
+def query_item_ids(index, item_type=None, min_cost=None, max_cost=None, stat=None):
+    """
+    Find item IDs matching every given filter, cheapest first
+
+    min_cost and max_cost are inclusive. The smallest matching group is
+    range-searched with bisect; only when filtering on both type and stat is
+    the (already cost-limited) range checked against the other filter.
+
+    Returns: List of item IDs
+    """
+    groups = []
+    if item_type is not None:
+        groups.append(index.by_type.get(item_type, ([], [])))
+    if stat is not None:
+        groups.append(index.by_stat.get(stat, ([], [])))
+    costs, item_ids = min(groups, key=lambda group: len(group[0])) if groups else index.all
+
+    low = 0 if min_cost is None else bisect_left(costs, min_cost)
+    high = len(costs) if max_cost is None else bisect_right(costs, max_cost)
+    matches = item_ids[low:high]
+
+    if item_type is not None and stat is not None:
+        items = index.items
+        matches = [item_id for item_id in matches
+                   if items[item_id]['type'] == item_type and index.get_item_stat(item_id) == stat]
+    return matches
+
+
+def query_items(index, item_type=None, min_cost=None, max_cost=None, stat=None):
+    """
+    Find items matching every given filter, cheapest first
+
+    Returns: List of item data dictionaries
+    """
+    items = index.items
+    return [items[item_id] for item_id in query_item_ids(index, item_type, min_cost, max_cost, stat)]
+
+
+def freeze_catalog(data):
+    """
+    Read-only copy of a loaded catalog, for sharing between game sessions
+
+    Dictionaries become MappingProxyType views, lists become tuples and
+    sets frozensets, all the way down, so no session can change the
+    catalog the others are using.
+    """
+    if isinstance(data, dict):
+        return MappingProxyType({key: freeze_catalog(value) for key, value in data.items()})
+    if isinstance(data, (list, tuple)):
+        return tuple(freeze_catalog(value) for value in data)
+    if isinstance(data, set):
+        return frozenset(data)
+    return data
+
 
 # ============================================================================
 # HELPER FUNCTIONS
@@ -196,6 +466,10 @@ def parse_quest_block(lines):
             value = value.strip()
             if key == "reward_xp" or key == "reward_gold" or key == "required_level":
                 value = int(value)  # Convert numeric fields to int
+            elif key == "requires":
+                value = parse_requirement(value)
+            elif key == "objective":
+                value = parse_objectives(value)
             quest[key] = value
         # Validate quest data
         validate_quest_data({
@@ -213,6 +487,96 @@ def parse_quest_block(lines):
     return quest
 
 
+def parse_requirement(text):
+    """
+    Parse a quest REQUIRES expression into a tree
+
+    Terms are quest IDs, class:<name> and item:<item_id>, joined with AND
+    and OR (AND binds tighter) and grouped with parentheses, e.g.
+    "(goblin_hunter OR orc_menace) AND class:Warrior". NONE means no
+    requirement.
+
+    Returns: None, ('quest'|'class'|'item', name) or ('and'|'or', (subtrees))
+    Raises: InvalidDataFormatError
+    """
+    tokens = re.findall(r"\(|\)|[^\s()]+", text)
+    if not tokens or tokens == ["NONE"]:
+        return None
+    position = 0
+
+    def parse_expression(operator, parse_operand):
+        nonlocal position
+        operands = [parse_operand()]
+        while position < len(tokens) and tokens[position].upper() == operator:
+            position += 1
+            operands.append(parse_operand())
+        if len(operands) == 1:
+            return operands[0]
+        return (operator.lower(), tuple(operands))
+
+    def parse_or():
+        return parse_expression("OR", parse_and)
+
+    def parse_and():
+        return parse_expression("AND", parse_term)
+
+    def parse_term():
+        nonlocal position
+        if position >= len(tokens):
+            raise InvalidDataFormatError(f"Requirement '{text}' ends unexpectedly")
+        token = tokens[position]
+        position += 1
+        if token == "(":
+            tree = parse_or()
+            if position >= len(tokens) or tokens[position] != ")":
+                raise InvalidDataFormatError(f"Requirement '{text}' is missing ')'")
+            position += 1
+            return tree
+        if token == ")" or token.upper() in ("AND", "OR"):
+            raise InvalidDataFormatError(f"Unexpected '{token}' in requirement '{text}'")
+        kind, _, name = token.partition(":")
+        if not name:
+            return ('quest', token)
+        if kind.lower() not in ('class', 'item'):
+            raise InvalidDataFormatError(f"Unknown requirement '{token}'")
+        return (kind.lower(), name)
+
+    tree = parse_or()
+    if position != len(tokens):
+        raise InvalidDataFormatError(f"Unexpected '{tokens[position]}' in requirement '{text}'")
+    return tree
+
+
+def parse_objectives(text):
+    """
+    Parse a quest OBJECTIVE field
+
+    Objectives are "<event>:<target>[|<target>...]:<count>" separated by
+    commas, e.g. "defeat:goblin:3" or "purchase:weapon|armor:1". Targets
+    are enemy names, item IDs or item types; "any" matches everything.
+
+    Returns: List of (event_type, frozenset of targets or None, count)
+    Raises: InvalidDataFormatError
+    """
+    objectives = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part or part == "NONE":
+            continue
+        try:
+            event_type, targets, count = part.split(":")
+            count = int(count)
+        except ValueError:
+            raise InvalidDataFormatError(f"Objective '{part}' must be event:target:count")
+        if event_type not in EVENT_TYPES:
+            raise InvalidDataFormatError(f"Unknown objective event '{event_type}'")
+        if count < 1:
+            raise InvalidDataFormatError(f"Objective '{part}' needs a positive count")
+        targets = None if targets == "any" else frozenset(targets.lower().split("|"))
+        objectives.append((event_type, targets, count))
+    return objectives
+
+
 def parse_item_block(lines):
     """
     Parse a block of lines into an item dictionary
@@ -224,8 +588,8 @@ def parse_item_block(lines):
             key, value = line.split(":", 1)
             key = key.strip().lower()
             value = value.strip()
-            if key == "cost":
-                value = int(value)  # Convert cost to integer
+            if key == "cost" or key == "stack_size":
+                value = int(value)  # Convert numeric fields to integer
             item[key] = value
         # Validate item data
         validate_item_data({
@@ -234,7 +598,8 @@ def parse_item_block(lines):
             'type': item.get('type'),
             'effect': item.get('effect'),
             'cost': item.get('cost'),
-            'description': item.get('description')
+            'description': item.get('description'),
+            'stack_size': item.get('stack_size', 1)
         })
     except Exception as e:
         raise InvalidDataFormatError(f"Failed to parse item block: {e}")
@@ -242,6 +607,27 @@ def parse_item_block(lines):
     return item
 
 
+def parse_ability_block(lines):
+    """
+    Parse a block of lines into an ability dictionary
+    """
+    ability = {}
+    try:
+        for line in lines:
+            key, value = line.split(":", 1)
+            key = key.strip().lower()
+            value = value.strip()
+            if key == "cooldown" or key == "health_cost":
+                value = int(value)
+            ability[key] = value
+        ability.setdefault('health_cost', 0)
+        validate_ability_data(ability)
+    except Exception as e:
+        raise InvalidDataFormatError(f"Failed to parse ability block: {e}")
+
+    return ability
+
+
 # ============================================================================
 # TESTING
 # ============================================================================
@@ -271,4 +657,13 @@ if __name__ == "__main__":
     except InvalidDataFormatError as e:
         print(f"Invalid item format: {e}")
 
+    # Test loading abilities
+    try:
+        abilities = load_abilities()
+        print(f"Loaded {len(abilities)} abilities")
+    except MissingDataFileError:
+        print("Ability file not found")
+    except InvalidDataFormatError as e:
+        print(f"Invalid ability format: {e}")
+
 
@@ -0,0 +1,37 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Game Events Module
+
+This module is a small publish/subscribe event bus. Combat, inventory and
+the shop publish what happened; quest_handler listens to track objectives.
+"""
+
+# Events the game publishes. Each carries the targets it matches (enemy
+# name, item ID, item type) and a quantity.
+EVENT_TYPES = ('defeat', 'purchase', 'use')
+
+# event_type -> callbacks, called as callback(character, event_type, targets, quantity)
+SUBSCRIBERS = {event_type: [] for event_type in EVENT_TYPES}
+
+
+def subscribe(event_type, callback):
+    """Call callback for every event of this type"""
+    if event_type not in SUBSCRIBERS:
+        raise ValueError(f"Unknown event type '{event_type}'")
+    if callback not in SUBSCRIBERS[event_type]:
+        SUBSCRIBERS[event_type].append(callback)
+
+
+def unsubscribe(event_type, callback):
+    if callback in SUBSCRIBERS.get(event_type, ()):
+        SUBSCRIBERS[event_type].remove(callback)
+
+
+def publish(event_type, character, targets, quantity=1):
+    """
+    Tell subscribers that character did something
+
+    targets: names the event matches, e.g. ('iron_sword', 'weapon')
+    """
+    for callback in SUBSCRIBERS[event_type]:
+        callback(character, event_type, targets, quantity)
@@ -0,0 +1,261 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Game Server Module
+
+This module serves many players from one process over a local TCP socket.
+The quest and item catalogs are loaded once, frozen (game_data.freeze_catalog)
+and shared by every connection; each connection plays its own GameSession.
+
+Protocol: the client sends one command per line. After connecting, and
+after every command, the server replies with the game output and the next
+prompt, followed by a NUL byte. The server closes the connection when the
+player exits from the main menu.
+
+With a worker count above 1 the server runs in prefork mode: the catalogs
+are loaded once, then that many worker processes are forked to share them
+copy-on-write (see serve_prefork).
+
+Run: python game_server.py [port] [save_directory] [workers]
+"""
+
+import asyncio
+import gc
+import os
+import signal
+import socket
+import sys
+import traceback
+
+import character_manager
+import game_data
+import game_session
+import quest_handler
+import shop_system
+import main
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8163
+
+# Marks the end of each reply
+REPLY_END = b"\0"
+
+# Pending connections the listening socket queues; large so that thousands
+# of players connecting at once aren't refused
+LISTEN_BACKLOG = 4096
+
+
+def load_shared_catalog():
+    """
+    Load the game data once and freeze it for sharing
+
+    Returns: (quests, items, shop)
+    """
+    main.load_game_data()
+    quests = game_data.freeze_catalog(main.all_quests)
+    items = game_data.freeze_catalog(main.all_items)
+    quest_handler.register_quests(quests)
+    return quests, items, shop_system.Shop(items, prices=main.market_prices)
+
+
+class GameServer:
+    """
+    Runs one GameSession per connection on an asyncio event loop
+
+    Commands are handled one at a time on the loop thread, so sessions
+    never run concurrently with each other; only the network I/O overlaps.
+    The shop (market prices, buyback lists) is shared like the catalogs.
+    """
+
+    def __init__(self, quests, items, shop, save_directory=character_manager.SAVE_DIR,
+                 price_file=None):
+        self.quests = quests
+        self.items = items
+        self.shop = shop
+        self.save_directory = save_directory
+        self.price_file = price_file
+        self.active_sessions = 0
+        self.total_sessions = 0
+        self.commands = 0
+
+    def new_session(self):
+        return game_session.GameSession(self.quests, self.items, self.shop,
+                                        self.save_directory, self.price_file)
+
+    async def handle_client(self, reader, writer):
+        session = self.new_session()
+        self.active_sessions += 1
+        self.total_sessions += 1
+        try:
+            writer.write((session.start() + session.prompt).encode() + REPLY_END)
+            while not session.finished:
+                await writer.drain()
+                line = await reader.readline()
+                if not line:
+                    break  # Client disconnected; unsaved progress is lost
+                output = session.handle(line.decode("utf-8", "replace").rstrip("\r\n"))
+                self.commands += 1
+                writer.write((output + session.prompt).encode() + REPLY_END)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.active_sessions -= 1
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, sock=None):
+        """
+        Start listening; returns the asyncio Server (port 0 picks a free port)
+
+        sock is an already listening socket to accept on instead, e.g. one
+        shared by prefork workers.
+        """
+        if sock is not None:
+            return await asyncio.start_server(self.handle_client, sock=sock)
+        return await asyncio.start_server(self.handle_client, host, port, backlog=LISTEN_BACKLOG)
+
+    async def serve_forever(self, host=DEFAULT_HOST, port=DEFAULT_PORT, sock=None):
+        server = await self.start(host, port, sock)
+        if sock is None:
+            host, port = server.sockets[0].getsockname()[:2]
+            print(f"Listening on {host}:{port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+# ============================================================================
+# PREFORK MODE
+# ============================================================================
+
+def freeze_shared_state():
+    """
+    Prepare everything loaded so far for sharing with forked workers
+
+    gc.freeze() moves every tracked object into a permanent generation the
+    collector never scans, so collections in the workers don't write to
+    the catalog's pages and they stay shared copy-on-write. (Reading the
+    catalog still updates reference counts, which copies the pages it
+    touches.)
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def fork_workers(count, run_worker):
+    """
+    Fork count child processes that each call run_worker(worker_number)
+
+    Returns: List of child process IDs
+    """
+    pids = []
+    for number in range(count):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(number)
+            except KeyboardInterrupt:
+                pass
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        pids.append(pid)
+    return pids
+
+
+def stop_workers(pids):
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    for pid in pids:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+
+
+def process_memory(pid="self"):
+    """
+    Memory of a process from /proc/<pid>/smaps_rollup (Linux only)
+
+    PSS (proportional set size) splits each shared page between the
+    processes sharing it, so the PSS of the workers adds up to their real
+    combined footprint while their RSS counts shared pages once per worker.
+
+    Returns: {'rss', 'pss', 'shared', 'private'} in kB, or None if unavailable
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if value.strip().endswith("kB"):
+                    fields[key] = int(value.split()[0])
+    except OSError:
+        return None
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    }
+
+
+def display_worker_memory(pids):
+    print("Worker memory (kB):")
+    for pid in pids:
+        usage = process_memory(pid)
+        if usage is None:
+            print(f"  {pid}: unavailable")
+        else:
+            print(f"  {pid}: RSS {usage['rss']}, PSS {usage['pss']}, "
+                  f"shared {usage['shared']}, private {usage['private']}")
+
+
+def serve_prefork(server, workers, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """
+    Serve from several worker processes forked after loading the catalogs
+
+    The parent binds the socket and freezes the loaded catalogs; every
+    worker accepts on the inherited socket and runs its own event loop.
+    Each worker has its own copy of the shop's market prices and buyback
+    lists once it trades, so market prices are not saved in this mode.
+    """
+    sock = socket.create_server((host, port), backlog=LISTEN_BACKLOG)
+    server.price_file = None
+    freeze_shared_state()
+    pids = fork_workers(workers, lambda number: _run_worker(server, sock))
+    host, port = sock.getsockname()[:2]
+    sock.close()  # Only the workers accept
+    print(f"Listening on {host}:{port} with {workers} workers", flush=True)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))  # Stop the workers too
+    try:
+        for pid in pids:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        display_worker_memory(pids)
+    finally:
+        stop_workers(pids)
+
+
+def _run_worker(server, sock):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The parent reports memory, then stops us
+    asyncio.run(server.serve_forever(sock=sock))
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    save_directory = sys.argv[2] if len(sys.argv) > 2 else character_manager.SAVE_DIR
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    quests, items, shop = load_shared_catalog()
+    server = GameServer(quests, items, shop, save_directory, main.PRICE_FILE)
+    if workers > 1:
+        serve_prefork(server, workers, DEFAULT_HOST, port)
+    else:
+        try:
+            asyncio.run(server.serve_forever(DEFAULT_HOST, port))
+        except KeyboardInterrupt:
+            print(f"\nServed {server.total_sessions} sessions, {server.commands} commands.")
@@ -0,0 +1,514 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Game Session Module
+
+This module runs the game menus as a state machine: a GameSession takes
+one command at a time through handle() and returns the text to show, so a
+game can be driven by a person (see main.py), a script or a server. Each
+session holds its own character, cart and menu state; the quest and item
+catalogs and the shop are shared between sessions.
+"""
+
+import io
+import sys
+
+from lazy_modules import lazy_import
+from custom_exceptions import (
+    InvalidCharacterClassError,
+    CharacterNotFoundError,
+    CharacterDeadError,
+    SaveFileCorruptedError,
+    InvalidSaveDataError,
+    QuestNotFoundError,
+    QuestNotActiveError,
+    QuestAlreadyCompletedError,
+    QuestRequirementsNotMetError,
+    QuestObjectivesIncompleteError,
+    InsufficientLevelError,
+    ItemNotFoundError,
+    InsufficientResourcesError,
+    InventoryFullError,
+    InvalidQuantityError
+)
+
+# Imported on first use: showing the main menu needs none of them
+character_manager = lazy_import("character_manager")
+inventory_system = lazy_import("inventory_system")
+quest_handler = lazy_import("quest_handler")
+combat_system = lazy_import("combat_system")
+game_data = lazy_import("game_data")
+shop_system = lazy_import("shop_system")
+analytics = lazy_import("analytics")
+
+CLASS_CHOICES = {'1': 'Warrior', '2': 'Mage', '3': 'Rogue', '4': 'Cleric'}
+
+REVIVE_COST = 50
+
+# Prompt shown while waiting in each menu
+MENU_PROMPTS = {
+    'main_menu': "Enter your choice (1-3): ",
+    'game_menu': "Choose an action (1-6): ",
+    'quest_menu': "Choose an option (1-7): ",
+    'shop_menu': "Choose an option (1-8): "
+}
+
+
+class GameSession:
+    """
+    One player's game, advanced one command at a time
+
+    state is the menu waiting for input ('main_menu', 'game_menu',
+    'quest_menu', 'shop_menu') or 'ask' while collecting the answers to a
+    multi-step action (character name and class, quest ID, item and
+    quantity...). Output that the game modules print is captured and
+    returned by handle().
+
+    The catalogs can be given directly or, with load_catalog, loaded the
+    first time the player leaves the main menu: load_catalog() returns
+    (quests, items, shop).
+    """
+
+    def __init__(self, quests=None, items=None, shop=None, save_directory=None,
+                 price_file=None, load_catalog=None, summary_file=None):
+        self.quests = quests
+        self.items = items
+        self.shop = shop
+        self.load_catalog = load_catalog
+        self._save_directory = save_directory  # None: character_manager.SAVE_DIR, see save_directory
+        self.price_file = price_file  # Where saving also writes the shop's market prices
+        self.summary_file = summary_file  # analytics summary file that saving keeps current
+        self.character = None
+        self.cart = None  # A fresh cart each time the shop is opened
+        self.state = 'main_menu'
+        self.finished = False
+        self.history = []  # Every command handled, for recording sessions
+        self._questions = []
+        self._answers = []
+        self._action = None
+
+    @property
+    def save_directory(self):
+        """Where characters are saved; the default is looked up on first use,
+        so showing the main menu doesn't import character_manager"""
+        if self._save_directory is None:
+            self._save_directory = character_manager.SAVE_DIR
+        return self._save_directory
+
+    @property
+    def prompt(self):
+        if self.finished:
+            return ""
+        if self.state == 'ask':
+            return self._questions[len(self._answers)]
+        return MENU_PROMPTS.get(self.state, "")
+
+    def start(self):
+        """Text to show before the first command"""
+        return self._capture(self._show_main_menu)
+
+    def handle(self, command):
+        """Process one line of input; returns the text it produced"""
+        if self.finished:
+            return ""
+        self.history.append(command)
+        return self._capture(getattr(self, f"_on_{self.state}"), command.strip())
+
+    def run(self, commands):
+        """Feed a sequence of commands; returns the full transcript"""
+        output = [self.start()]
+        for command in commands:
+            if self.finished:
+                break
+            output.append(self.prompt + command + "\n")
+            output.append(self.handle(command))
+        return "".join(output)
+
+    def _capture(self, func, *args):
+        buffer = io.StringIO()
+        stdout, sys.stdout = sys.stdout, buffer
+        try:
+            func(*args)
+        finally:
+            sys.stdout = stdout
+        return buffer.getvalue()
+
+    def _ask(self, questions, action):
+        """Collect one answer per question, then call action(*answers)"""
+        self.state = 'ask'
+        self._questions = questions
+        self._answers = []
+        self._action = action
+
+    def _on_ask(self, answer):
+        self._answers.append(answer)
+        if len(self._answers) == len(self._questions):
+            self._action(*self._answers)
+
+    # ------------------------------------------------------------------
+    # Main menu
+    # ------------------------------------------------------------------
+
+    def _show_main_menu(self):
+        self.state = 'main_menu'
+        print("\n=== MAIN MENU ===")
+        print("1. New Game")
+        print("2. Load Game")
+        print("3. Exit")
+
+    def _on_main_menu(self, choice):
+        if choice == '1':
+            self._prepare_catalog()
+            print("\n=== NEW GAME ===")
+            self._ask(["Enter your character's name: "], self._choose_class)
+        elif choice == '2':
+            self._prepare_catalog()
+            self._choose_save()
+        elif choice == '3':
+            print("\nThanks for playing Quest Chronicles!")
+            self.finished = True
+        else:
+            print("Invalid input. Please enter 1, 2, or 3.")
+
+    def _prepare_catalog(self):
+        """Load the catalogs if needed and index the quests before play starts"""
+        if self.quests is None:
+            self.quests, self.items, shop = self.load_catalog()
+            if self.shop is None:
+                self.shop = shop
+        if self.shop is None:
+            self.shop = shop_system.Shop(self.items)
+        # Also subscribes quest objectives to game events before any battle
+        quest_handler.get_quest_index(self.quests)
+
+    def _choose_class(self, name):
+        print("Select class:")
+        for number, char_class in CLASS_CHOICES.items():
+            print(f"{number}. {char_class}")
+        self._ask(["Enter class number (1-4): "], lambda choice: self._create_character(name, choice))
+
+    def _create_character(self, name, choice):
+        if choice not in CLASS_CHOICES:
+            print("Invalid choice.")
+            self._ask(["Enter class number (1-4): "], lambda again: self._create_character(name, again))
+            return
+        try:
+            self.character = character_manager.create_character(name, CLASS_CHOICES[choice])
+        except InvalidCharacterClassError as e:
+            print(f"Error: {e}")
+            self._show_main_menu()
+            return
+        print(f"Character '{name}' the {CLASS_CHOICES[choice]} created successfully!")
+        self._show_game_menu()
+
+    def _choose_save(self):
+        print("\n=== LOAD GAME ===")
+        saved = character_manager.list_saved_characters(self.save_directory)
+        if not saved:
+            print("No saved characters found.")
+            self._show_main_menu()
+            return
+        print("Saved characters:")
+        for i, char_name in enumerate(saved, 1):
+            print(f"{i}. {char_name}")
+        self._ask([f"Select a character (1-{len(saved)}): "], lambda choice: self._load(saved, choice))
+
+    def _load(self, saved, choice):
+        if not (choice.isdigit() and 1 <= int(choice) <= len(saved)):
+            print("Invalid choice.")
+            self._ask([f"Select a character (1-{len(saved)}): "], lambda again: self._load(saved, again))
+            return
+        try:
+            self.character = character_manager.load_character(saved[int(choice) - 1], self.save_directory)
+        except (CharacterNotFoundError, SaveFileCorruptedError, InvalidSaveDataError) as e:
+            print(f"Error loading character: {e}")
+            self._show_main_menu()
+            return
+        print(f"Loaded character '{self.character['name']}' successfully!")
+        self._show_game_menu()
+
+    # ------------------------------------------------------------------
+    # Game menu
+    # ------------------------------------------------------------------
+
+    def _show_game_menu(self):
+        self.state = 'game_menu'
+        print("\n=== GAME MENU ===")
+        print("1. View Character Stats")
+        print("2. View Inventory")
+        print("3. Quest Menu")
+        print("4. Explore (Find Battles)")
+        print("5. Shop")
+        print("6. Save and Quit")
+
+    def _on_game_menu(self, choice):
+        if choice == '1':
+            self._show_stats()
+        elif choice == '2':
+            inventory_system.display_inventory(self.character, self.items)
+        elif choice == '3':
+            self._show_quest_menu()
+            return
+        elif choice == '4':
+            if self._explore():
+                return
+        elif choice == '5':
+            self.cart = shop_system.Cart()
+            self._show_shop_menu()
+            return
+        elif choice == '6':
+            self.save_game()
+            print("Game saved. Exiting...")
+            self.character = None
+            self._show_main_menu()
+            return
+        else:
+            print("Invalid input. Enter 1-6.")
+            return
+        self._show_game_menu()
+
+    def _show_stats(self):
+        char = self.character
+        print(f"\n=== {char['name']} the {char['class']} ===")
+        print(f"Level: {char['level']}  XP: {char['experience']}")
+        print(f"Health: {char['health']}/{char['max_health']}")
+        print(f"Strength: {char['strength']}  Magic: {char['magic']}")
+        print(f"Gold: {char['gold']}")
+        quest_handler.display_character_quest_progress(char, self.quests)
+
+    def _explore(self):
+        """Fight a battle; returns True if a death prompt is now waiting"""
+        enemy = combat_system.get_random_enemy_for_level(self.character.get('level', 1))
+        print(f"\nYou encountered a {enemy['name']}!")
+        try:
+            results = combat_system.SimpleBattle(self.character, enemy).start_battle()
+        except CharacterDeadError:
+            results = {'winner': 'enemy'}
+        print(f"Battle ended. Winner: {results['winner']}")
+        if results['winner'] == 'player':
+            character_manager.gain_experience(self.character, results.get('xp_gained', 0))
+            character_manager.add_gold(self.character, results.get('gold_gained', 0))
+            return False
+        if results['winner'] == 'enemy':
+            print("\nYour character has died!")
+            self._ask([f"Revive for {REVIVE_COST} gold? (y/n): "], self._revive)
+            return True
+        return False
+
+    def _revive(self, answer):
+        if answer.lower() == 'y' and self.character['gold'] >= REVIVE_COST:
+            self.character['gold'] -= REVIVE_COST
+            character_manager.revive_character(self.character)
+            print("You have been revived!")
+            self._show_game_menu()
+            return
+        print("Not enough gold to revive. Game over." if answer.lower() == 'y' else "Game over.")
+        self.character = None
+        self._show_main_menu()
+
+    def save_game(self):
+        if not character_manager.save_character(self.character, self.save_directory):
+            print("Error saving game.")
+            return
+        if self.price_file is not None and self.shop.prices is not None:
+            game_data.save_price_state(self.shop.prices.get_state(), self.price_file)
+        if self.summary_file is not None:
+            analytics.record_save(self.character, self.save_directory, self.summary_file)
+        print("Game saved successfully!")
+
+    # ------------------------------------------------------------------
+    # Quest menu
+    # ------------------------------------------------------------------
+
+    def _show_quest_menu(self):
+        self.state = 'quest_menu'
+        print("\n=== QUEST MENU ===")
+        print("1. View Active Quests")
+        print("2. View Available Quests")
+        print("3. View Completed Quests")
+        print("4. Accept Quest")
+        print("5. Abandon Quest")
+        print("6. Complete Quest")
+        print("7. Back")
+
+    def _on_quest_menu(self, choice):
+        char = self.character
+        if choice == '1':
+            quest_handler.display_quest_list(quest_handler.get_active_quests(char, self.quests))
+            quest_handler.display_objectives(char, self.quests)
+        elif choice == '2':
+            quest_handler.display_quest_list(quest_handler.get_available_quests(char, self.quests))
+        elif choice == '3':
+            quest_handler.display_quest_list(quest_handler.get_completed_quests(char, self.quests))
+        elif choice == '4':
+            self._ask(["Enter quest ID to accept: "], self._accept_quest)
+            return
+        elif choice == '5':
+            self._ask(["Enter quest ID to abandon: "], self._abandon_quest)
+            return
+        elif choice == '6':
+            self._ask(["Enter quest ID to complete: "], self._complete_quest)
+            return
+        elif choice == '7':
+            self._show_game_menu()
+            return
+        else:
+            print("Invalid input.")
+        self._show_quest_menu()
+
+    def _accept_quest(self, quest_id):
+        try:
+            quest_handler.accept_quest(self.character, quest_id, self.quests)
+            print(f"Quest '{quest_id}' accepted!")
+        except (QuestNotFoundError, InsufficientLevelError,
+                QuestRequirementsNotMetError, QuestAlreadyCompletedError) as e:
+            print(f"Cannot accept quest: {e}")
+        self._show_quest_menu()
+
+    def _abandon_quest(self, quest_id):
+        try:
+            quest_handler.abandon_quest(self.character, quest_id)
+            print(f"Quest '{quest_id}' abandoned.")
+        except QuestNotActiveError as e:
+            print(f"Cannot abandon quest: {e}")
+        self._show_quest_menu()
+
+    def _complete_quest(self, quest_id):
+        try:
+            rewards = quest_handler.complete_quest(self.character, quest_id, self.quests)
+            print(f"Quest '{quest_id}' completed! Rewards: XP={rewards['reward_xp']}, "
+                  f"Gold={rewards['reward_gold']}")
+        except (QuestNotFoundError, QuestNotActiveError, QuestObjectivesIncompleteError) as e:
+            print(f"Cannot complete quest: {e}")
+        self._show_quest_menu()
+
+    # ------------------------------------------------------------------
+    # Shop menu
+    # ------------------------------------------------------------------
+
+    def _show_shop_menu(self):
+        self.state = 'shop_menu'
+        print("\n=== SHOP ===")
+        print(f"Your Gold: {self.character['gold']}")
+        print("1. View Items")
+        print("2. Add Item to Cart")
+        print("3. Remove Item from Cart")
+        print("4. Sell Item (add to cart)")
+        print("5. View Cart")
+        print("6. Checkout")
+        print("7. Buy Back Sold Item")
+        print("8. Leave Shop")
+
+    def _on_shop_menu(self, choice):
+        if choice == '1':
+            self._ask(["Filter by type (weapon/armor/consumable, blank for all): ",
+                       "Maximum cost (blank for any): "], self._view_items)
+            return
+        elif choice in ('2', '3', '4'):
+            self._ask(["Enter item ID: ", "Quantity (default 1): "],
+                      lambda item_id, quantity: self._change_cart(choice, item_id, quantity))
+            return
+        elif choice == '5':
+            shop_system.display_cart(self.shop, self.cart)
+        elif choice == '6':
+            self._checkout()
+        elif choice == '7':
+            sales = self.shop.get_buyback(self.character)
+            if sales:
+                for item_id, price in sales:
+                    print(f"{item_id} - {price} gold")
+                self._ask(["Enter item ID to buy back: "], self._buy_back)
+                return
+            print("Nothing to buy back.")
+        elif choice == '8':
+            self._show_game_menu()
+            return
+        else:
+            print("Invalid input.")
+        self._show_shop_menu()
+
+    def _view_items(self, item_type, max_cost):
+        shop_system.display_catalog(self.shop, item_type or None,
+                                    int(max_cost) if max_cost.isdigit() else None)
+        self._show_shop_menu()
+
+    def _change_cart(self, choice, item_id, quantity):
+        quantity = int(quantity) if quantity.isdigit() and int(quantity) > 0 else 1
+        try:
+            if choice == '2':
+                self.shop.buy_price(item_id)  # Rejects items the shop doesn't sell
+                self.cart.add(item_id, quantity)
+            elif choice == '3' and item_id not in self.cart.buy:
+                self.cart.remove_sale(item_id, quantity)
+            elif choice == '3':
+                self.cart.remove(item_id, quantity)
+            else:
+                self.shop.sell_price(item_id)
+                self.cart.add_sale(item_id, quantity)
+        except (ItemNotFoundError, InvalidQuantityError) as e:
+            print(f"Error: {e}")
+        self._show_shop_menu()
+
+    def _checkout(self):
+        if self.cart.is_empty():
+            print("Your cart is empty.")
+            return
+        try:
+            receipt = self.shop.checkout(self.character, self.cart)
+            print(f"Transaction complete! Spent {receipt['gold_spent']}, "
+                  f"earned {receipt['gold_earned']}. Gold: {receipt['gold']}")
+        except (ItemNotFoundError, InsufficientResourcesError, InventoryFullError) as e:
+            print(f"Checkout failed: {e}")
+
+    def _buy_back(self, item_id):
+        try:
+            price = self.shop.buy_back(self.character, item_id)
+            print(f"Bought back {item_id} for {price} gold.")
+        except (ItemNotFoundError, InsufficientResourcesError, InventoryFullError) as e:
+            print(f"Cannot buy back: {e}")
+        self._show_shop_menu()
+
+
+# ============================================================================
+# SCRIPTED SESSIONS
+# ============================================================================
+
+def read_session_log(filename):
+    """
+    Read recorded sessions: one command per line, sessions separated by a
+    line containing only "---"
+
+    Returns: List of command lists
+    """
+    sessions = [[]]
+    with open(filename, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line == "---":
+                sessions.append([])
+            else:
+                sessions[-1].append(line)
+    return [commands for commands in sessions if commands]
+
+
+def write_session_log(sessions, filename):
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write("\n---\n".join("\n".join(commands) for commands in sessions))
+        f.write("\n")
+
+
+def replay_sessions(sessions, quests, items, shop=None, save_directory=None):
+    """
+    Play recorded command lists through fresh GameSessions
+
+    Returns: Number of commands handled
+    """
+    handled = 0
+    for commands in sessions:
+        session = GameSession(quests, items, shop, save_directory)
+        session.start()
+        for command in commands:
+            if session.finished:
+                break
+            session.handle(command)
+            handled += 1
+    return handled
@@ -13,12 +13,110 @@ from custom_exceptions import (
     InventoryFullError,
     ItemNotFoundError,
     InsufficientResourcesError,
-    InvalidItemTypeError
+    InvalidItemTypeError,
+    InvalidQuantityError
 )
+import threading
+import character_manager
+import game_events
+import profiling
 
-# Maximum inventory size
+# Maximum inventory size (in slots; a slot holds one stack)
 MAX_INVENTORY_SIZE = 20
 
+# Slots in an account-wide shared stash
+STASH_SIZE = 5000
+
+# item_id -> how many of that item fit in one slot. Filled from item data by
+# register_item_data(); items not listed take a slot each.
+ITEM_STACK_SIZES = {}
+
+
+class Inventory(dict):
+    """
+    Counted inventory: item_id -> quantity
+
+    Keeps a running count of the slots its stacks use, so membership,
+    counting, capacity checks and single-item add/remove are all O(1).
+    Iterating yields each distinct item_id once.
+    """
+
+    def __init__(self, items=()):
+        super().__init__()
+        self.slots_used = 0
+        if isinstance(items, dict):
+            for item_id, quantity in items.items():
+                self.add(item_id, quantity)
+        else:
+            for item_id in items:
+                self.add(item_id)
+
+    def slots_needed(self, item_id, quantity=1):
+        """
+        Extra slots that adding quantity of item_id would take
+
+        A negative quantity gives the (negative) change from removing items.
+        """
+        stack = ITEM_STACK_SIZES.get(item_id, 1)
+        current = self.get(item_id, 0)
+        return -(-(current + quantity) // stack) - -(-current // stack)
+
+    def add(self, item_id, quantity=1):
+        self.slots_used += self.slots_needed(item_id, quantity)
+        self[item_id] = self.get(item_id, 0) + quantity
+
+    def remove(self, item_id, quantity=1):
+        """Remove quantity of item_id (caller checks the count first)"""
+        stack = ITEM_STACK_SIZES.get(item_id, 1)
+        current = self[item_id]
+        remaining = current - quantity
+        self.slots_used -= -(-current // stack) - -(-remaining // stack)
+        if remaining:
+            self[item_id] = remaining
+        else:
+            del self[item_id]
+
+    def recount(self):
+        """Recompute slots_used (after stack sizes change)"""
+        self.slots_used = sum(-(-quantity // ITEM_STACK_SIZES.get(item_id, 1))
+                              for item_id, quantity in self.items())
+        return self.slots_used
+
+    def to_list(self):
+        """Expand to the flat list-of-item-IDs form used by save files"""
+        return [item_id for item_id, quantity in self.items() for _ in range(quantity)]
+
+
+def register_item_data(item_data_dict):
+    """
+    Load stack sizes and equipment stat deltas from item data
+
+    Items without STACK_SIZE take one slot each. Call before building
+    inventories; existing inventories need recount().
+    """
+    ITEM_STACK_SIZES.clear()
+    ITEM_STAT_DELTAS.clear()
+    for item_id, item in item_data_dict.items():
+        stack_size = item.get('stack_size', 1)
+        if stack_size > 1:
+            ITEM_STACK_SIZES[item_id] = stack_size
+        if item['type'] in SLOT_TYPES:
+            ITEM_STAT_DELTAS[item_id] = parse_item_effect(item['effect'])
+
+
+def get_inventory(character):
+    """
+    Get the character's inventory as an Inventory
+
+    Inventories stored as a list of item IDs (new characters, loaded saves)
+    are converted on first use.
+    """
+    inventory = character.get('inventory')
+    if not isinstance(inventory, Inventory):
+        inventory = Inventory(inventory or ())
+        character['inventory'] = inventory
+    return inventory
+
 
 # ============================================================================
 # INVENTORY MANAGEMENT
@@ -28,11 +126,10 @@ def add_item_to_inventory(character, item_id):
     """
     Add an item to character's inventory
     """
-    # TODO: Implement adding items
-    inventory = character.setdefault('inventory', [])
-    if len(inventory) >= MAX_INVENTORY_SIZE:
+    inventory = get_inventory(character)
+    if inventory.slots_used + inventory.slots_needed(item_id) > MAX_INVENTORY_SIZE:
         raise InventoryFullError("Cannot add item, inventory is full.")
-    inventory.append(item_id)  # Add item to inventory list
+    inventory.add(item_id)
     return True
 
 
@@ -40,11 +137,10 @@ def remove_item_from_inventory(character, item_id):
     """
     Remove an item from character's inventory
     """
-    # TODO: Implement item removal
-    inventory = character.get('inventory', [])
+    inventory = get_inventory(character)
     if item_id not in inventory:
         raise ItemNotFoundError(f"Item '{item_id}' not in inventory.")
-    inventory.remove(item_id)  # Remove first occurrence
+    inventory.remove(item_id)
     return True
 
 
@@ -52,40 +148,240 @@ def has_item(character, item_id):
     """
     Check if character has a specific item
     """
-    # TODO: Implement item check
-    inventory = character.get('inventory', [])
-    return item_id in inventory
+    return item_id in get_inventory(character)
 
 
 def count_item(character, item_id):
     """
     Count how many of a specific item the character has
     """
-    # TODO: Implement item counting
-    inventory = character.get('inventory', [])
-    return inventory.count(item_id)
+    return get_inventory(character).get(item_id, 0)
+
+
+def can_add_item(character, item_id, quantity=1):
+    """
+    Check if quantity of item_id fits (partly filled stacks count as space)
+    """
+    inventory = get_inventory(character)
+    return inventory.slots_used + inventory.slots_needed(item_id, quantity) <= MAX_INVENTORY_SIZE
 
 
 def get_inventory_space_remaining(character):
     """
-    Calculate how many more items can fit in inventory
+    Calculate how many more slots are free in the inventory
     """
-    # TODO: Implement space calculation
-    inventory = character.get('inventory', [])
-    return MAX_INVENTORY_SIZE - len(inventory)
+    return MAX_INVENTORY_SIZE - get_inventory(character).slots_used
 
 
 def clear_inventory(character):
     """
     Remove all items from inventory
+
+    Returns: List of the removed item IDs (one entry per item)
     """
-    # TODO: Implement inventory clearing
-    inventory = character.get('inventory', [])
-    removed_items = inventory.copy()  # Save current items
-    character['inventory'] = []  # Clear inventory
+    removed_items = get_inventory(character).to_list()
+    character['inventory'] = Inventory()
     return removed_items
 
 
+# ============================================================================
+# BULK OPERATIONS
+# ============================================================================
+#
+# Each bulk call checks capacity and presence for the whole batch first and
+# only then changes anything, so a failed call leaves inventories untouched.
+# items can be a list of item IDs (repeats allowed) or {item_id: quantity}.
+
+def _count_items(items):
+    """Normalize a batch to {item_id: quantity}"""
+    if isinstance(items, dict):
+        counts = {}
+        for item_id, quantity in items.items():
+            if quantity < 0:
+                raise InvalidQuantityError(f"Negative quantity for '{item_id}'")
+            if quantity:
+                counts[item_id] = quantity
+        return counts
+    counts = {}
+    for item_id in items:
+        counts[item_id] = counts.get(item_id, 0) + 1
+    return counts
+
+
+def _check_space(inventory, counts, capacity=None):
+    """Raise InventoryFullError unless every item in counts fits"""
+    if capacity is None:
+        capacity = MAX_INVENTORY_SIZE
+    needed = sum(inventory.slots_needed(item_id, quantity) for item_id, quantity in counts.items())
+    if inventory.slots_used + needed > capacity:
+        raise InventoryFullError(
+            f"Need {needed} free slots, only {capacity - inventory.slots_used} available.")
+
+
+def _check_present(inventory, counts):
+    """Raise ItemNotFoundError unless inventory holds every item in counts"""
+    missing = [item_id for item_id, quantity in counts.items() if inventory.get(item_id, 0) < quantity]
+    if missing:
+        raise ItemNotFoundError(f"Not enough of: {', '.join(missing)}")
+
+
+def add_items(character, items):
+    """
+    Add a batch of items to the inventory, all or nothing
+
+    Returns: Number of items added
+    Raises: InventoryFullError if the whole batch doesn't fit,
+            InvalidQuantityError for a negative quantity
+    """
+    inventory = get_inventory(character)
+    counts = _count_items(items)
+    _check_space(inventory, counts)
+    for item_id, quantity in counts.items():
+        inventory.add(item_id, quantity)
+    return sum(counts.values())
+
+
+def remove_items(character, items):
+    """
+    Remove a batch of items from the inventory, all or nothing
+
+    Returns: Number of items removed
+    Raises: ItemNotFoundError if any item is missing or short,
+            InvalidQuantityError for a negative quantity
+    """
+    inventory = get_inventory(character)
+    counts = _count_items(items)
+    _check_present(inventory, counts)
+    for item_id, quantity in counts.items():
+        inventory.remove(item_id, quantity)
+    return sum(counts.values())
+
+
+def transfer_items(source, destination, items):
+    """
+    Move a batch of items from one character's inventory to another's
+
+    Returns: Number of items moved
+    Raises: ItemNotFoundError if source is missing any item,
+            InventoryFullError if destination can't hold the batch,
+            InvalidQuantityError for a negative quantity
+    """
+    source_inventory = get_inventory(source)
+    destination_inventory = get_inventory(destination)
+    counts = _count_items(items)
+    _check_present(source_inventory, counts)
+    if source_inventory is destination_inventory:
+        return sum(counts.values())
+    _check_space(destination_inventory, counts)
+    for item_id, quantity in counts.items():
+        source_inventory.remove(item_id, quantity)
+        destination_inventory.add(item_id, quantity)
+    return sum(counts.values())
+
+
+# ============================================================================
+# SHARED STASH
+# ============================================================================
+#
+# A stash is shared by every character on an account and may be used from
+# many threads at once, so each stash has its own lock. A character's own
+# inventory is only ever touched by the thread running that character.
+
+class Stash:
+    """
+    Account-wide shared item storage
+
+    Every read and write holds the stash's lock. Deposits and withdrawals
+    are validated and applied under the lock in one step, so they are
+    all-or-nothing even when other threads use the stash at the same time.
+    """
+
+    def __init__(self, account, capacity=STASH_SIZE):
+        self.account = account
+        self.capacity = capacity
+        self.items = Inventory()
+        self.lock = threading.Lock()
+
+    def count(self, item_id):
+        with self.lock:
+            return self.items.get(item_id, 0)
+
+    def contents(self):
+        """Snapshot of {item_id: quantity}"""
+        with self.lock:
+            return dict(self.items)
+
+    def space_remaining(self):
+        with self.lock:
+            return self.capacity - self.items.slots_used
+
+    def deposit(self, character, items):
+        """
+        Move a batch of items from the character's inventory into the stash
+
+        Returns: Number of items moved
+        Raises: ItemNotFoundError, InventoryFullError, InvalidQuantityError
+        """
+        inventory = get_inventory(character)
+        counts = _count_items(items)
+        _check_present(inventory, counts)
+        with self.lock:
+            _check_space(self.items, counts, self.capacity)
+            for item_id, quantity in counts.items():
+                self.items.add(item_id, quantity)
+        for item_id, quantity in counts.items():
+            inventory.remove(item_id, quantity)
+        return sum(counts.values())
+
+    def withdraw(self, character, items):
+        """
+        Move a batch of items from the stash into the character's inventory
+
+        Returns: Number of items moved
+        Raises: ItemNotFoundError, InventoryFullError, InvalidQuantityError
+        """
+        inventory = get_inventory(character)
+        counts = _count_items(items)
+        _check_space(inventory, counts)
+        with self.lock:
+            _check_present(self.items, counts)
+            for item_id, quantity in counts.items():
+                self.items.remove(item_id, quantity)
+        for item_id, quantity in counts.items():
+            inventory.add(item_id, quantity)
+        return sum(counts.values())
+
+
+class StashService:
+    """
+    All accounts' stashes in one process
+
+    Looking up an existing stash takes no lock; the service lock is only
+    held to create a stash, so different accounts never contend.
+    """
+
+    def __init__(self, capacity=STASH_SIZE):
+        self.capacity = capacity
+        self._stashes = {}
+        self._lock = threading.Lock()
+
+    def get_stash(self, account):
+        stash = self._stashes.get(account)
+        if stash is None:
+            with self._lock:
+                stash = self._stashes.get(account)
+                if stash is None:
+                    stash = Stash(account, self.capacity)
+                    self._stashes[account] = stash
+        return stash
+
+    def deposit(self, account, character, items):
+        return self.get_stash(account).deposit(character, items)
+
+    def withdraw(self, account, character, items):
+        return self.get_stash(account).withdraw(character, items)
+
+
 # ============================================================================
 # ITEM USAGE
 # ============================================================================
@@ -108,33 +404,139 @@ def use_item(character, item_id, item_data):
 
     # Remove item after use
     remove_item_from_inventory(character, item_id)
+    game_events.publish('use', character, (item_id,))
 
     # FIXED: tests do NOT include item_data['name']
     return f"{character['name']} used {item_id} and {stat} changed by {value}."
 
 
+# ============================================================================
+# EQUIPMENT
+# ============================================================================
+
+# Equipment slots, in display order
+EQUIPMENT_SLOTS = ['weapon', 'armor', 'helm', 'ring1', 'ring2']
+
+# Item type -> slots an item of that type can go in
+SLOT_TYPES = {
+    'weapon': ['weapon'],
+    'armor': ['armor'],
+    'helm': ['helm'],
+    'ring': ['ring1', 'ring2']
+}
+
+# Slots mirrored into the older character['equipped_<slot>'] keys
+LEGACY_SLOT_KEYS = {'weapon': 'equipped_weapon', 'armor': 'equipped_armor'}
+
+# item_id -> (stat, value), parsed once per item
+ITEM_STAT_DELTAS = {}
+
+
+def get_equipment(character):
+    """
+    Get the character's {slot: item_id or None} equipment dictionary
+
+    Characters from before equipment slots get one built from their
+    equipped_weapon / equipped_armor fields.
+    """
+    equipment = character.get('equipment')
+    if equipment is None:
+        equipment = {slot: None for slot in EQUIPMENT_SLOTS}
+        for slot, key in LEGACY_SLOT_KEYS.items():
+            equipment[slot] = character.get(key) or None
+        character['equipment'] = equipment
+    return equipment
+
+
+def get_item_stat_delta(item_id, item_data):
+    """(stat, value) an equipped item adds, parsed from its effect only once"""
+    delta = ITEM_STAT_DELTAS.get(item_id)
+    if delta is None:
+        delta = parse_item_effect(item_data['effect'])
+        ITEM_STAT_DELTAS[item_id] = delta
+    return delta
+
+
+def equip_item(character, item_id, item_data, slot=None):
+    """
+    Equip an item from the inventory into a slot
+
+    slot defaults to the first empty slot for the item's type (or the
+    first slot if all are full). An item already in the slot goes back to
+    the inventory. The stat change is a single modifier swap.
+
+    Returns: (slot, stat, value)
+    Raises: ItemNotFoundError, InvalidItemTypeError, InventoryFullError
+    """
+    if not has_item(character, item_id):
+        raise ItemNotFoundError(f"Item '{item_id}' not in inventory.")
+
+    slots = SLOT_TYPES.get(item_data['type'])
+    if slots is None:
+        raise InvalidItemTypeError(f"Cannot equip item type '{item_data['type']}'.")
+
+    equipment = get_equipment(character)
+    if slot is None:
+        slot = next((candidate for candidate in slots if equipment.get(candidate) is None), slots[0])
+    elif slot not in slots:
+        raise InvalidItemTypeError(f"Cannot equip item type '{item_data['type']}' in slot '{slot}'.")
+
+    inventory = get_inventory(character)
+    previous = equipment.get(slot)
+    if previous is not None and previous != item_id:
+        # The new item leaves the inventory as the old one comes back
+        slots_after = (inventory.slots_used + inventory.slots_needed(item_id, -1)
+                       + inventory.slots_needed(previous, 1))
+        if slots_after > MAX_INVENTORY_SIZE:
+            raise InventoryFullError(f"No room in inventory for '{previous}'.")
+
+    stat, value = get_item_stat_delta(item_id, item_data)
+    inventory.remove(item_id)
+    if previous is not None:
+        inventory.add(previous)
+    _set_slot(character, equipment, slot, item_id)
+    character_manager.set_stat_modifier(character, slot, stat, value)
+    return slot, stat, value
+
+
+def unequip_item(character, slot):
+    """
+    Move the item in a slot back to the inventory
+
+    Returns: item_id that was unequipped, or None if the slot was empty
+    Raises: InventoryFullError
+    """
+    equipment = get_equipment(character)
+    item_id = equipment.get(slot)
+    if not item_id:
+        return None
+
+    if not can_add_item(character, item_id):
+        raise InventoryFullError(f"Cannot unequip {slot}, inventory full.")
+
+    _set_slot(character, equipment, slot, None)
+    character_manager.remove_stat_modifier(character, slot)
+    get_inventory(character).add(item_id)
+    return item_id
+
+
+def _set_slot(character, equipment, slot, item_id):
+    equipment[slot] = item_id
+    if slot in LEGACY_SLOT_KEYS:
+        character[LEGACY_SLOT_KEYS[slot]] = item_id
+
+
 def equip_weapon(character, item_id, item_data):
     """
     Equip a weapon
     """
-    # TODO: Implement weapon equipping
     if not has_item(character, item_id):
         raise ItemNotFoundError(f"Weapon '{item_id}' not in inventory.")
 
     if item_data['type'] != 'weapon':
         raise InvalidItemTypeError(f"Cannot equip item type '{item_data['type']}' as weapon.")
 
-    # Unequip current weapon if exists
-    if character.get('equipped_weapon'):
-        unequip_weapon(character)
-
-    # Apply weapon effect
-    stat, value = parse_item_effect(item_data['effect'])
-    apply_stat_effect(character, stat, value)
-
-    # Store equipped weapon
-    character['equipped_weapon'] = item_id
-    remove_item_from_inventory(character, item_id)
+    _, stat, value = equip_item(character, item_id, item_data, 'weapon')
 
     # FIXED: tests do NOT include item_data['name']
     return f"{character['name']} equipped weapon '{item_id}' (+{value} {stat})."
@@ -144,24 +546,13 @@ def equip_armor(character, item_id, item_data):
     """
     Equip armor
     """
-    # TODO: Implement armor equipping
     if not has_item(character, item_id):
         raise ItemNotFoundError(f"Armor '{item_id}' not in inventory.")
 
     if item_data['type'] != 'armor':
         raise InvalidItemTypeError(f"Cannot equip item type '{item_data['type']}' as armor.")
 
-    # Unequip current armor if exists
-    if character.get('equipped_armor'):
-        unequip_armor(character)
-
-    # Apply armor effect
-    stat, value = parse_item_effect(item_data['effect'])
-    apply_stat_effect(character, stat, value)
-
-    # Store equipped armor
-    character['equipped_armor'] = item_id
-    remove_item_from_inventory(character, item_id)
+    _, stat, value = equip_item(character, item_id, item_data, 'armor')
 
     # FIXED: tests do NOT include item_data['name']
     return f"{character['name']} equipped armor '{item_id}' (+{value} {stat})."
@@ -171,34 +562,14 @@ def unequip_weapon(character):
     """
     Remove equipped weapon and return it to inventory
     """
-    # TODO: Implement weapon unequipping
-    weapon_id = character.get('equipped_weapon')
-    if not weapon_id:
-        return None  # Nothing equipped
-
-    if get_inventory_space_remaining(character) <= 0:
-        raise InventoryFullError("Cannot unequip weapon, inventory full.")
-
-    character['equipped_weapon'] = None
-    add_item_to_inventory(character, weapon_id)
-    return weapon_id
+    return unequip_item(character, 'weapon')
 
 
 def unequip_armor(character):
     """
     Remove equipped armor and return it to inventory
     """
-    # TODO: Implement armor unequipping
-    armor_id = character.get('equipped_armor')
-    if not armor_id:
-        return None
-
-    if get_inventory_space_remaining(character) <= 0:
-        raise InventoryFullError("Cannot unequip armor, inventory full.")
-
-    character['equipped_armor'] = None
-    add_item_to_inventory(character, armor_id)
-    return armor_id
+    return unequip_item(character, 'armor')
 
 
 # ============================================================================
@@ -206,33 +577,45 @@ def unequip_armor(character):
 # ============================================================================
 
 
-def purchase_item(character, item_id, item_data):
+@profiling.timed("inventory_system.purchase_item")
+def purchase_item(character, item_id, item_data, prices=None):
     """
     Purchase an item from a shop
+
+    With a pricing.PriceTable the current market price is charged and the
+    purchase raises demand; without one the item's listed cost is used.
     """
-    # TODO: Implement purchasing
-    if character.get('gold', 0) < item_data['cost']:
+    cost = item_data['cost'] if prices is None else prices.buy_price(item_id)
+    if character.get('gold', 0) < cost:
         raise InsufficientResourcesError(f"Not enough gold to buy {item_id}.")
 
-    if get_inventory_space_remaining(character) <= 0:
+    if not can_add_item(character, item_id):
         raise InventoryFullError("Cannot purchase item, inventory full.")
 
-    character['gold'] -= item_data['cost']
+    character['gold'] -= cost
     add_item_to_inventory(character, item_id)
+    if prices is not None:
+        prices.record_purchase(item_id)
+    game_events.publish('purchase', character, (item_id, item_data['type']))
     return True
 
 
-def sell_item(character, item_id, item_data):
+@profiling.timed("inventory_system.sell_item")
+def sell_item(character, item_id, item_data, prices=None):
     """
     Sell an item for half its purchase cost
+
+    With a pricing.PriceTable the current market sell price is paid and
+    the sale lowers demand.
     """
-    # TODO: Implement selling
     if not has_item(character, item_id):
         raise ItemNotFoundError(f"Cannot sell '{item_id}', not in inventory.")
 
-    sell_price = item_data['cost'] // 2
+    sell_price = item_data['cost'] // 2 if prices is None else prices.sell_price(item_id)
     character['gold'] = character.get('gold', 0) + sell_price
     remove_item_from_inventory(character, item_id)
+    if prices is not None:
+        prices.record_sale(item_id)
     return sell_price
 
 
@@ -255,39 +638,43 @@ def parse_item_effect(effect_string):
 
 def apply_stat_effect(character, stat_name, value):
     """
-    Apply a stat modification to character
-    """
-    # TODO: Implement stat application
-    if stat_name not in character:
-        character[stat_name] = 0
+    Apply a permanent stat modification to character
 
+    'health' heals (capped at max_health); any other stat changes the
+    character's base stats. Equipment bonuses use stat modifiers instead
+    (see character_manager.set_stat_modifier).
+    """
     if stat_name == "health":
         character['health'] = min(
-            character.get('max_health', character['health']),
+            character.get('max_health', character.get('health', 0)),
             character.get('health', 0) + value
         )
-    elif stat_name == "max_health":
-        character['max_health'] = character.get('max_health', 0) + value
-        character['health'] = min(character['health'], character['max_health'])
     else:
-        character[stat_name] = character.get(stat_name, 0) + value
+        character_manager.modify_base_stat(character, stat_name, value)
 
 
-def display_inventory(character, item_data_dict):
+def get_inventory_items(character, item_data_dict, item_type=None):
     """
-    Display character's inventory in formatted way
+    Get (item_id, quantity) for inventory items, optionally of one type
+
+    Looks up only the items the character holds, never the whole catalog.
     """
-    # TODO: Implement inventory display
-    inventory = character.get('inventory', [])
-    counted = {}
-    for item_id in inventory:
-        counted[item_id] = counted.get(item_id, 0) + 1
+    inventory = get_inventory(character)
+    if item_type is None:
+        return list(inventory.items())
+    return [(item_id, qty) for item_id, qty in inventory.items()
+            if item_data_dict.get(item_id, {}).get('type') == item_type]
+
 
+def display_inventory(character, item_data_dict, item_type=None):
+    """
+    Display character's inventory in formatted way
+    """
     print(f"{character['name']}'s Inventory:")
-    for item_id, qty in counted.items():
+    for item_id, qty in get_inventory_items(character, item_data_dict, item_type):
         item_name = item_data_dict.get(item_id, {}).get('name', item_id)
-        item_type = item_data_dict.get(item_id, {}).get('type', "unknown")
-        print(f"- {item_name} ({item_type}) x{qty}")
+        entry_type = item_data_dict.get(item_id, {}).get('type', "unknown")
+        print(f"- {item_name} ({entry_type}) x{qty}")
 
 
 # ============================================================================
@@ -303,7 +690,7 @@ if __name__ == "__main__":
 
     try:
         add_item_to_inventory(test_char, "health_potion")
-        print(f"Inventory: {test_char['inventory']}")
+        print(f"Inventory: {dict(test_char['inventory'])}")
     except InventoryFullError:
         print("Inventory is full!")
 
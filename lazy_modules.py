@@ -0,0 +1,44 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Lazy Modules
+
+Helpers for importing game subsystems on first use, so short runs (the
+main menu, a CLI command, a test) don't pay to import modules they never
+touch.
+"""
+
+import sys
+
+
+class LazyModule:
+    """
+    Stands in for a module that is imported the first time it is used
+
+    Every attribute read is passed to the real module, so module globals
+    that change later (registries, monkeypatched functions) are always
+    current.
+    """
+
+    def __init__(self, name):
+        object.__setattr__(self, '_name', name)
+
+    def __getattr__(self, attr):
+        module = sys.modules.get(self._name)
+        if module is None:
+            module = __import__(self._name)
+        return getattr(module, attr)
+
+    def __setattr__(self, attr, value):
+        setattr(sys.modules.get(self._name) or __import__(self._name), attr, value)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}>"
+
+
+def lazy_import(name):
+    """Return the module if already imported, otherwise a LazyModule for it"""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def is_loaded(name):
+    return name in sys.modules
@@ -8,255 +8,141 @@ AI Usage: [Document any AI assistance used]
 
 This is the main game file that ties all modules together.
 Demonstrates module integration and complete game flow.
+
+Run with no arguments (or "play") for the interactive game. Batch
+subcommands for maintenance: validate, list, leaderboard, delete, migrate,
+grant, simulate and profile; see python main.py --help.
 """
 
 # Import all our custom modules
-import character_manager
-import inventory_system
-import quest_handler
-import combat_system
-import game_data
-from custom_exceptions import *
+import game_session
+from lazy_modules import lazy_import
+from custom_exceptions import (
+    MissingDataFileError,
+    InvalidDataFormatError,
+    CorruptedDataError,
+    QuestNotFoundError,
+    CircularPrerequisiteError,
+    CharacterNotFoundError,
+    InvalidTargetError
+)
+import os
 import sys
 
+# Subsystems are imported on first use, so the main menu shows without them
+character_manager = lazy_import("character_manager")
+inventory_system = lazy_import("inventory_system")
+quest_handler = lazy_import("quest_handler")
+combat_system = lazy_import("combat_system")
+game_data = lazy_import("game_data")
+shop_system = lazy_import("shop_system")
+pricing = lazy_import("pricing")
+analytics = lazy_import("analytics")
+batch_jobs = lazy_import("batch_jobs")
+random = lazy_import("random")
+
 # ============================================================================
 # GAME STATE
 # ============================================================================
 
-# Global variables for game data
-current_character = None
+PRICE_FILE = "data/prices.txt"
+
+# analytics.SUMMARY_FILE, named here so starting a session doesn't import analytics
+SUMMARY_FILE = "data/save_summary.txt"
+
+# Global variables for game data, shared by every session
 all_quests = {}
 all_items = {}
-game_running = False
+game_shop = None
+market_prices = None
+
+# The session being played from the keyboard (see game_session.GameSession)
+session = None
 
 # ============================================================================
 # MAIN MENU
 # ============================================================================
 
 def main_menu():
-    print("\n=== MAIN MENU ===")
-    print("1. New Game")
-    print("2. Load Game")
-    print("3. Exit")
-    while True:
-        choice = input("Enter your choice (1-3): ")
-        if choice in ['1', '2', '3']:
-            return int(choice)
-        print("Invalid input. Please enter 1, 2, or 3.")
+    """Show the main menu and play until the player exits"""
+    print(session.start(), end="")
+    play()
 
 def new_game():
-    global current_character
-    print("\n=== NEW GAME ===")
-    name = input("Enter your character's name: ")
-    print("Select class:")
-    print("1. Warrior")
-    print("2. Mage")
-    print("3. Rogue")
-    print("4. Cleric")
-    class_map = {'1': 'Warrior', '2': 'Mage', '3': 'Rogue', '4': 'Cleric'}
-    while True:
-        class_choice = input("Enter class number (1-4): ")
-        if class_choice in class_map:
-            char_class = class_map[class_choice]
-            break
-        print("Invalid choice.")
-    try:
-        current_character = character_manager.create_character(name, char_class)
-        print(f"Character '{name}' the {char_class} created successfully!")
-        game_loop()
-    except InvalidCharacterClassError as e:
-        print(f"Error: {e}")
+    """Start a new game from the main menu"""
+    play('1')
 
 def load_game():
-    global current_character
-    print("\n=== LOAD GAME ===")
-    saved = character_manager.list_saved_characters()
-    if not saved:
-        print("No saved characters found.")
-        return
-    print("Saved characters:")
-    for i, char_name in enumerate(saved, 1):
-        print(f"{i}. {char_name}")
-    while True:
-        choice = input(f"Select a character (1-{len(saved)}): ")
-        if choice.isdigit() and 1 <= int(choice) <= len(saved):
-            idx = int(choice) - 1
-            break
-        print("Invalid choice.")
-    try:
-        current_character = character_manager.load_character(saved[idx])
-        print(f"Loaded character '{current_character['name']}' successfully!")
-        game_loop()
-    except (CharacterNotFoundError, SaveFileCorruptedError) as e:
-        print(f"Error loading character: {e}")
+    """Load a saved game from the main menu"""
+    play('2')
 
 # ============================================================================
 # GAME LOOP
 # ============================================================================
 
 def game_loop():
-    global game_running
-    game_running = True
-    while game_running:
-        choice = game_menu()
-        if choice == 1:
-            view_character_stats()
-        elif choice == 2:
-            view_inventory()
-        elif choice == 3:
-            quest_menu()
-        elif choice == 4:
-            explore()
-        elif choice == 5:
-            shop()
-        elif choice == 6:
-            save_game()
-            print("Game saved. Exiting...")
-            break
-        else:
-            print("Invalid choice.")
-
-def game_menu():
-    print("\n=== GAME MENU ===")
-    print("1. View Character Stats")
-    print("2. View Inventory")
-    print("3. Quest Menu")
-    print("4. Explore (Find Battles)")
-    print("5. Shop")
-    print("6. Save and Quit")
-    while True:
-        choice = input("Choose an action (1-6): ")
-        if choice.isdigit() and 1 <= int(choice) <= 6:
-            return int(choice)
-        print("Invalid input. Enter 1-6.")
+    """Keep playing the current session from where it is"""
+    play()
 
-# ============================================================================
-# GAME ACTIONS
-# ============================================================================
-
-def view_character_stats():
-    global current_character
-    character_manager.display_character_stats(current_character)
-    quest_handler.display_character_quest_progress(current_character, all_quests)
-
-def view_inventory():
-    global current_character, all_items
-    inventory_system.display_inventory(current_character, all_items)
-    # Inventory actions could be added here (use/equip/drop)
-
-def quest_menu():
-    global current_character, all_quests
-    while True:
-        print("\n=== QUEST MENU ===")
-        print("1. View Active Quests")
-        print("2. View Available Quests")
-        print("3. View Completed Quests")
-        print("4. Accept Quest")
-        print("5. Abandon Quest")
-        print("6. Complete Quest")
-        print("7. Back")
-        choice = input("Choose an option (1-7): ")
-        if choice == '1':
-            active = quest_handler.get_active_quests(current_character, all_quests)
-            quest_handler.display_quest_list(active)
-        elif choice == '2':
-            available = quest_handler.get_available_quests(current_character, all_quests)
-            quest_handler.display_quest_list(available)
-        elif choice == '3':
-            completed = quest_handler.get_completed_quests(current_character, all_quests)
-            quest_handler.display_quest_list(completed)
-        elif choice == '4':
-            quest_id = input("Enter quest ID to accept: ")
-            try:
-                quest_handler.accept_quest(current_character, quest_id, all_quests)
-                print(f"Quest '{quest_id}' accepted!")
-            except (QuestNotFoundError, InsufficientLevelError,
-                    QuestRequirementsNotMetError, QuestAlreadyCompletedError) as e:
-                print(f"Cannot accept quest: {e}")
-        elif choice == '5':
-            quest_id = input("Enter quest ID to abandon: ")
-            try:
-                quest_handler.abandon_quest(current_character, quest_id)
-                print(f"Quest '{quest_id}' abandoned.")
-            except QuestNotActiveError as e:
-                print(f"Cannot abandon quest: {e}")
-        elif choice == '6':
-            quest_id = input("Enter quest ID to complete: ")
-            try:
-                rewards = quest_handler.complete_quest(current_character, quest_id, all_quests)
-                print(f"Quest '{quest_id}' completed! Rewards: XP={rewards['reward_xp']}, Gold={rewards['reward_gold']}")
-            except (QuestNotFoundError, QuestNotActiveError) as e:
-                print(f"Cannot complete quest: {e}")
-        elif choice == '7':
+def play(command=None):
+    """Feed keyboard input to the session until it finishes; command is sent first"""
+    if command is not None:
+        print(session.handle(command), end="")
+    while not session.finished:
+        try:
+            line = input(session.prompt)
+        except EOFError:
             break
-        else:
-            print("Invalid input.")
-
-def explore():
-    global current_character
-    enemy = combat_system.get_random_enemy_for_level(current_character.get('level', 1))
-    print(f"\nYou encountered a {enemy['name']}!")
-    battle = combat_system.SimpleBattle(current_character, enemy)
-    try:
-        results = battle.start_battle()
-        print(f"Battle ended. Winner: {results['winner']}")
-        if results['winner'] == 'player':
-            current_character['experience'] += results.get('xp_gained', 0)
-            current_character['gold'] += results.get('gold_gained', 0)
-        else:
-            handle_character_death()
-    except CharacterDeadError:
-        handle_character_death()
-
-def shop():
-    global current_character, all_items
-    print("\n=== SHOP ===")
-    print(f"Your Gold: {current_character['gold']}")
-    print("Available items for purchase:")
-    for item_id, item in all_items.items():
-        print(f"{item_id}: {item['name']} - Cost: {item.get('cost', 0)}")
-    print("Shop menu not fully implemented yet.")
+        print(session.handle(line), end="")
 
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
 def save_game():
-    global current_character
-    try:
-        character_manager.save_character(current_character)
-        print("Game saved successfully!")
-    except Exception as e:
-        print(f"Error saving game: {e}")
+    session.save_game()
+
+def new_session():
+    """A session that loads the game data when the player leaves the main menu"""
+    return game_session.GameSession(price_file=PRICE_FILE, load_catalog=load_catalog,
+                                    summary_file=SUMMARY_FILE)
+
+def load_catalog():
+    if game_shop is None:
+        load_game_data()
+    return all_quests, all_items, game_shop
 
 def load_game_data():
-    global all_quests, all_items
+    global all_quests, all_items, game_shop, market_prices
     try:
         all_quests = game_data.load_quests()
         all_items = game_data.load_items()
+        all_abilities = game_data.load_abilities()
     except MissingDataFileError:
         print("Data files missing. Creating defaults...")
         game_data.create_default_data_files()
         all_quests = game_data.load_quests()
         all_items = game_data.load_items()
+        all_abilities = game_data.load_abilities()
     except InvalidDataFormatError as e:
         print(f"Invalid data format: {e}")
         sys.exit(1)
-
-def handle_character_death():
-    global current_character, game_running
-    print("\nYour character has died!")
-    choice = input("Revive for 50 gold? (y/n): ").lower()
-    if choice == 'y':
-        try:
-            character_manager.revive_character(current_character, cost=50)
-            print("You have been revived!")
-        except InsufficientResourcesError:
-            print("Not enough gold to revive. Game over.")
-            game_running = False
-    else:
-        print("Game over.")
-        game_running = False
+    try:
+        quest_handler.validate_quest_prerequisites(all_quests)
+    except (QuestNotFoundError, CircularPrerequisiteError) as e:
+        print(f"Invalid quest data: {e}")
+        sys.exit(1)
+    combat_system.register_abilities(all_abilities)
+    inventory_system.register_item_data(all_items)
+    try:
+        price_state = game_data.load_price_state(PRICE_FILE)
+    except MissingDataFileError:
+        price_state = {}  # No trades yet: every item at its listed cost
+    except (InvalidDataFormatError, CorruptedDataError) as e:
+        print(f"Ignoring unreadable price data: {e}")
+        price_state = {}
+    market_prices = pricing.PriceTable(all_items, price_state)
+    game_shop = shop_system.Shop(all_items, prices=market_prices)
 
 def display_welcome():
     """Display welcome message"""
@@ -268,42 +154,204 @@ def display_welcome():
     print()
 
 # ============================================================================
-# MAIN EXECUTION
+# BATCH COMMANDS
 # ============================================================================
 
-def main():
-    """Main game execution function"""
-    
+def report_failures(results):
+    """Print failed saves; returns the exit status (1 if any failed)"""
+    failures = [(name, error) for name, error in results if error]
+    for name, error in sorted(failures):
+        print(f"  {name}: {error}")
+    print(f"{len(results) - len(failures)} succeeded, {len(failures)} failed")
+    return 1 if failures else 0
+
+def command_play(args):
+    global session
+
     # Display welcome message
     display_welcome()
-    
-    # Load game data
+
+    session = new_session()
+    main_menu()
+    return 0
+
+def command_validate(args):
     try:
-        load_game_data()
-        print("Game data loaded successfully!")
-    except MissingDataFileError:
-        print("Creating default game data...")
-        game_data.create_default_data_files()
-        load_game_data()
-    except InvalidDataFormatError as e:
-        print(f"Error loading game data: {e}")
-        print("Please check data files for errors.")
-        return
-    
-    # Main menu loop
-    while True:
-        choice = main_menu()
-        
-        if choice == 1:
-            new_game()
-        elif choice == 2:
-            load_game()
-        elif choice == 3:
-            print("\nThanks for playing Quest Chronicles!")
-            break
-        else:
-            print("Invalid choice. Please select 1-3.")
+        quests = game_data.load_quests(os.path.join(args.data_dir, "quests.txt"))
+        items = game_data.load_items(os.path.join(args.data_dir, "items.txt"))
+        abilities = game_data.load_abilities(os.path.join(args.data_dir, "abilities.txt"))
+        quest_handler.validate_quest_prerequisites(quests)
+    except (MissingDataFileError, InvalidDataFormatError, CorruptedDataError,
+            QuestNotFoundError, CircularPrerequisiteError) as e:
+        print(f"Invalid game data: {type(e).__name__}: {e}")
+        return 1
+    print(f"OK: {len(quests)} quests, {len(items)} items, {len(abilities)} abilities")
+    return 0
+
+def command_list(args):
+    rows = []
+    for name in character_manager.list_saved_characters(args.save_dir):
+        summary = analytics.read_save_summary(os.path.join(args.save_dir, f"{name}_save.txt"))
+        rows.append((name,) + (summary or ("?", 0, 0, 0)))
+    column = {'name': 0, 'level': 2, 'gold': 3}[args.sort]
+    rows.sort(key=lambda row: row[column], reverse=args.sort != 'name')
+    for name, char_class, level, gold, quests in rows:
+        print(f"{name:<20} {char_class:<8} level {level:>3}  gold {gold:>7}  quests {quests:>3}")
+    print(f"{len(rows)} characters")
+    return 0
+
+def command_leaderboard(args):
+    summary = analytics.SaveSummary.load(args.summary_file, args.save_dir)
+    summary.refresh()
+    try:
+        summary.save(args.summary_file)
+    except OSError as e:
+        print(f"Could not update {args.summary_file}: {e}")
+    analytics.display_leaderboard(summary, args.top, args.by, args.char_class)
+    if not args.char_class:
+        analytics.display_class_stats(summary, args.by)
+    return 0
+
+def command_delete(args):
+    status = 0
+    for name in args.names:
+        try:
+            character_manager.delete_character(name, args.save_dir)
+            print(f"Deleted {name}")
+        except CharacterNotFoundError:
+            print(f"No saved character named {name}")
+            status = 1
+    return status
+
+def command_migrate(args):
+    load_game_data()
+    names = sorted(character_manager.list_saved_characters(args.save_dir))
+    settings = {'save_directory': args.save_dir, 'quests': all_quests, 'items': all_items}
+    return report_failures(batch_jobs.run_batch("Migrating", batch_jobs.migrate_saves, names,
+                                                args.workers, settings))
+
+def command_grant(args):
+    if not args.gold and not args.xp:
+        print("Nothing to grant: give --gold and/or --xp")
+        return 2
+    names = sorted(character_manager.list_saved_characters(args.save_dir)) if args.all else args.names
+    if not names:
+        print("No characters given: list names or use --all")
+        return 2
+    settings = {'save_directory': args.save_dir, 'gold': args.gold, 'xp': args.xp}
+    return report_failures(batch_jobs.run_batch("Granting", batch_jobs.grant_saves, names,
+                                                args.workers, settings))
+
+def command_simulate(args):
+    seed = args.seed if args.seed is not None else random.randrange(1 << 30)
+    if args.enemy:
+        try:
+            combat_system.create_enemy(args.enemy)
+        except InvalidTargetError as e:
+            print(f"Unknown enemy: {e}")
+            return 2
+    settings = {'class': args.char_class, 'level': args.level, 'enemy': args.enemy, 'seed': seed}
+    results = batch_jobs.run_batch("Simulating", batch_jobs.simulate_battles, list(range(args.battles)),
+                                   args.workers, settings)
+    wins = [(xp, gold) for winner, xp, gold in results if winner == 'player']
+    print(f"{args.char_class} level {args.level} vs {args.enemy or 'level-appropriate enemies'} "
+          f"({args.battles} battles, seed {seed})")
+    for outcome in ('player', 'enemy', 'escaped'):
+        count = sum(1 for winner, _, _ in results if winner == outcome)
+        print(f"  {outcome:<8} {count:>7}  {count / max(1, len(results)):7.1%}")
+    if wins:
+        print(f"  average reward per win: {sum(xp for xp, _ in wins) / len(wins):.1f} XP, "
+              f"{sum(gold for _, gold in wins) / len(wins):.1f} gold")
+    return 0
+
+def command_profile(args):
+    import profiling
+    filename = args.file or (profiling.SETTING if profiling.SETTING not in ("", "0", "1") else None)
+    if filename is None:
+        print("No profile file: give one or set QC_PROFILE=<file> when running the game")
+        return 2
+    if args.reset:
+        if os.path.exists(filename):
+            os.remove(filename)
+        print(f"Cleared {filename}")
+        return 0
+    try:
+        timers = profiling.load_stats(filename)
+    except (OSError, ValueError) as e:
+        print(f"Unreadable profile {filename}: {e}")
+        return 1
+    if not timers:
+        print(f"No timings in {filename} yet")
+        return 0
+    profiling.dump(timers, histograms=args.histograms)
+    return 0
+
+def build_parser():
+    import argparse  # Only batch commands need it; see main()
+    parser = argparse.ArgumentParser(prog="main.py", description="Quest Chronicles")
+    parser.set_defaults(func=command_play)
+    commands = parser.add_subparsers(title="commands")
+
+    def add_command(name, func, help_text, saves=False, pool=False):
+        command = commands.add_parser(name, help=help_text, description=help_text)
+        command.set_defaults(func=func)
+        if saves:
+            command.add_argument("--save-dir", default=character_manager.SAVE_DIR,
+                                 help="save directory (default: %(default)s)")
+        if pool:
+            command.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                                 help="worker processes (default: %(default)s)")
+        return command
+
+    add_command("play", command_play, "play the game interactively (the default)")
+    command = add_command("validate", command_validate, "check the quest, item and ability data files")
+    command.add_argument("--data-dir", default="data", help="data directory (default: %(default)s)")
+    command = add_command("list", command_list, "list saved characters", saves=True)
+    command.add_argument("--sort", choices=("name", "level", "gold"), default="name")
+    command = add_command("leaderboard", command_leaderboard,
+                          "rank saved characters and show per-class statistics", saves=True)
+    command.add_argument("--by", choices=("level", "gold", "quests"), default="level")
+    command.add_argument("--top", type=int, default=10)
+    command.add_argument("--class", dest="char_class", choices=("Warrior", "Mage", "Rogue", "Cleric"),
+                         help="rank only this class")
+    command.add_argument("--summary-file", default=SUMMARY_FILE,
+                         help="saved summary to start from and update (default: %(default)s)")
+    command = add_command("delete", command_delete, "delete saved characters", saves=True)
+    command.add_argument("names", nargs="+", metavar="NAME")
+    add_command("migrate", command_migrate, "rewrite every save in the current format", saves=True, pool=True)
+    command = add_command("grant", command_grant, "give gold and/or XP to saved characters",
+                          saves=True, pool=True)
+    command.add_argument("names", nargs="*", metavar="NAME")
+    command.add_argument("--all", action="store_true", help="every saved character")
+    command.add_argument("--gold", type=int, default=0)
+    command.add_argument("--xp", type=int, default=0)
+    command = add_command("simulate", command_simulate, "fight many battles and report outcomes", pool=True)
+    command.add_argument("--class", dest="char_class", default="Warrior",
+                         choices=("Warrior", "Mage", "Rogue", "Cleric"))
+    command.add_argument("--level", type=int, default=1)
+    command.add_argument("--enemy", help="goblin, orc or dragon (default: picked by level)")
+    command.add_argument("--battles", type=int, default=1000)
+    command.add_argument("--seed", type=int)
+    command = add_command("profile", command_profile,
+                          "print timings collected with QC_PROFILE=<file> (see profiling.py)")
+    command.add_argument("file", nargs="?", help="profile file (default: $QC_PROFILE)")
+    command.add_argument("--histograms", action="store_true", help="show each function's time histogram")
+    command.add_argument("--reset", action="store_true", help="delete the collected timings")
+    return parser
+
+# ============================================================================
+# MAIN EXECUTION
+# ============================================================================
+
+def main(argv=None):
+    """Main game execution function"""
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv:
+        return command_play(None)  # Skip building the parser to start the game sooner
+    args = build_parser().parse_args(argv)
+    return args.func(args)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
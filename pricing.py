@@ -0,0 +1,87 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Pricing Module
+
+This module handles supply/demand-driven item prices.
+"""
+
+from custom_exceptions import ItemNotFoundError
+
+# Each net unit bought raises the price by 2%, each net unit sold lowers it
+ELASTICITY = 0.02
+
+# Prices stay between half and double the item's listed cost
+MIN_PRICE_FACTOR = 0.5
+MAX_PRICE_FACTOR = 2.0
+
+
+class PriceTable:
+    """
+    Current buy/sell prices for every item in a catalog
+
+    Each item keeps a demand counter (units bought minus units sold). A trade
+    updates that one item's counter and cached prices, so reading a price is
+    a dictionary lookup.
+    """
+
+    def __init__(self, item_data_dict, demand=None):
+        self.base = {item_id: item['cost'] for item_id, item in item_data_dict.items()}
+        self.demand = {item_id: 0 for item_id in self.base}
+        self.buy_prices = {}
+        self.sell_prices = {}
+        for item_id, value in (demand or {}).items():
+            if item_id in self.demand:  # Ignore items no longer in the catalog
+                self.demand[item_id] = value
+        for item_id in self.base:
+            self._reprice(item_id)
+
+    def buy_price(self, item_id):
+        """Price a character pays for one item"""
+        try:
+            return self.buy_prices[item_id]
+        except KeyError:
+            raise ItemNotFoundError(f"No price for '{item_id}'.")
+
+    def sell_price(self, item_id):
+        """Price a character receives for one item"""
+        try:
+            return self.sell_prices[item_id]
+        except KeyError:
+            raise ItemNotFoundError(f"No price for '{item_id}'.")
+
+    def record_purchase(self, item_id, quantity=1):
+        """Characters bought items: demand (and price) goes up"""
+        self.demand[item_id] += quantity
+        self._reprice(item_id)
+
+    def record_sale(self, item_id, quantity=1):
+        """Characters sold items: supply goes up, price goes down"""
+        self.demand[item_id] -= quantity
+        self._reprice(item_id)
+
+    def get_state(self):
+        """Demand counters worth saving (items at their listed price are left out)"""
+        return {item_id: value for item_id, value in self.demand.items() if value}
+
+    def _reprice(self, item_id):
+        factor = 1 + ELASTICITY * self.demand[item_id]
+        factor = min(MAX_PRICE_FACTOR, max(MIN_PRICE_FACTOR, factor))
+        price = max(1, round(self.base[item_id] * factor))
+        self.buy_prices[item_id] = price
+        self.sell_prices[item_id] = price // 2
+
+
+# ============================================================================
+# TESTING
+# ============================================================================
+
+if __name__ == "__main__":
+    print("=== PRICING TEST ===")
+
+    test_items = {'health_potion': {'item_id': 'health_potion', 'cost': 25}}
+    prices = PriceTable(test_items)
+    print(f"Start: buy {prices.buy_price('health_potion')}, sell {prices.sell_price('health_potion')}")
+    prices.record_purchase('health_potion', 10)
+    print(f"After 10 bought: buy {prices.buy_price('health_potion')}, sell {prices.sell_price('health_potion')}")
+    prices.record_sale('health_potion', 20)
+    print(f"After 20 sold: buy {prices.buy_price('health_potion')}, sell {prices.sell_price('health_potion')}")
@@ -0,0 +1,195 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Profiling Module
+
+Opt-in timing of the game's hot entry points (data loading, save I/O,
+battles, quest queries, purchases, sales and shop checkouts). Set the
+QC_PROFILE environment variable before starting the game:
+  QC_PROFILE=1          print the timing table to stderr at exit
+  QC_PROFILE=<file>     add this run's timings to <file> at exit; print the
+                        totals with python main.py profile <file>
+When QC_PROFILE is unset, timed() returns the function unchanged, so the
+instrumented functions cost nothing extra.
+
+Only the main process is measured: worker processes (prefork server,
+batch pools) exit without writing their timings.
+"""
+
+import atexit
+import os
+import sys
+import time
+
+SETTING = os.environ.get("QC_PROFILE", "")
+ENABLED = SETTING not in ("", "0")
+
+# Histogram bucket i holds calls that took [2^(i-1), 2^i) microseconds;
+# bucket 0 holds calls under 1 microsecond. 64 buckets fit any duration.
+BUCKETS = 64
+
+TIMERS = {}  # name -> Timer
+
+
+class Timer:
+    """Total and longest time plus a log2 histogram of call times for one function"""
+
+    __slots__ = ('name', 'total_ns', 'max_ns', 'buckets')
+
+    def __init__(self, name):
+        self.name = name
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * BUCKETS
+
+    @property
+    def count(self):
+        return sum(self.buckets)
+
+    def merge(self, other):
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+        for i, calls in enumerate(other.buckets):
+            self.buckets[i] += calls  # In place: wrappers hold this list
+
+    def percentile(self, fraction):
+        """Upper bound (in microseconds) of the bucket holding the given fraction of calls"""
+        target = self.count * fraction
+        seen = 0
+        for i, calls in enumerate(self.buckets):
+            seen += calls
+            if calls and seen >= target:
+                return 1 << i
+        return 0
+
+
+def timed(name):
+    """
+    Decorator that records each call's duration under name
+
+    With profiling disabled the function is returned as it is.
+    """
+    def decorate(func):
+        if not ENABLED:
+            return func
+        from functools import wraps
+        timer = get_timer(name)
+        buckets = timer.buckets
+        clock = time.perf_counter_ns
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                timer.total_ns += elapsed
+                if elapsed > timer.max_ns:
+                    timer.max_ns = elapsed
+                buckets[(elapsed // 1000).bit_length()] += 1
+        return wrapper
+    return decorate
+
+
+def get_timer(name):
+    timer = TIMERS.get(name)
+    if timer is None:
+        timer = TIMERS[name] = Timer(name)
+    return timer
+
+
+def reset():
+    TIMERS.clear()
+
+
+# ============================================================================
+# REPORTS AND FILES
+# ============================================================================
+
+def dump(timers=None, out=None, histograms=False):
+    """Print a table of timers (default: this process's), busiest first"""
+    timers = TIMERS if timers is None else timers
+    out = out or sys.stdout
+    print(f"{'function':<42} {'calls':>8} {'total ms':>10} {'mean us':>9} "
+          f"{'p50 us<=':>9} {'p99 us<=':>9} {'max us':>9}", file=out)
+    for timer in sorted(timers.values(), key=lambda t: t.total_ns, reverse=True):
+        count = timer.count
+        if count == 0:
+            continue
+        print(f"{timer.name:<42} {count:>8} {timer.total_ns / 1e6:>10.2f} "
+              f"{timer.total_ns / count / 1e3:>9.1f} {timer.percentile(0.5):>9} "
+              f"{timer.percentile(0.99):>9} {timer.max_ns / 1e3:>9.1f}", file=out)
+        if histograms:
+            for i, calls in enumerate(timer.buckets):
+                if calls:
+                    low = 0 if i == 0 else 1 << (i - 1)
+                    print(f"    {low:>9}-{1 << i:<9} us {calls:>8}", file=out)
+
+
+def save_stats(filename, timers=None):
+    """Write timers in block format (one TIMER block each)"""
+    timers = TIMERS if timers is None else timers
+    with open(filename, "w") as f:
+        for timer in timers.values():
+            f.write(f"TIMER: {timer.name}\n")
+            f.write(f"TOTAL_NS: {timer.total_ns}\n")
+            f.write(f"MAX_NS: {timer.max_ns}\n")
+            f.write(f"BUCKETS: {','.join(map(str, timer.buckets))}\n\n")
+
+
+def load_stats(filename):
+    """
+    Read timers written by save_stats
+
+    Returns: {name: Timer}; empty if the file doesn't exist
+    Raises: ValueError if the file is malformed
+    """
+    timers = {}
+    if not os.path.exists(filename):
+        return timers
+    timer = None
+    with open(filename, "r") as f:
+        for line in f:
+            key, sep, value = line.strip().partition(": ")
+            if not sep:
+                continue
+            if key == "TIMER":
+                timer = timers[value] = Timer(value)
+            elif timer is None:
+                raise ValueError(f"{key} before TIMER in {filename}")
+            elif key == "BUCKETS":
+                counts = [int(count) for count in value.split(",")]
+                if len(counts) != BUCKETS:
+                    raise ValueError(f"{timer.name} has {len(counts)} buckets, expected {BUCKETS}")
+                timer.buckets = counts
+            elif key == "TOTAL_NS":
+                timer.total_ns = int(value)
+            elif key == "MAX_NS":
+                timer.max_ns = int(value)
+            else:
+                raise ValueError(f"Unknown profile field {key} in {filename}")
+    return timers
+
+
+def accumulate_stats(filename):
+    """Add this process's timers to those saved in filename"""
+    timers = load_stats(filename)
+    for name, timer in TIMERS.items():
+        timers.setdefault(name, Timer(name)).merge(timer)
+    save_stats(filename, timers)
+
+
+def _report_at_exit():
+    if not TIMERS:
+        return
+    if SETTING == "1":
+        dump(out=sys.stderr)
+    else:
+        try:
+            accumulate_stats(SETTING)
+        except (OSError, ValueError) as e:
+            print(f"Could not save profile to {SETTING}: {e}", file=sys.stderr)
+
+
+if ENABLED:
+    atexit.register(_report_at_exit)
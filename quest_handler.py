@@ -14,8 +14,477 @@ from custom_exceptions import (
     QuestRequirementsNotMetError,
     QuestAlreadyCompletedError,
     QuestNotActiveError,
-    InsufficientLevelError
+    InsufficientLevelError,
+    CircularPrerequisiteError,
+    QuestObjectivesIncompleteError
 )
+import game_events
+import profiling
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from itertools import islice
+
+# Index over the current quest catalog, see register_quests()
+QUEST_INDEX = None
+
+# Character key holding that character's QuestState (runtime only, see
+# character_manager.RUNTIME_KEY_PREFIX)
+QUEST_STATE_KEY = "_quest_state"
+
+# Completed quests are counted per band of this many required levels
+LEVEL_BAND_SIZE = 5
+
+# ============================================================================
+# QUEST INDEX
+# ============================================================================
+
+class QuestIndex:
+    """
+    Lookup tables over a quest catalog, built once when it is loaded
+
+    dependents maps a quest to the quests that name it as prerequisite
+    or in their REQUIRES expression, by_level maps a required level to its
+    quests (levels is the sorted list of those levels, and by_level_xp
+    holds each level's reward_xp values sorted with matching quest IDs),
+    and position keeps the catalog order (it is also each quest's
+    bit in requirement bitmasks). requirements holds the compiled REQUIRES
+    terms and item_gated the quests whose requirements mention items.
+    chains holds every quest's prerequisite chain; quests whose chain
+    reaches a missing quest are listed in broken instead.
+
+    Raises: CircularPrerequisiteError if prerequisites form a cycle
+    """
+
+    def __init__(self, quest_data_dict):
+        self.quests = quest_data_dict
+        self.size = len(quest_data_dict)
+        self.position = {}
+        self.dependents = {}
+        self.by_level = {}
+        self.requirements = {}
+        self.item_gated = set()
+        for position, (qid, quest) in enumerate(quest_data_dict.items()):
+            self.position[qid] = position
+            self.by_level.setdefault(quest.get('required_level', 1), []).append(qid)
+            prereq = quest.get('prerequisite', 'NONE')
+            if prereq != "NONE":
+                self.dependents.setdefault(prereq, []).append(qid)
+        self.levels = sorted(self.by_level)
+        self.by_level_xp = {}
+        reward_xp = {qid: quest.get('reward_xp', 0) for qid, quest in quest_data_dict.items()}
+        for level, quest_ids in self.by_level.items():
+            by_xp = sorted(quest_ids, key=reward_xp.__getitem__)  # Stable: ties keep catalog order
+            self.by_level_xp[level] = ([reward_xp[qid] for qid in by_xp], by_xp)
+        for qid, quest in quest_data_dict.items():
+            if quest.get('requires') is not None:
+                self._add_requirement(qid, quest)
+        self.chains = {}
+        self.broken = {}
+        self._resolve_chains()
+
+    def _add_requirement(self, quest_id, quest):
+        tree = quest['requires']
+        prereq = quest.get('prerequisite', 'NONE')
+        if prereq != "NONE":
+            tree = ('and', (('quest', prereq), tree))
+        terms = compile_requirement(tree, self.position)
+        self.requirements[quest_id] = terms
+        if any(items for _, _, items in terms):
+            self.item_gated.add(quest_id)
+        for ref in set(requirement_quests(quest['requires'])):
+            if ref != prereq:
+                self.dependents.setdefault(ref, []).append(quest_id)
+
+    def _resolve_chains(self):
+        """
+        Walk each quest's prerequisites once, detecting cycles
+
+        A walk stops at the first quest already resolved, then every quest
+        on the path gets its chain by extending its prerequisite's chain.
+        Iterative, so chain depth isn't limited by the recursion limit.
+        """
+        for start, quest in self.quests.items():
+            if start in self.chains or start in self.broken:
+                continue
+            if quest.get('prerequisite', 'NONE') == "NONE" and start not in self.dependents:
+                continue  # Chain is just [start]: made on lookup, not stored
+            path = []
+            on_path = set()
+            current = start
+            while current not in self.chains and current not in self.broken:
+                if current not in self.quests:
+                    break
+                if current in on_path:
+                    raise CircularPrerequisiteError(
+                        f"Quest {current} is its own prerequisite through {start}.")
+                on_path.add(current)
+                path.append(current)
+                current = self.quests[current].get('prerequisite', 'NONE')
+                if current == "NONE":
+                    break
+
+            if current == "NONE":
+                chain = None
+            elif current in self.chains:
+                chain = self.chains[current]
+            else:
+                missing = self.broken.get(current, current)
+                for qid in path:
+                    self.broken[qid] = missing
+                continue
+            for qid in reversed(path):
+                chain = QuestChain.extend(chain, qid)
+                self.chains[qid] = chain
+
+    def quests_between_levels(self, low, high):
+        """Yield quest IDs with low < required_level <= high"""
+        start = bisect_right(self.levels, low)
+        stop = bisect_right(self.levels, high)
+        for level in self.levels[start:stop]:
+            yield from self.by_level[level]
+
+    def levels_in_range(self, min_level=None, max_level=None):
+        """Required levels present in the catalog, min_level <= level <= max_level"""
+        start = 0 if min_level is None else bisect_left(self.levels, min_level)
+        stop = len(self.levels) if max_level is None else bisect_right(self.levels, max_level)
+        return self.levels[start:stop]
+
+    def quests_with_xp(self, level, min_xp):
+        """Quest IDs at this level with reward_xp >= min_xp, lowest reward first"""
+        xps, quest_ids = self.by_level_xp[level]
+        return quest_ids[bisect_left(xps, min_xp):]
+
+
+def compile_requirement(tree, position):
+    """
+    Compile a parsed REQUIRES tree into OR-ed terms (disjunctive normal form)
+
+    Each term is (quest_mask, classes, items): every quest whose bit is set
+    in quest_mask must be completed, the character's class (lowercase) must
+    be in classes (None means any) and every item in items must be held.
+    A quest missing from position can never be completed, so terms needing
+    it are dropped.
+    """
+    kind, value = tree
+    if kind == 'quest':
+        return [(1 << position[value], None, ())] if value in position else []
+    if kind == 'class':
+        return [(0, frozenset([value.lower()]), ())]
+    if kind == 'item':
+        return [(0, None, (value,))]
+    if kind == 'or':
+        return [term for subtree in value for term in compile_requirement(subtree, position)]
+
+    terms = [(0, None, ())]
+    for subtree in value:
+        combined = []
+        for mask, classes, items in terms:
+            for sub_mask, sub_classes, sub_items in compile_requirement(subtree, position):
+                if classes is None:
+                    merged = sub_classes
+                elif sub_classes is None:
+                    merged = classes
+                else:
+                    merged = classes & sub_classes
+                    if not merged:
+                        continue  # Needs two different classes at once
+                combined.append((mask | sub_mask, merged, items + sub_items))
+        terms = combined
+    return terms
+
+
+def requirement_quests(tree):
+    """Yield every quest ID named in a REQUIRES tree"""
+    kind, value = tree
+    if kind == 'quest':
+        yield value
+    elif kind in ('and', 'or'):
+        for subtree in value:
+            yield from requirement_quests(subtree)
+
+
+def format_requirement(tree):
+    """Turn a REQUIRES tree back into text"""
+    kind, value = tree
+    if kind in ('and', 'or'):
+        parts = [f"({format_requirement(t)})" if t[0] in ('and', 'or') else format_requirement(t)
+                 for t in value]
+        return f" {kind.upper()} ".join(parts)
+    return value if kind == 'quest' else f"{kind}:{value}"
+
+
+class QuestChain(Sequence):
+    """
+    Read-only prerequisite chain: the first `length` IDs of a shared list
+
+    Quests along one chain share a single list, each seeing its own
+    prefix, so a chain of n quests takes O(n) memory instead of O(n^2).
+    Compares equal to a list with the same quest IDs.
+    """
+
+    __slots__ = ('_ids', '_length')
+
+    def __init__(self, ids, length):
+        self._ids = ids
+        self._length = length
+
+    @staticmethod
+    def extend(parent, quest_id):
+        """Chain of parent's quests followed by quest_id"""
+        if parent is None:
+            return QuestChain([quest_id], 1)
+        ids = parent._ids
+        if len(ids) != parent._length:
+            ids = ids[:parent._length]  # Another quest already extends this prefix
+        ids.append(quest_id)
+        return QuestChain(ids, parent._length + 1)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._ids[i] for i in range(self._length)[index]]
+        return self._ids[range(self._length)[index]]
+
+    def __iter__(self):
+        return islice(self._ids, self._length)
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(other) == self._length and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"QuestChain({list(self)!r})"
+
+
+# ============================================================================
+# QUEST STATE
+# ============================================================================
+#
+# Everything quest_handler works out from a character's quest lists (the
+# membership sets, the AvailableQuests tracker, the completed-quest bitmask,
+# the objective routing table and whether quest_stats is current) lives in
+# one QuestState per character. The lists are QuestLists, which count their
+# own changes, so a single check tells whether any of it is stale.
+
+class QuestList(list):
+    """
+    A list of quest IDs that counts its changes in `version`
+
+    Any mutation, including in-place ones like completed_quests[0] = 'x',
+    bumps the version. Otherwise it behaves (and saves) like a plain list.
+    """
+
+    version = 0  # Class default, so copies and unpickled lists have one too
+
+
+def _counted(name):
+    method = getattr(list, name)
+
+    def mutate(self, *args, **kwargs):
+        self.version += 1
+        return method(self, *args, **kwargs)
+
+    mutate.__name__ = name
+    return mutate
+
+
+for _name in ('__setitem__', '__delitem__', '__iadd__', '__imul__', 'append', 'extend',
+              'insert', 'pop', 'remove', 'clear', 'sort', 'reverse'):
+    setattr(QuestList, _name, _counted(_name))
+
+
+class QuestState:
+    """
+    quest_handler's caches for one character, kept under QUEST_STATE_KEY
+
+    sync() compares the character's lists with the ones (and versions) the
+    caches were built from, and drops what a change made elsewhere left
+    stale; a plain list put in the character is swapped for a QuestList.
+    accept_quest, complete_quest and abandon_quest patch the caches
+    themselves and then call seen().
+
+    stats_current is None until quest_stats has been checked against the
+    lists, then True while it counts the completed list, False once stale.
+    """
+
+    def __init__(self):
+        self.active = None
+        self.completed = None
+        self.active_version = -1
+        self.completed_version = -1
+        self.active_set = set()
+        self.completed_set = set()
+        self.tracker = None          # AvailableQuests
+        self.mask_index = None       # QuestIndex the bitmask was built for
+        self.mask = 0
+        self.routes_index = None     # QuestIndex the routing table was built for
+        self.routes = None           # {event_type: {quest_id: [objective positions]}}
+        self.stats_current = None
+
+    def sync(self, character):
+        active = character['active_quests']
+        if active is not self.active or active.version != self.active_version:
+            if not isinstance(active, QuestList):
+                active = character['active_quests'] = QuestList(active)
+            self.active = active
+            self.active_version = active.version
+            self.active_set = set(active)
+            self.tracker = None
+            self.routes_index = None
+
+        completed = character['completed_quests']
+        if completed is not self.completed or completed.version != self.completed_version:
+            if not isinstance(completed, QuestList):
+                completed = character['completed_quests'] = QuestList(completed)
+            if self.completed is not None:
+                self.stats_current = False
+            self.completed = completed
+            self.completed_version = completed.version
+            self.completed_set = set(completed)
+            self.tracker = None
+            self.mask_index = None
+        return self
+
+    def seen(self):
+        """Record quest_handler's own changes to the lists as accounted for"""
+        self.active_version = self.active.version
+        self.completed_version = self.completed.version
+
+    def completed_mask(self, index):
+        """Bitmask of the completed quests, by index position"""
+        if self.mask_index is not index:
+            bits = bytearray((index.size + 7) // 8)
+            for qid in self.completed:
+                position = index.position.get(qid)
+                if position is not None:
+                    bits[position >> 3] |= 1 << (position & 7)
+            self.mask = int.from_bytes(bits, 'little')
+            self.mask_index = index
+        return self.mask
+
+
+def get_quest_state(character):
+    """The character's QuestState, brought in step with its lists"""
+    state = character.get(QUEST_STATE_KEY)
+    if state is None:
+        state = character[QUEST_STATE_KEY] = QuestState()
+    return state.sync(character)
+
+
+class AvailableQuests:
+    """
+    The quests one character can accept right now
+
+    Built with one catalog scan, then patched by accept_quest,
+    complete_quest and abandon_quest, and on level-up by looking only at
+    the quests whose level was just reached. Held by the character's
+    QuestState, which drops it when the quest lists change elsewhere.
+    """
+
+    def __init__(self, index, character, state):
+        self.index = index
+        self.state = state
+        self.level = character['level']
+        self.quest_ids = {qid for qid, quest in index.quests.items()
+                          if _is_acceptable(state, character, qid, quest, index)}
+        self._ordered = None
+
+    def level_up(self, character):
+        for qid in self.index.quests_between_levels(self.level, character['level']):
+            self._check(character, qid)
+        self.level = character['level']
+
+    def accepted(self, quest_id):
+        self._discard(quest_id)
+
+    def abandoned(self, character, quest_id):
+        self._check(character, quest_id)
+
+    def completed(self, character, quest_id):
+        self._discard(quest_id)
+        for qid in self.index.dependents.get(quest_id, ()):
+            self._check(character, qid)
+
+    def recheck(self, character, quest_ids):
+        """Re-evaluate quests whose requirements depend on outside state"""
+        for qid in quest_ids:
+            self._check(character, qid)
+
+    def ordered(self):
+        """Available quest IDs in catalog order"""
+        if self._ordered is None:
+            self._ordered = sorted(self.quest_ids, key=self.index.position.__getitem__)
+        return self._ordered
+
+    def _check(self, character, quest_id):
+        quest = self.index.quests.get(quest_id)
+        if quest is not None and _is_acceptable(self.state, character, quest_id, quest, self.index):
+            if quest_id not in self.quest_ids:
+                self.quest_ids.add(quest_id)
+                self._ordered = None
+        else:
+            self._discard(quest_id)
+
+    def _discard(self, quest_id):
+        if quest_id in self.quest_ids:
+            self.quest_ids.discard(quest_id)
+            self._ordered = None
+
+
+def register_quests(quest_data_dict):
+    """
+    Build the quest index for a newly loaded catalog
+
+    Call again after changing the catalog. get_available_quests builds
+    the index itself the first time it sees a different catalog.
+    """
+    global QUEST_INDEX
+    QUEST_INDEX = QuestIndex(quest_data_dict)
+    return QUEST_INDEX
+
+
+def get_quest_index(quest_data_dict):
+    if (QUEST_INDEX is None or QUEST_INDEX.quests is not quest_data_dict or
+            QUEST_INDEX.size != len(quest_data_dict)):
+        return register_quests(quest_data_dict)
+    return QUEST_INDEX
+
+
+def _is_acceptable(state, character, quest_id, quest, index):
+    return (
+            character['level'] >= quest.get('required_level', 1) and
+            _requirements_met(state, character, quest_id, quest, index) and
+            quest_id not in state.active_set and
+            quest_id not in state.completed_set
+    )
+
+
+def _requirements_met(state, character, quest_id, quest, index):
+    """
+    Check PREREQUISITE and REQUIRES
+
+    A plain prerequisite is a set lookup; a REQUIRES expression is checked
+    term by term against the character's completed-quest bitmask.
+    """
+    terms = index.requirements.get(quest_id)
+    if terms is None:
+        prereq = quest.get('prerequisite', 'NONE')
+        return prereq == "NONE" or prereq in state.completed_set
+
+    completed_mask = state.completed_mask(index)
+    char_class = str(character.get('class', '')).lower()
+    inventory = character.get('inventory', ())
+    for quest_mask, classes, items in terms:
+        if (quest_mask & completed_mask == quest_mask and
+                (classes is None or char_class in classes) and
+                all(item_id in inventory for item_id in items)):
+            return True
+    return False
 
 # ============================================================================
 # QUEST MANAGEMENT
@@ -31,17 +500,31 @@ def accept_quest(character, quest_id, quest_data_dict):
     if character['level'] < quest['required_level']:
         raise InsufficientLevelError(f"Level {quest['required_level']} required.")
 
+    state = get_quest_state(character)
+
     prereq = quest.get('prerequisite', 'NONE')
-    if prereq != "NONE" and prereq not in character['completed_quests']:
+    if prereq != "NONE" and prereq not in state.completed_set:
         raise QuestRequirementsNotMetError(f"Prerequisite quest {prereq} not completed.")
 
-    if quest_id in character['completed_quests']:
+    if not _requirements_met(state, character, quest_id, quest, get_quest_index(quest_data_dict)):
+        raise QuestRequirementsNotMetError(
+            f"Quest {quest_id} requires {format_requirement(quest['requires'])}.")
+
+    if quest_id in state.completed_set:
         raise QuestAlreadyCompletedError(f"Quest {quest_id} already completed.")
 
-    if quest_id in character['active_quests']:
+    if quest_id in state.active_set:
         raise QuestRequirementsNotMetError(f"Quest {quest_id} is already active.")
 
-    character['active_quests'].append(quest_id)
+    state.active.append(quest_id)
+    state.active_set.add(quest_id)
+    if state.tracker is not None:
+        state.tracker.accepted(quest_id)
+    if quest.get('objective'):
+        character.setdefault('quest_progress', {})[quest_id] = [0] * len(quest['objective'])
+    if state.routes_index is not None:
+        _add_routes(state.routes, quest_id, quest)
+    state.seen()
     return True
 
 
@@ -50,12 +533,26 @@ def complete_quest(character, quest_id, quest_data_dict):
     if quest_id not in quest_data_dict:
         raise QuestNotFoundError(f"Quest {quest_id} not found.")
 
-    if quest_id not in character['active_quests']:
+    state = get_quest_state(character)
+    if quest_id not in state.active_set:
         raise QuestNotActiveError(f"Quest {quest_id} is not active.")
 
+    if not objectives_complete(character, quest_id, quest_data_dict):
+        raise QuestObjectivesIncompleteError(f"Objectives for quest {quest_id} are not complete.")
+
     quest = quest_data_dict[quest_id]
-    character['active_quests'].remove(quest_id)
-    character['completed_quests'].append(quest_id)
+    _add_quest_stats(character, state, quest)
+    state.active.remove(quest_id)
+    state.active_set.discard(quest_id)
+    state.completed.append(quest_id)
+    state.completed_set.add(quest_id)
+    if state.mask_index is not None and quest_id in state.mask_index.position:
+        state.mask |= 1 << state.mask_index.position[quest_id]
+    character.get('quest_progress', {}).pop(quest_id, None)
+    _drop_routes(state, quest_id)
+    if state.tracker is not None:
+        state.tracker.completed(character, quest_id)
+    state.seen()
     character['experience'] += quest.get('reward_xp', 0)
     character['gold'] += quest.get('reward_gold', 0)
 
@@ -64,9 +561,16 @@ def complete_quest(character, quest_id, quest_data_dict):
 
 def abandon_quest(character, quest_id):
     """Remove a quest from active quests without completing it"""
-    if quest_id not in character['active_quests']:
+    state = get_quest_state(character)
+    if quest_id not in state.active_set:
         raise QuestNotActiveError(f"Quest {quest_id} is not active.")
-    character['active_quests'].remove(quest_id)
+    state.active.remove(quest_id)
+    state.active_set.discard(quest_id)
+    if state.tracker is not None:
+        state.tracker.abandoned(character, quest_id)
+    character.get('quest_progress', {}).pop(quest_id, None)
+    _drop_routes(state, quest_id)
+    state.seen()
     return True
 
 
@@ -80,13 +584,93 @@ def get_completed_quests(character, quest_data_dict):
     return [quest_data_dict[qid] for qid in character['completed_quests'] if qid in quest_data_dict]
 
 
+@profiling.timed("quest_handler.get_available_quests")
 def get_available_quests(character, quest_data_dict):
-    """Get quests that character can currently accept"""
-    available = []
-    for qid, quest in quest_data_dict.items():
-        if can_accept_quest(character, qid, quest_data_dict):
-            available.append(quest)
-    return available
+    """
+    Get quests that character can currently accept
+
+    Uses the character's AvailableQuests tracker, so after the first call
+    only quest state changes and newly reached levels cost anything.
+    """
+    index = get_quest_index(quest_data_dict)
+    state = get_quest_state(character)
+    tracker = state.tracker
+    if tracker is None or tracker.index is not index or tracker.level > character['level']:
+        tracker = state.tracker = AvailableQuests(index, character, state)
+    elif tracker.level < character['level']:
+        tracker.level_up(character)
+    tracker.recheck(character, index.item_gated)  # The inventory isn't tracked
+    return [quest_data_dict[qid] for qid in tracker.ordered()]
+
+
+# ============================================================================
+# QUEST OBJECTIVES
+# ============================================================================
+#
+# Quests may have OBJECTIVE counters (e.g. defeat 3 goblins) that advance
+# from game_events. Progress is kept in character['quest_progress'] while
+# the quest is active. Each character has a routing table from event type
+# to the active quests with an objective for it, so an event only touches
+# the quests that care about it.
+
+def get_objective_progress(character, quest_id, quest_data_dict):
+    """Get [(event_type, targets, done, needed)] for a quest's objectives"""
+    objectives = quest_data_dict[quest_id].get('objective') or []
+    counts = character.get('quest_progress', {}).get(quest_id)
+    if counts is None or len(counts) != len(objectives):
+        counts = [0] * len(objectives)
+    return [(event_type, targets, done, needed)
+            for (event_type, targets, needed), done in zip(objectives, counts)]
+
+
+def objectives_complete(character, quest_id, quest_data_dict):
+    return all(done >= needed for _, _, done, needed
+               in get_objective_progress(character, quest_id, quest_data_dict))
+
+
+def record_objective_event(character, event_type, targets, quantity):
+    """Event bus callback: advance matching objectives on active quests"""
+    if QUEST_INDEX is None or not character.get('active_quests'):
+        return
+    routes = _objective_routes(get_quest_state(character), QUEST_INDEX).get(event_type)
+    if not routes:
+        return
+    progress = character.setdefault('quest_progress', {})
+    for qid, positions in routes.items():
+        objectives = QUEST_INDEX.quests[qid]['objective']
+        counts = progress.setdefault(qid, [0] * len(objectives))
+        for position in positions:
+            _, wanted, needed = objectives[position]
+            if wanted is None or not wanted.isdisjoint(targets):
+                counts[position] = min(needed, counts[position] + quantity)
+
+
+def _objective_routes(state, index):
+    """event_type -> {quest_id: [objective positions]} for the active quests"""
+    if state.routes_index is not index:
+        state.routes = {}
+        for qid in state.active:
+            _add_routes(state.routes, qid, index.quests.get(qid))
+        state.routes_index = index
+    return state.routes
+
+
+def _add_routes(routes, quest_id, quest):
+    if quest is None:
+        return
+    for position, (event_type, _, _) in enumerate(quest.get('objective') or ()):
+        routes.setdefault(event_type, {}).setdefault(quest_id, []).append(position)
+
+
+def _drop_routes(state, quest_id):
+    """Drop quest_id's routes after it left active_quests"""
+    if state.routes_index is not None:
+        for quests in state.routes.values():
+            quests.pop(quest_id, None)
+
+
+for _event_type in game_events.EVENT_TYPES:
+    game_events.subscribe(_event_type, record_objective_event)
 
 
 # ============================================================================
@@ -94,43 +678,124 @@ def get_available_quests(character, quest_data_dict):
 # ============================================================================
 
 def is_quest_completed(character, quest_id):
-    return quest_id in character['completed_quests']
+    return quest_id in get_quest_state(character).completed_set
 
 
 def is_quest_active(character, quest_id):
-    return quest_id in character['active_quests']
+    return quest_id in get_quest_state(character).active_set
 
 
 def can_accept_quest(character, quest_id, quest_data_dict):
     if quest_id not in quest_data_dict:
         return False
-    quest = quest_data_dict[quest_id]
-    prereq = quest.get('prerequisite', 'NONE')
-    return (
-            character['level'] >= quest.get('required_level', 1) and
-            (prereq == "NONE" or prereq in character['completed_quests']) and
-            quest_id not in character['active_quests'] and
-            quest_id not in character['completed_quests']
-    )
+    return _is_acceptable(get_quest_state(character), character, quest_id,
+                          quest_data_dict[quest_id], get_quest_index(quest_data_dict))
 
 
 def get_quest_prerequisite_chain(quest_id, quest_data_dict):
+    """Get the quests leading to quest_id as a list, first prerequisite first"""
+    return list(get_quest_chain(quest_id, quest_data_dict))
+
+
+def get_quest_chain(quest_id, quest_data_dict):
+    """
+    Get quest_id's prerequisite chain as a read-only QuestChain
+
+    Chains are worked out once per catalog by QuestIndex; this is a lookup.
+    """
     if quest_id not in quest_data_dict:
         raise QuestNotFoundError(f"Quest {quest_id} not found.")
-    chain = []
-    current = quest_id
-    while current != "NONE":
-        if current not in quest_data_dict:
-            raise QuestNotFoundError(f"Prerequisite {current} not found.")
-        chain.insert(0, current)
-        current = quest_data_dict[current].get('prerequisite', 'NONE')
+    index = get_quest_index(quest_data_dict)
+    if quest_id in index.broken:
+        raise QuestNotFoundError(f"Prerequisite {index.broken[quest_id]} not found.")
+    chain = index.chains.get(quest_id)
+    if chain is None:
+        chain = QuestChain([quest_id], 1)  # No prerequisite and nothing depends on it
     return chain
 
 
+def get_quest_depth(quest_id, quest_data_dict):
+    """Number of prerequisites that must be completed before quest_id"""
+    return len(get_quest_chain(quest_id, quest_data_dict)) - 1
+
+
 # ============================================================================
 # QUEST STATISTICS
 # ============================================================================
 
+#
+# character['quest_stats'] keeps running totals over completed_quests:
+# 'completed' (list entries counted), 'xp', 'gold' and 'band_<n>' counts of
+# quests with required level in band n. complete_quest adds to them; if the
+# list was replaced or changed some other way the totals are rebuilt from it.
+# Totals from a save are used as they are if they count the whole list.
+
+def _level_band(quest):
+    return f"band_{(quest.get('required_level', 1) - 1) // LEVEL_BAND_SIZE}"
+
+
+def _count_quest(stats, quest):
+    stats['xp'] += quest.get('reward_xp', 0)
+    stats['gold'] += quest.get('reward_gold', 0)
+    band = _level_band(quest)
+    stats[band] = stats.get(band, 0) + 1
+
+
+def compute_quest_stats(character, quest_data_dict):
+    """Work out quest totals from scratch from completed_quests"""
+    stats = {'completed': len(character['completed_quests']), 'xp': 0, 'gold': 0}
+    for qid in character['completed_quests']:
+        if qid in quest_data_dict:
+            _count_quest(stats, quest_data_dict[qid])
+    return stats
+
+
+def rebuild_quest_stats(character, quest_data_dict):
+    state = get_quest_state(character)
+    character['quest_stats'] = compute_quest_stats(character, quest_data_dict)
+    state.stats_current = True
+    return character['quest_stats']
+
+
+def verify_quest_stats(character, quest_data_dict):
+    """True if the stored totals match a fresh count of completed_quests"""
+    return character.get('quest_stats') == compute_quest_stats(character, quest_data_dict)
+
+
+def get_quest_stats(character, quest_data_dict):
+    """Get the running quest totals, rebuilding them if they're missing or stale"""
+    if not _stats_current(character, get_quest_state(character)):
+        return rebuild_quest_stats(character, quest_data_dict)
+    return character['quest_stats']
+
+
+def _stats_current(character, state):
+    """True if character['quest_stats'] counts the completed list"""
+    if state.stats_current is None:
+        stats = character.get('quest_stats')
+        state.stats_current = stats is not None and stats.get('completed') == len(state.completed)
+    return state.stats_current
+
+
+def get_quest_band_counts(character, quest_data_dict):
+    """Completed quests per level band, lowest first, e.g. {'1-5': 3, '6-10': 1}"""
+    stats = get_quest_stats(character, quest_data_dict)
+    bands = sorted(int(key[5:]) for key in stats if key.startswith("band_"))
+    counts = {}
+    for band in bands:
+        low = band * LEVEL_BAND_SIZE + 1
+        counts[f"{low}-{low + LEVEL_BAND_SIZE - 1}"] = stats[f"band_{band}"]
+    return counts
+
+
+def _add_quest_stats(character, state, quest):
+    """Count a quest about to be appended to completed_quests, if the totals are current"""
+    if _stats_current(character, state):
+        stats = character['quest_stats']
+        stats['completed'] += 1
+        _count_quest(stats, quest)
+
+
 def get_quest_completion_percentage(character, quest_data_dict):
     total = len(quest_data_dict)
     completed = len(character['completed_quests'])
@@ -140,15 +805,38 @@ def get_quest_completion_percentage(character, quest_data_dict):
 
 
 def get_total_quest_rewards_earned(character, quest_data_dict):
-    total_xp = sum(
-        quest_data_dict[qid].get('reward_xp', 0) for qid in character['completed_quests'] if qid in quest_data_dict)
-    total_gold = sum(
-        quest_data_dict[qid].get('reward_gold', 0) for qid in character['completed_quests'] if qid in quest_data_dict)
-    return {"total_xp": total_xp, "total_gold": total_gold}
+    stats = get_quest_stats(character, quest_data_dict)
+    return {"total_xp": stats['xp'], "total_gold": stats['gold']}
 
 
 def get_quests_by_level(quest_data_dict, min_level, max_level):
-    return [quest for quest in quest_data_dict.values() if min_level <= quest.get('required_level', 1) <= max_level]
+    """Quests with min_level <= required_level <= max_level, lowest level first"""
+    return list(iter_quests_by_level(quest_data_dict, min_level, max_level))
+
+
+def iter_quests_by_level(quest_data_dict, min_level, max_level):
+    """Lazily yield quests in a level range, lowest level first"""
+    index = get_quest_index(quest_data_dict)
+    for level in index.levels_in_range(min_level, max_level):
+        for qid in index.by_level[level]:
+            yield quest_data_dict[qid]
+
+
+def query_quests(quest_data_dict, min_level=None, max_level=None, min_xp=None, character=None):
+    """
+    Lazily yield quests matching every given filter
+
+    Level range and reward_xp floor are answered by bisecting the index;
+    with a character, quests it already completed are skipped. Results come
+    lowest level first, then lowest reward first.
+    """
+    index = get_quest_index(quest_data_dict)
+    completed = () if character is None else get_quest_state(character).completed_set
+    for level in index.levels_in_range(min_level, max_level):
+        quest_ids = index.by_level_xp[level][1] if min_xp is None else index.quests_with_xp(level, min_xp)
+        for qid in quest_ids:
+            if qid not in completed:
+                yield quest_data_dict[qid]
 
 
 # ============================================================================
@@ -161,6 +849,8 @@ def display_quest_info(quest_data):
     print(f"Rewards: XP={quest_data.get('reward_xp', 0)}, Gold={quest_data.get('reward_gold', 0)}")
     print(f"Required Level: {quest_data.get('required_level', 1)}")
     print(f"Prerequisite: {quest_data.get('prerequisite', 'NONE')}")
+    if quest_data.get('requires') is not None:
+        print(f"Requires: {format_requirement(quest_data['requires'])}")
 
 
 def display_quest_list(quest_list):
@@ -169,6 +859,15 @@ def display_quest_list(quest_list):
             f"- {quest['title']} (Level {quest.get('required_level', 1)}): XP={quest.get('reward_xp', 0)}, Gold={quest.get('reward_gold', 0)}")
 
 
+def display_objectives(character, quest_data_dict):
+    for qid in character['active_quests']:
+        if qid not in quest_data_dict:
+            continue
+        for event_type, targets, done, needed in get_objective_progress(character, qid, quest_data_dict):
+            what = "any" if targets is None else "/".join(sorted(targets))
+            print(f"  {quest_data_dict[qid].get('title', qid)}: {event_type} {what} {done}/{needed}")
+
+
 def display_character_quest_progress(character, quest_data_dict):
     active = len(character['active_quests'])
     completed = len(character['completed_quests'])
@@ -179,6 +878,8 @@ def display_character_quest_progress(character, quest_data_dict):
     print(f"Completed Quests: {completed}")
     print(f"Completion Percentage: {percent:.2f}%")
     print(f"Total Rewards Earned: XP={rewards['total_xp']}, Gold={rewards['total_gold']}")
+    for band, count in get_quest_band_counts(character, quest_data_dict).items():
+        print(f"Level {band} Quests: {count}")
 
 
 # ============================================================================
@@ -186,10 +887,21 @@ def display_character_quest_progress(character, quest_data_dict):
 # ============================================================================
 
 def validate_quest_prerequisites(quest_data_dict):
+    """
+    Check every prerequisite (and quest named in REQUIRES) exists and that
+    there are no prerequisite cycles
+
+    Raises: QuestNotFoundError, CircularPrerequisiteError
+    """
     for qid, quest in quest_data_dict.items():
         prereq = quest.get('prerequisite', 'NONE')
         if prereq != "NONE" and prereq not in quest_data_dict:
             raise QuestNotFoundError(f"Quest {qid} has invalid prerequisite {prereq}.")
+        if quest.get('requires') is not None:
+            for ref in requirement_quests(quest['requires']):
+                if ref not in quest_data_dict:
+                    raise QuestNotFoundError(f"Quest {qid} requires unknown quest {ref}.")
+    get_quest_index(quest_data_dict)
     return True
 
 # ============================================================================
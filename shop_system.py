@@ -0,0 +1,292 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Shop System Module
+
+This module handles shopping carts, multi-item checkout and buyback.
+"""
+
+from custom_exceptions import (
+    InventoryFullError,
+    ItemNotFoundError,
+    InsufficientResourcesError,
+    InvalidQuantityError
+)
+import inventory_system
+import game_data
+import game_events
+import pricing
+import profiling
+
+# How many recent sales a character can buy back
+BUYBACK_SIZE = 10
+
+
+# ============================================================================
+# CART
+# ============================================================================
+
+class Cart:
+    """
+    Items a character wants to buy and sell in one transaction
+    """
+
+    def __init__(self):
+        self.buy = {}   # item_id -> quantity to buy
+        self.sell = {}  # item_id -> quantity to sell
+
+    def add(self, item_id, quantity=1):
+        """Add items to buy"""
+        if quantity < 1:
+            raise InvalidQuantityError("Quantity must be at least 1")
+        self.buy[item_id] = self.buy.get(item_id, 0) + quantity
+
+    def remove(self, item_id, quantity=1):
+        """Take items to buy back out of the cart"""
+        _take(self.buy, item_id, quantity)
+
+    def add_sale(self, item_id, quantity=1):
+        """Add items from the character's inventory to sell"""
+        if quantity < 1:
+            raise InvalidQuantityError("Quantity must be at least 1")
+        self.sell[item_id] = self.sell.get(item_id, 0) + quantity
+
+    def remove_sale(self, item_id, quantity=1):
+        """Take items to sell back out of the cart"""
+        _take(self.sell, item_id, quantity)
+
+    def clear(self):
+        self.buy.clear()
+        self.sell.clear()
+
+    def is_empty(self):
+        return not self.buy and not self.sell
+
+
+def _take(lines, item_id, quantity):
+    """Lower one cart line by quantity, dropping it when nothing is left"""
+    if quantity < 1:
+        raise InvalidQuantityError("Quantity must be at least 1")
+    if item_id not in lines:
+        raise ItemNotFoundError(f"'{item_id}' is not in the cart.")
+    remaining = lines[item_id] - quantity
+    if remaining > 0:
+        lines[item_id] = remaining
+    else:
+        del lines[item_id]
+
+
+# ============================================================================
+# SHOP
+# ============================================================================
+
+class Shop:
+    """
+    A shop selling the items in item_data_dict
+
+    Checkout validates gold and inventory space once for the whole cart and
+    then applies every change, so a transaction either fully happens or
+    leaves the character untouched. Cost is linear in the cart size.
+    """
+
+    def __init__(self, item_data_dict, item_index=None, prices=None):
+        self.items = item_data_dict
+        self.index = item_index if item_index is not None else game_data.build_item_index(item_data_dict)
+        self.prices = prices  # pricing.PriceTable, or None for fixed listed prices
+        self.buyback = {}  # character name -> list of (item_id, price), oldest first
+
+    def search(self, item_type=None, min_cost=None, max_cost=None, stat=None):
+        """
+        Items for sale matching the filters, cheapest first (see game_data.query_items)
+
+        Costs are the shop's buy prices: with market prices the cost range
+        is checked against them instead of the listed costs. A market price
+        stays within the pricing factors of the listed cost, so only items
+        whose listed cost falls in the widened range (plus a gold either
+        side for rounding) are priced.
+        """
+        if self.prices is None:
+            return game_data.query_items(self.index, item_type, min_cost, max_cost, stat)
+        low = None if min_cost is None else (min_cost - 1) / pricing.MAX_PRICE_FACTOR
+        high = None if max_cost is None else (max_cost + 1) / pricing.MIN_PRICE_FACTOR
+        priced = [(self.buy_price(item['item_id']), item)
+                  for item in game_data.query_items(self.index, item_type, low, high, stat)]
+        return [item for price, item in sorted(priced, key=lambda entry: entry[0])
+                if (min_cost is None or price >= min_cost) and (max_cost is None or price <= max_cost)]
+
+    # ------------------------------------------------------------------
+    # Prices
+    # ------------------------------------------------------------------
+
+    def buy_price(self, item_id):
+        """Price the shop charges for one item"""
+        if item_id not in self.items:
+            raise ItemNotFoundError(f"The shop doesn't sell '{item_id}'.")
+        if self.prices is not None:
+            return self.prices.buy_price(item_id)
+        return self.items[item_id]['cost']
+
+    def sell_price(self, item_id):
+        """Price the shop pays for one item (half its cost, or the market price)"""
+        if item_id not in self.items:
+            raise ItemNotFoundError(f"The shop doesn't buy '{item_id}'.")
+        if self.prices is not None:
+            return self.prices.sell_price(item_id)
+        return self.items[item_id]['cost'] // 2
+
+    def quote(self, cart):
+        """
+        Price a cart without changing anything
+
+        Returns: Dictionary with 'cost', 'proceeds' and 'total' (cost - proceeds)
+        Raises: ItemNotFoundError for items the shop doesn't trade
+        """
+        cost = sum(self.buy_price(item_id) * quantity for item_id, quantity in cart.buy.items())
+        proceeds = sum(self.sell_price(item_id) * quantity for item_id, quantity in cart.sell.items())
+        return {'cost': cost, 'proceeds': proceeds, 'total': cost - proceeds}
+
+    # ------------------------------------------------------------------
+    # Transactions
+    # ------------------------------------------------------------------
+
+    @profiling.timed("shop_system.Shop.checkout")
+    def checkout(self, character, cart):
+        """
+        Buy and sell everything in the cart as one transaction
+
+        Sales are credited before purchases are charged, and sold items free
+        their slots for the items being bought. Every item is priced as the
+        cart is checked out; market prices move afterwards.
+
+        Returns: Receipt dictionary {'bought', 'sold', 'gold_spent', 'gold_earned', 'gold'}
+        Raises: ItemNotFoundError, InsufficientResourcesError, InventoryFullError
+        """
+        inventory = inventory_system.get_inventory(character)
+        quote = self.quote(cart)
+
+        for item_id, quantity in cart.sell.items():
+            if inventory.get(item_id, 0) < quantity:
+                raise ItemNotFoundError(f"Cannot sell {quantity} x '{item_id}', not in inventory.")
+
+        gold = character.get('gold', 0)
+        if gold + quote['proceeds'] < quote['cost']:
+            raise InsufficientResourcesError(
+                f"Cart costs {quote['total']} gold, you have {gold}.")
+
+        # Net change per item, so selling and buying the same item is counted once
+        changes = dict(cart.buy)
+        for item_id, quantity in cart.sell.items():
+            changes[item_id] = changes.get(item_id, 0) - quantity
+        slots_after = inventory.slots_used + sum(
+            inventory.slots_needed(item_id, change) for item_id, change in changes.items())
+        if slots_after > inventory_system.MAX_INVENTORY_SIZE:
+            raise InventoryFullError("Not enough inventory space for this cart.")
+
+        # Everything checked: apply
+        for item_id, change in changes.items():
+            if change > 0:
+                inventory.add(item_id, change)
+            elif change < 0:
+                inventory.remove(item_id, -change)
+        character['gold'] = gold + quote['proceeds'] - quote['cost']
+        for item_id, quantity in cart.sell.items():
+            self._record_sale(character, item_id, quantity)
+        if self.prices is not None:
+            for item_id, quantity in cart.buy.items():
+                self.prices.record_purchase(item_id, quantity)
+            for item_id, quantity in cart.sell.items():
+                self.prices.record_sale(item_id, quantity)
+        for item_id, quantity in cart.buy.items():
+            game_events.publish('purchase', character, (item_id, self.items[item_id]['type']), quantity)
+
+        receipt = {
+            'bought': dict(cart.buy),
+            'sold': dict(cart.sell),
+            'gold_spent': quote['cost'],
+            'gold_earned': quote['proceeds'],
+            'gold': character['gold']
+        }
+        cart.clear()
+        return receipt
+
+    def get_buyback(self, character):
+        """Get the character's recent sales as a list of (item_id, price), newest last"""
+        return list(self.buyback.get(character['name'], []))
+
+    @profiling.timed("shop_system.Shop.buy_back")
+    def buy_back(self, character, item_id):
+        """
+        Buy back the most recently sold item_id for the price it sold for
+
+        Returns: Gold paid
+        Raises: ItemNotFoundError, InsufficientResourcesError, InventoryFullError
+        """
+        sales = self.buyback.get(character['name'], [])
+        for index in range(len(sales) - 1, -1, -1):
+            if sales[index][0] == item_id:
+                break
+        else:
+            raise ItemNotFoundError(f"No recent sale of '{item_id}' to buy back.")
+
+        price = sales[index][1]
+        if character.get('gold', 0) < price:
+            raise InsufficientResourcesError(f"Need {price} gold to buy back '{item_id}'.")
+        if not inventory_system.can_add_item(character, item_id):
+            raise InventoryFullError("Cannot buy back item, inventory full.")
+
+        inventory_system.get_inventory(character).add(item_id)
+        character['gold'] -= price
+        del sales[index]
+        return price
+
+    def _record_sale(self, character, item_id, quantity):
+        sales = self.buyback.setdefault(character['name'], [])
+        price = self.sell_price(item_id)
+        sales.extend((item_id, price) for _ in range(min(quantity, BUYBACK_SIZE)))
+        if len(sales) > BUYBACK_SIZE:
+            del sales[:len(sales) - BUYBACK_SIZE]
+
+
+# ============================================================================
+# DISPLAY FUNCTIONS
+# ============================================================================
+
+def display_catalog(shop, item_type=None, max_cost=None):
+    for item in shop.search(item_type=item_type, max_cost=max_cost):
+        print(f"{item['item_id']}: {item['name']} - Cost: {shop.buy_price(item['item_id'])}")
+
+
+def display_cart(shop, cart):
+    print("Cart:")
+    for item_id, quantity in cart.buy.items():
+        print(f"  buy  {item_id} x{quantity} @ {shop.buy_price(item_id)}")
+    for item_id, quantity in cart.sell.items():
+        print(f"  sell {item_id} x{quantity} @ {shop.sell_price(item_id)}")
+    quote = shop.quote(cart)
+    print(f"Total: {quote['total']} gold")
+
+
+# ============================================================================
+# TESTING
+# ============================================================================
+
+if __name__ == "__main__":
+    print("=== SHOP SYSTEM TEST ===")
+
+    test_items = {
+        'health_potion': {'item_id': 'health_potion', 'name': 'Health Potion', 'type': 'consumable',
+                          'effect': 'health:20', 'cost': 25, 'description': 'Heals'},
+        'iron_sword': {'item_id': 'iron_sword', 'name': 'Iron Sword', 'type': 'weapon',
+                       'effect': 'strength:5', 'cost': 100, 'description': 'A sword'}
+    }
+    test_char = {'name': 'Hero', 'inventory': [], 'gold': 200}
+
+    shop = Shop(test_items)
+    cart = Cart()
+    cart.add('health_potion', 2)
+    cart.add('iron_sword')
+    display_cart(shop, cart)
+
+    try:
+        print(shop.checkout(test_char, cart))
+    except (InsufficientResourcesError, InventoryFullError) as e:
+        print(f"Checkout failed: {e}")
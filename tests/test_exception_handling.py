@@ -139,6 +139,19 @@ def test_quest_not_active_exception():
     with pytest.raises(QuestNotActiveError):
         quest_handler.complete_quest(char, "test_quest", quests)
 
+def test_circular_prerequisite_exception():
+    """Test that CircularPrerequisiteError is raised for a prerequisite loop"""
+    quests = {
+        'a': {'quest_id': 'a', 'required_level': 1, 'prerequisite': 'c'},
+        'b': {'quest_id': 'b', 'required_level': 1, 'prerequisite': 'a'},
+        'c': {'quest_id': 'c', 'required_level': 1, 'prerequisite': 'b'}
+    }
+
+    with pytest.raises(CircularPrerequisiteError):
+        quest_handler.validate_quest_prerequisites(quests)
+    with pytest.raises(CircularPrerequisiteError):
+        quest_handler.get_quest_prerequisite_chain('b', quests)
+
 # ============================================================================
 # GAME DATA EXCEPTION TESTS
 # ============================================================================
@@ -160,6 +173,18 @@ def test_invalid_data_format_exception():
     finally:
         os.remove("test_bad_data.txt")
 
+def test_invalid_requirement_expression():
+    """Test that malformed REQUIRES expressions are rejected"""
+    for text in ("a AND", "(a OR b", "a b", "level:5"):
+        with pytest.raises(InvalidDataFormatError):
+            game_data.parse_requirement(text)
+
+def test_invalid_ability_number():
+    """Test that an ability effect with a non-integer number is rejected"""
+    ability = dict(game_data.DEFAULT_ABILITIES['power_strike'], effect='damage:strength:two')
+    with pytest.raises(InvalidDataFormatError):
+        game_data.validate_ability_data(ability)
+
 # ============================================================================
 # COMBAT EXCEPTION TESTS
 # ============================================================================
@@ -184,6 +209,40 @@ def test_combat_not_active_exception():
     with pytest.raises(CombatNotActiveError):
         battle.player_turn()
 
+def test_ability_on_cooldown_exception():
+    """Test that AbilityOnCooldownError is raised when reusing an ability too soon"""
+    import combat_system
+
+    char = {'name': 'Test', 'class': 'Warrior', 'health': 100, 'max_health': 100, 'strength': 10}
+    enemy = {'name': 'Dragon', 'health': 500, 'max_health': 500, 'strength': 1}
+
+    battle = combat_system.SimpleBattle(char, enemy)
+    battle.player_turn('special')
+
+    with pytest.raises(AbilityOnCooldownError):
+        battle.player_turn('special')
+
+def test_ability_on_cooldown_outside_battle():
+    """Test that abilities used outside of battle still have a cooldown"""
+    import combat_system
+
+    char = {'name': 'Test', 'class': 'Warrior', 'health': 100, 'max_health': 100, 'strength': 10}
+    enemy = {'name': 'Dragon', 'health': 500, 'max_health': 500, 'strength': 1}
+
+    combat_system.use_special_ability(char, enemy)
+    with pytest.raises(AbilityOnCooldownError):
+        combat_system.use_special_ability(char, enemy)
+
+def test_invalid_ability_exception():
+    """Test that InvalidAbilityError is raised for another class's ability"""
+    import combat_system
+
+    char = {'name': 'Test', 'class': 'Warrior', 'health': 100, 'strength': 10}
+    enemy = {'name': 'Goblin', 'health': 50}
+
+    with pytest.raises(InvalidAbilityError):
+        combat_system.use_special_ability(char, enemy, 'fireball')
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
 
@@ -14,6 +14,10 @@ import inventory_system
 import quest_handler
 import combat_system
 import game_data
+import shop_system
+import analytics
+import game_session
+import game_server
 
 # ============================================================================
 # CHARACTER INTEGRATION TESTS
@@ -89,6 +93,90 @@ def test_inventory_item_management():
     assert "health_potion" not in char['inventory']  # Consumed
     assert char['health'] == 70  # Healed
 
+def test_counted_inventory_stacks():
+    """Test that stackable items share slots and inventories survive save/load"""
+    items = game_data.load_items("data/items.txt")
+    inventory_system.register_item_data(items)
+    try:
+        char = character_manager.create_character("StackTest", "Rogue")
+        for _ in range(12):
+            inventory_system.add_item_to_inventory(char, "health_potion")
+        inventory_system.add_item_to_inventory(char, "iron_sword")
+
+        assert inventory_system.count_item(char, "health_potion") == 12
+        # 12 potions in stacks of 10 take 2 slots, the sword takes 1
+        assert inventory_system.get_inventory_space_remaining(char) == inventory_system.MAX_INVENTORY_SIZE - 3
+
+        character_manager.save_character(char)
+        loaded = character_manager.load_character("StackTest")
+        character_manager.delete_character("StackTest")
+        assert inventory_system.count_item(loaded, "health_potion") == 12
+        assert inventory_system.has_item(loaded, "iron_sword")
+
+        inventory_system.remove_item_from_inventory(loaded, "health_potion")
+        inventory_system.remove_item_from_inventory(loaded, "health_potion")
+        assert inventory_system.get_inventory_space_remaining(loaded) == inventory_system.MAX_INVENTORY_SIZE - 2
+    finally:
+        inventory_system.register_item_data({})
+
+def test_bulk_inventory_operations():
+    """Test that bulk add/remove/transfer are all-or-nothing"""
+    looter = character_manager.create_character("Looter", "Rogue")
+    mule = character_manager.create_character("Mule", "Warrior")
+
+    inventory_system.add_items(looter, {'gem': 3, 'iron_sword': 1})
+    assert inventory_system.count_item(looter, 'gem') == 3
+
+    # Too many items: nothing is added
+    from custom_exceptions import InventoryFullError, ItemNotFoundError
+    with pytest.raises(InventoryFullError):
+        inventory_system.add_items(looter, ['coin'] * inventory_system.MAX_INVENTORY_SIZE)
+    assert not inventory_system.has_item(looter, 'coin')
+
+    # One missing item: nothing is removed
+    with pytest.raises(ItemNotFoundError):
+        inventory_system.remove_items(looter, ['gem', 'gem', 'crown'])
+    assert inventory_system.count_item(looter, 'gem') == 3
+
+    # A negative quantity is rejected before anything changes
+    from custom_exceptions import InvalidQuantityError
+    with pytest.raises(InvalidQuantityError):
+        inventory_system.add_items(looter, {'coin': 2, 'gem': -1})
+    assert not inventory_system.has_item(looter, 'coin')
+
+    moved = inventory_system.transfer_items(looter, mule, ['gem', 'gem', 'iron_sword'])
+    assert moved == 3
+    assert inventory_system.count_item(looter, 'gem') == 1
+    assert inventory_system.count_item(mule, 'gem') == 2
+    assert inventory_system.has_item(mule, 'iron_sword')
+
+def test_shared_stash_concurrent_access():
+    """Test that many characters can use one stash from several threads"""
+    import threading
+    service = inventory_system.StashService()
+    characters = [{'name': f"Alt{i}", 'inventory': {'gem': 10}} for i in range(8)]
+
+    def shuffle_gems(char):
+        for _ in range(200):
+            service.deposit("account", char, {'gem': 3})
+            service.withdraw("account", char, {'gem': 3})
+        service.deposit("account", char, ['gem'] * 10)
+
+    threads = [threading.Thread(target=shuffle_gems, args=(char,)) for char in characters]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stash = service.get_stash("account")
+    assert stash.count('gem') == 80
+    assert all(not inventory_system.has_item(char, 'gem') for char in characters)
+
+    from custom_exceptions import ItemNotFoundError
+    with pytest.raises(ItemNotFoundError):
+        stash.withdraw(characters[0], {'gem': 5, 'crown': 1})
+    assert stash.count('gem') == 80
+
 def test_equipment_system():
     """Test equipping weapons and armor"""
     char = character_manager.create_character("EquipTest", "Warrior")
@@ -104,6 +192,86 @@ def test_equipment_system():
     assert 'equipped_weapon' in char
     assert char['equipped_weapon'] == "iron_sword"
 
+def test_unequip_restores_base_stats():
+    """Test that equipment is a modifier on top of base stats"""
+    char = character_manager.create_character("UnequipTest", "Warrior")
+    base_strength = char['strength']
+    base_max_health = char['max_health']
+
+    inventory_system.add_item_to_inventory(char, "iron_sword")
+    inventory_system.add_item_to_inventory(char, "steel_armor")
+    inventory_system.equip_weapon(char, "iron_sword", {'type': 'weapon', 'effect': 'strength:5'})
+    inventory_system.equip_armor(char, "steel_armor", {'type': 'armor', 'effect': 'max_health:25'})
+    assert char['max_health'] == base_max_health + 25
+
+    # Level up while equipped, then save and load
+    character_manager.gain_experience(char, 100)
+    character_manager.save_character(char)
+    loaded = character_manager.load_character("UnequipTest")
+    character_manager.delete_character("UnequipTest")
+    assert loaded['strength'] == base_strength + 2 + 5
+
+    inventory_system.unequip_weapon(loaded)
+    inventory_system.unequip_armor(loaded)
+    assert loaded['strength'] == base_strength + 2
+    assert loaded['max_health'] == base_max_health + 10
+    assert loaded['base_stats']['strength'] == loaded['strength']
+
+def test_old_save_equipment_bonus_is_a_modifier(tmp_path):
+    """Test that a save from before base stats keeps its equipped bonus as a modifier"""
+    items = game_data.load_items("data/items.txt")
+    inventory_system.register_item_data(items)
+    try:
+        save_dir = str(tmp_path)
+        with open(os.path.join(save_dir, "OldSave_save.txt"), "w") as f:
+            f.write("NAME: OldSave\nCLASS: Warrior\nLEVEL: 1\nHEALTH: 100\nMAX_HEALTH: 100\n"
+                    "STRENGTH: 20\nMAGIC: 5\nEXPERIENCE: 0\nGOLD: 100\nINVENTORY: \n"
+                    "ACTIVE_QUESTS: \nCOMPLETED_QUESTS: \nEQUIPPED_WEAPON: iron_sword\n"
+                    "EQUIPPED_ARMOR: None\n")
+        loaded = character_manager.load_character("OldSave", save_dir)
+    finally:
+        inventory_system.register_item_data({})
+
+    assert loaded['strength'] == 20
+    assert loaded['base_stats']['strength'] == 15
+    assert loaded['stat_modifiers']['weapon'] == ('strength', 5)
+    inventory_system.unequip_weapon(loaded)
+    assert loaded['strength'] == 15
+    inventory_system.equip_weapon(loaded, "iron_sword", items['iron_sword'])
+    assert loaded['strength'] == 20
+
+def test_equipment_slots():
+    """Test generic equipment slots: two rings, swapping, save/load"""
+    items = game_data.load_items("data/items.txt")
+    char = character_manager.create_character("SlotTest", "Mage")
+    base_strength = char['strength']
+    base_magic = char['magic']
+    inventory_system.add_items(char, ['ring_of_strength', 'ring_of_wisdom', 'iron_helm', 'steel_sword', 'iron_sword'])
+
+    assert inventory_system.equip_item(char, 'ring_of_strength', items['ring_of_strength'])[0] == 'ring1'
+    assert inventory_system.equip_item(char, 'ring_of_wisdom', items['ring_of_wisdom'])[0] == 'ring2'
+    inventory_system.equip_item(char, 'iron_helm', items['iron_helm'])
+    inventory_system.equip_weapon(char, 'iron_sword', items['iron_sword'])
+    assert char['strength'] == base_strength + 3 + 5
+    assert char['magic'] == base_magic + 3
+
+    # Swapping weapons puts the old one back in the inventory
+    inventory_system.equip_item(char, 'steel_sword', items['steel_sword'])
+    assert char['equipped_weapon'] == 'steel_sword'
+    assert inventory_system.has_item(char, 'iron_sword')
+    assert char['strength'] == base_strength + 3 + 10
+
+    character_manager.save_character(char)
+    loaded = character_manager.load_character("SlotTest")
+    character_manager.delete_character("SlotTest")
+    assert loaded['equipment'] == char['equipment']
+
+    for slot in inventory_system.EQUIPMENT_SLOTS:
+        inventory_system.unequip_item(loaded, slot)
+    assert loaded['strength'] == base_strength
+    assert loaded['magic'] == base_magic
+    assert loaded['equipped_weapon'] is None
+
 def test_shop_system():
     """Test buying and selling items"""
     char = character_manager.create_character("ShopTest", "Mage")
@@ -123,6 +291,102 @@ def test_shop_system():
     assert gold_received == 12  # Half of cost (25 // 2)
     assert "health_potion" not in char['inventory']
 
+def test_shop_cart_checkout_and_buyback():
+    """Test multi-item checkout, all-or-nothing failure and buyback"""
+    items = game_data.load_items("data/items.txt")
+    shop = shop_system.Shop(items)
+    char = character_manager.create_character("CartTest", "Warrior")
+    char['gold'] = 200
+    inventory_system.add_item_to_inventory(char, "iron_sword")
+
+    cart = shop_system.Cart()
+    cart.add("health_potion", 2)
+    cart.add("steel_sword")  # 250 gold, too expensive even after selling
+    cart.add_sale("iron_sword")
+
+    from custom_exceptions import InsufficientResourcesError, InvalidQuantityError
+    with pytest.raises(InvalidQuantityError):
+        cart.add("health_potion", 0)
+    with pytest.raises(InvalidQuantityError):
+        cart.add_sale("iron_sword", -1)
+    with pytest.raises(InvalidQuantityError):
+        cart.remove("health_potion", 0)
+    assert cart.buy["health_potion"] == 2
+    cart.add_sale("health_potion")
+    cart.remove_sale("health_potion")
+    assert "health_potion" not in cart.sell
+    with pytest.raises(InsufficientResourcesError):
+        shop.checkout(char, cart)
+    assert char['gold'] == 200
+    assert inventory_system.has_item(char, "iron_sword")
+
+    cart.remove("steel_sword")
+    receipt = shop.checkout(char, cart)
+    assert receipt['gold_spent'] == 50
+    assert receipt['gold_earned'] == 50
+    assert char['gold'] == 200
+    assert inventory_system.count_item(char, "health_potion") == 2
+    assert not inventory_system.has_item(char, "iron_sword")
+
+    assert shop.buy_back(char, "iron_sword") == 50
+    assert inventory_system.has_item(char, "iron_sword")
+    assert char['gold'] == 150
+
+def test_dynamic_pricing_and_persistence(tmp_path):
+    """Test that trades move prices and that price state round-trips"""
+    import pricing
+    items = game_data.load_items("data/items.txt")
+    prices = pricing.PriceTable(items)
+    char = character_manager.create_character("PriceTest", "Mage")
+    char['gold'] = 10000
+
+    listed = items['health_potion']['cost']
+    assert prices.buy_price('health_potion') == listed
+    for _ in range(10):
+        inventory_system.purchase_item(char, 'health_potion', items['health_potion'], prices)
+    assert prices.buy_price('health_potion') > listed
+
+    market_sell_price = prices.sell_price('health_potion')
+    sold_for = inventory_system.sell_item(char, 'health_potion', items['health_potion'], prices)
+    assert sold_for == market_sell_price > listed // 2
+    assert prices.demand['health_potion'] == 9
+
+    price_file = str(tmp_path / "prices.txt")
+    game_data.save_price_state(prices.get_state(), price_file)
+    reloaded = pricing.PriceTable(items, game_data.load_price_state(price_file))
+    assert reloaded.buy_prices == prices.buy_prices
+
+def test_catalog_shows_market_prices(capsys):
+    """Test that the catalog lists and filters items at the price checkout charges"""
+    import pricing
+    items = game_data.load_items("data/items.txt")
+    prices = pricing.PriceTable(items)
+    shop = shop_system.Shop(items, prices=prices)
+    listed = items['health_potion']['cost']
+    prices.record_purchase('health_potion', 50)
+    market = shop.buy_price('health_potion')
+    assert market > listed
+
+    shop_system.display_catalog(shop, 'consumable')
+    assert f"Health Potion - Cost: {market}" in capsys.readouterr().out
+    assert 'health_potion' not in [item['item_id'] for item in shop.search(max_cost=market - 1)]
+    assert 'health_potion' in [item['item_id'] for item in shop.search(max_cost=market)]
+
+    # Prices pushed to both limits still match a scan of every item
+    for n, item_id in enumerate(items):
+        if n % 2:
+            prices.record_purchase(item_id, 100)
+        else:
+            prices.record_sale(item_id, 100)
+    for low, high in [(None, 20), (30, 120), (100, None), (1, 1)]:
+        expected = sorted((item_id for item_id in items
+                           if (low is None or shop.buy_price(item_id) >= low) and
+                           (high is None or shop.buy_price(item_id) <= high)),
+                          key=shop.buy_price)
+        found = [item['item_id'] for item in shop.search(min_cost=low, max_cost=high)]
+        assert [shop.buy_price(i) for i in found] == [shop.buy_price(i) for i in expected]
+        assert sorted(found) == sorted(expected)
+
 # ============================================================================
 # QUEST INTEGRATION TESTS
 # ============================================================================
@@ -187,6 +451,238 @@ def test_quest_prerequisite_system():
     quest_handler.accept_quest(char, 'second_quest', quests)
     assert 'second_quest' in char['active_quests']
 
+def test_quest_sets_track_lists_and_saves():
+    """Test that quest sets follow the lists and are rebuilt on load"""
+    char = character_manager.create_character("QuestSetTest", "Mage")
+    quests = {
+        'a': {'quest_id': 'a', 'required_level': 1, 'prerequisite': 'NONE'},
+        'b': {'quest_id': 'b', 'required_level': 1, 'prerequisite': 'a'}
+    }
+
+    quest_handler.accept_quest(char, 'a', quests)
+    quest_handler.complete_quest(char, 'a', quests)
+    state = quest_handler.get_quest_state(char)
+    assert state.completed_set == {'a'}
+    assert state.active_set == set()
+    assert quest_handler.can_accept_quest(char, 'b', quests)
+
+    # The quest state is not saved, only rebuilt from the lists
+    character_manager.save_character(char)
+    try:
+        with open(os.path.join("data", "save_games", "QuestSetTest_save.txt")) as f:
+            assert "QUEST_STATE" not in f.read()
+        loaded = character_manager.load_character("QuestSetTest")
+        assert quest_handler.is_quest_completed(loaded, 'a')
+        assert quest_handler.get_quest_state(loaded).completed_set == {'a'}
+    finally:
+        character_manager.delete_character("QuestSetTest")
+
+    # Replacing a list with one of the same length still refreshes its set
+    char['completed_quests'] = ['b']
+    assert not quest_handler.is_quest_completed(char, 'a')
+    assert quest_handler.is_quest_completed(char, 'b')
+
+    # So does an in-place edit that keeps the length
+    char['completed_quests'][0] = 'a'
+    assert quest_handler.is_quest_completed(char, 'a')
+    assert not quest_handler.is_quest_completed(char, 'b')
+    assert quest_handler.can_accept_quest(char, 'b', quests)
+
+def test_available_quests_update_incrementally():
+    """Test that the available quest list follows every quest change"""
+    char = character_manager.create_character("AvailableTest", "Warrior")
+    quests = {
+        'intro': {'quest_id': 'intro', 'required_level': 1, 'prerequisite': 'NONE'},
+        'follow_up': {'quest_id': 'follow_up', 'required_level': 1, 'prerequisite': 'intro'},
+        'veteran': {'quest_id': 'veteran', 'required_level': 3, 'prerequisite': 'NONE'},
+        'finale': {'quest_id': 'finale', 'required_level': 3, 'prerequisite': 'follow_up'}
+    }
+
+    def available_ids():
+        ids = [q['quest_id'] for q in quest_handler.get_available_quests(char, quests)]
+        expected = [qid for qid in quests if quest_handler.can_accept_quest(char, qid, quests)]
+        assert ids == expected
+        return ids
+
+    assert available_ids() == ['intro']
+    quest_handler.accept_quest(char, 'intro', quests)
+    assert available_ids() == []
+    quest_handler.abandon_quest(char, 'intro')
+    assert available_ids() == ['intro']
+    quest_handler.accept_quest(char, 'intro', quests)
+    quest_handler.complete_quest(char, 'intro', quests)
+    assert available_ids() == ['follow_up']
+
+    # Level-up and lists changed directly are both picked up
+    char['level'] = 3
+    assert available_ids() == ['follow_up', 'veteran']
+    char['completed_quests'].append('follow_up')
+    assert available_ids() == ['veteran', 'finale']
+
+    # So is a list replaced by another of the same length
+    char['completed_quests'] = ['intro', 'veteran']
+    assert available_ids() == ['follow_up']
+
+def test_quest_prerequisite_chains():
+    """Test chains and depths, including branching and missing prerequisites"""
+    quests = {
+        'root': {'quest_id': 'root', 'prerequisite': 'NONE'},
+        'left': {'quest_id': 'left', 'prerequisite': 'root'},
+        'left_end': {'quest_id': 'left_end', 'prerequisite': 'left'},
+        'right': {'quest_id': 'right', 'prerequisite': 'root'},
+        'orphan': {'quest_id': 'orphan', 'prerequisite': 'lost_quest'}
+    }
+
+    assert quest_handler.get_quest_prerequisite_chain('left_end', quests) == ['root', 'left', 'left_end']
+    assert quest_handler.get_quest_prerequisite_chain('right', quests) == ['root', 'right']
+    assert quest_handler.get_quest_prerequisite_chain('root', quests) == ['root']
+    assert type(quest_handler.get_quest_prerequisite_chain('right', quests)) is list
+    assert quest_handler.get_quest_chain('left_end', quests) == ['root', 'left', 'left_end']
+    assert quest_handler.get_quest_depth('left_end', quests) == 2
+
+    from custom_exceptions import QuestNotFoundError
+    with pytest.raises(QuestNotFoundError):
+        quest_handler.get_quest_prerequisite_chain('orphan', quests)
+
+def test_quest_requirement_expressions():
+    """Test REQUIRES expressions with AND/OR, class and item terms"""
+    requires = game_data.parse_requirement("(a AND b) OR (class:Warrior AND item:steel_sword)")
+    quests = {
+        'a': {'quest_id': 'a', 'required_level': 1, 'prerequisite': 'NONE'},
+        'b': {'quest_id': 'b', 'required_level': 1, 'prerequisite': 'NONE'},
+        'gauntlet': {'quest_id': 'gauntlet', 'required_level': 1,
+                     'prerequisite': 'NONE', 'requires': requires}
+    }
+    mage = character_manager.create_character("ReqMage", "Mage")
+    warrior = character_manager.create_character("ReqWarrior", "Warrior")
+
+    from custom_exceptions import QuestRequirementsNotMetError
+    with pytest.raises(QuestRequirementsNotMetError):
+        quest_handler.accept_quest(mage, 'gauntlet', quests)
+
+    # One quest isn't enough; both are
+    for qid in ('a', 'b'):
+        quest_handler.accept_quest(mage, qid, quests)
+        quest_handler.complete_quest(mage, qid, quests)
+        assert quest_handler.can_accept_quest(mage, 'gauntlet', quests) == (qid == 'b')
+    assert [q['quest_id'] for q in quest_handler.get_available_quests(mage, quests)] == ['gauntlet']
+
+    # A same-length list without b no longer meets the requirement
+    mage['completed_quests'] = ['a', 'side_quest']
+    assert not quest_handler.can_accept_quest(mage, 'gauntlet', quests)
+
+    # The warrior branch follows the inventory
+    assert not quest_handler.can_accept_quest(warrior, 'gauntlet', quests)
+    inventory_system.add_item_to_inventory(warrior, 'steel_sword')
+    assert 'gauntlet' in [q['quest_id'] for q in quest_handler.get_available_quests(warrior, quests)]
+    inventory_system.remove_item_from_inventory(warrior, 'steel_sword')
+    assert 'gauntlet' not in [q['quest_id'] for q in quest_handler.get_available_quests(warrior, quests)]
+
+def test_quest_objectives_follow_game_events():
+    """Test that battles and purchases advance quest objectives"""
+    import game_events
+    from custom_exceptions import QuestObjectivesIncompleteError
+    char = character_manager.create_character("ObjectiveTest", "Warrior")
+    char['level'] = 2
+    char['gold'] = 500
+    char['completed_quests'].append('first_steps')
+    quests = game_data.load_quests("data/quests.txt")
+    items = game_data.load_items("data/items.txt")
+
+    quest_handler.accept_quest(char, 'goblin_hunter', quests)
+    quest_handler.accept_quest(char, 'equipment_upgrade', quests)
+    with pytest.raises(QuestObjectivesIncompleteError):
+        quest_handler.complete_quest(char, 'goblin_hunter', quests)
+
+    # Potions and orcs don't count
+    inventory_system.purchase_item(char, 'health_potion', items['health_potion'])
+    game_events.publish('defeat', char, ('orc',))
+    for _ in range(2):
+        game_events.publish('defeat', char, ('goblin',))
+    inventory_system.purchase_item(char, 'iron_sword', items['iron_sword'])
+    assert char['quest_progress'] == {'goblin_hunter': [2], 'equipment_upgrade': [1]}
+
+    # Events follow the active list even when it is replaced by one of the same length
+    active = char['active_quests']
+    char['active_quests'] = ['equipment_upgrade', 'lost_quest']
+    game_events.publish('defeat', char, ('goblin',))
+    assert char['quest_progress']['goblin_hunter'] == [2]
+    char['active_quests'] = active
+
+    # Progress survives a save
+    character_manager.save_character(char)
+    try:
+        char = character_manager.load_character("ObjectiveTest")
+    finally:
+        character_manager.delete_character("ObjectiveTest")
+    assert char['quest_progress']['goblin_hunter'] == [2]
+
+    enemy = combat_system.create_enemy("goblin")
+    enemy['health'] = 1
+    combat_system.SimpleBattle(char, enemy).start_battle()
+    quest_handler.complete_quest(char, 'goblin_hunter', quests)
+    quest_handler.complete_quest(char, 'equipment_upgrade', quests)
+    assert char['quest_progress'] == {}
+
+def test_quest_stats_running_totals():
+    """Test that quest totals update on completion and can be rebuilt"""
+    char = character_manager.create_character("StatsTest", "Rogue")
+    quests = {
+        'easy': {'quest_id': 'easy', 'required_level': 1, 'prerequisite': 'NONE',
+                 'reward_xp': 10, 'reward_gold': 5},
+        'hard': {'quest_id': 'hard', 'required_level': 7, 'prerequisite': 'NONE',
+                 'reward_xp': 100, 'reward_gold': 50}
+    }
+    assert quest_handler.get_total_quest_rewards_earned(char, quests) == {"total_xp": 0, "total_gold": 0}
+
+    char['level'] = 7
+    for qid in ('easy', 'hard'):
+        quest_handler.accept_quest(char, qid, quests)
+        quest_handler.complete_quest(char, qid, quests)
+    assert quest_handler.get_total_quest_rewards_earned(char, quests) == {"total_xp": 110, "total_gold": 55}
+    assert quest_handler.get_quest_band_counts(char, quests) == {'1-5': 1, '6-10': 1}
+    assert quest_handler.verify_quest_stats(char, quests)
+
+    # Totals are saved with the character
+    character_manager.save_character(char)
+    try:
+        loaded = character_manager.load_character("StatsTest")
+    finally:
+        character_manager.delete_character("StatsTest")
+    assert loaded['quest_stats'] == char['quest_stats']
+
+    # Loaded totals are used as saved while they count the whole list;
+    # tampering is caught by verify_quest_stats and fixed by a rebuild
+    loaded['quest_stats']['xp'] = 0
+    assert quest_handler.get_total_quest_rewards_earned(loaded, quests) == {"total_xp": 0, "total_gold": 55}
+    assert not quest_handler.verify_quest_stats(loaded, quests)
+    quest_handler.rebuild_quest_stats(loaded, quests)
+    assert quest_handler.verify_quest_stats(loaded, quests)
+
+    # Replacing the list with one of the same length refreshes the totals
+    loaded['completed_quests'] = ['easy', 'side_quest']
+    assert quest_handler.get_total_quest_rewards_earned(loaded, quests) == {"total_xp": 10, "total_gold": 5}
+    assert quest_handler.verify_quest_stats(loaded, quests)
+
+def test_quest_level_range_queries():
+    """Test indexed level-range and multi-key quest queries"""
+    quests = {
+        qid: {'quest_id': qid, 'required_level': level, 'reward_xp': xp, 'prerequisite': 'NONE'}
+        for qid, level, xp in [('q1', 5, 100), ('q2', 1, 50), ('q3', 3, 300),
+                               ('q4', 3, 20), ('q5', 8, 500), ('q6', 3, 300)]
+    }
+    by_level = quest_handler.get_quests_by_level(quests, 2, 5)
+    assert [q['quest_id'] for q in by_level] == ['q3', 'q4', 'q6', 'q1']
+    assert quest_handler.get_quests_by_level(quests, 9, 20) == []
+
+    char = {'level': 10, 'active_quests': [], 'completed_quests': ['q3']}
+    found = quest_handler.query_quests(quests, min_level=3, max_level=8, min_xp=100, character=char)
+    assert [q['quest_id'] for q in found] == ['q6', 'q1', 'q5']
+    assert [q['quest_id'] for q in quest_handler.query_quests(quests, max_level=1)] == ['q2']
+    # Reward order holds without a reward floor too
+    found = quest_handler.query_quests(quests, min_level=3, max_level=3)
+    assert [q['quest_id'] for q in found] == ['q4', 'q3', 'q6']
+
 # ============================================================================
 # COMBAT INTEGRATION TESTS
 # ============================================================================
@@ -222,6 +718,125 @@ def test_combat_victory_rewards():
     assert rewards['xp'] == expected_xp
     assert rewards['gold'] == expected_gold
 
+def test_ability_registry_dispatch():
+    """Test that abilities loaded from data are dispatched per class"""
+    abilities = game_data.load_abilities("data/abilities.txt")
+    combat_system.register_abilities(abilities)
+    try:
+        warrior_abilities = combat_system.get_class_abilities("Warrior")
+        assert len(warrior_abilities) >= 2
+
+        char = character_manager.create_character("AbilityTest", "Warrior")
+        enemy = combat_system.create_enemy("dragon")
+        combat_system.use_special_ability(char, enemy, 'reckless_cleave')
+
+        assert enemy['health'] == enemy['max_health'] - char['strength'] * 3
+        assert char['health'] == char['max_health'] - 10
+    finally:
+        combat_system.register_abilities(combat_system.DEFAULT_ABILITIES)
+
+def test_failed_ability_costs_no_health():
+    """Test that an ability rejected outside of battle doesn't take its health cost"""
+    from custom_exceptions import InvalidAbilityError
+    combat_system.register_abilities({'blood_pact': {
+        'ability_id': 'blood_pact', 'class': 'Warrior', 'name': 'Blood Pact',
+        'effect': 'status:strength_up:3', 'cooldown': 3, 'health_cost': 20,
+        'description': 'Trades health for strength'
+    }})
+    try:
+        char = character_manager.create_character("PactTest", "Warrior")
+        enemy = combat_system.create_enemy("goblin")
+        with pytest.raises(InvalidAbilityError):
+            combat_system.use_special_ability(char, enemy, 'blood_pact')
+        assert char['health'] == char['max_health']
+    finally:
+        combat_system.register_abilities(combat_system.DEFAULT_ABILITIES)
+
+def test_default_ability_file_matches_defaults(tmp_path, monkeypatch):
+    """Test that the generated ability file holds the built-in default abilities"""
+    monkeypatch.chdir(tmp_path)
+    game_data.create_default_data_files()
+    assert game_data.load_abilities() == game_data.DEFAULT_ABILITIES
+    assert combat_system.DEFAULT_ABILITIES is game_data.DEFAULT_ABILITIES
+
+def test_per_ability_cooldowns():
+    """Test that each ability has its own cooldown inside a battle"""
+    abilities = game_data.load_abilities("data/abilities.txt")
+    combat_system.register_abilities(abilities)
+    try:
+        char = character_manager.create_character("CooldownTest", "Cleric")
+        enemy = combat_system.create_enemy("dragon")
+        battle = combat_system.SimpleBattle(char, enemy)
+
+        battle.player_turn('special', 'heal')
+        assert battle.cooldowns.remaining('heal') == 3
+
+        # A different ability is not blocked by heal's cooldown
+        battle.player_turn('special', 'smite')
+
+        for _ in range(3):
+            battle.end_round()
+        assert battle.cooldowns.is_ready('heal')
+        assert not battle.cooldowns.is_ready('smite')
+    finally:
+        combat_system.register_abilities(combat_system.DEFAULT_ABILITIES)
+
+def test_status_effects_tick_and_expire():
+    """Test damage over time, buffs and expiry of status effects"""
+    char = character_manager.create_character("StatusTest", "Warrior")
+    enemy = combat_system.create_enemy("orc")
+    battle = combat_system.SimpleBattle(char, enemy)
+    base_strength = enemy['strength']
+
+    battle.apply_status(enemy, 'poison', 2)
+    battle.apply_status(enemy, 'poison', 3)
+    battle.apply_status(enemy, 'weaken', 1)
+    assert enemy['strength'] == base_strength - 5
+
+    battle.end_round()  # both poisons tick, weaken expires
+    assert enemy['health'] == enemy['max_health'] - 10
+    assert enemy['strength'] == base_strength
+
+    battle.end_round()  # both tick, first poison expires
+    battle.end_round()  # second poison ticks and expires
+    battle.end_round()  # nothing left
+    assert enemy['health'] == enemy['max_health'] - 25
+    assert battle.status_effects.get_active(enemy) == {}
+
+def test_status_effects_end_with_battle(tmp_path):
+    """Test that buffs still active when a battle ends are removed and never saved"""
+    char = character_manager.create_character("BuffTest", "Warrior")
+    enemy = combat_system.create_enemy("goblin")
+    battle = combat_system.SimpleBattle(char, enemy)
+    base_strength = char['strength']
+
+    battle.apply_status(char, 'strength_up', 10)
+    battle.apply_status(enemy, 'poison', 10)
+    battle.start_battle()
+    assert char['strength'] == base_strength
+    assert char['stat_modifiers'] == {}
+    assert battle.status_effects.count_active() == 0
+
+    # A buff left on a character (e.g. by an older version) is not saved
+    character_manager.set_stat_modifier(char, "status_1", "strength", 5)
+    character_manager.save_character(char, str(tmp_path))
+    loaded = character_manager.load_character("BuffTest", str(tmp_path))
+    assert loaded['strength'] == base_strength
+    assert loaded['stat_modifiers'] == {}
+
+def test_combat_damage_follows_stat_changes():
+    """Test that cached combat damage is refreshed when stats change"""
+    char = character_manager.create_character("DamageCacheTest", "Warrior")
+    enemy = combat_system.create_enemy("dragon")
+    battle = combat_system.SimpleBattle(char, enemy)
+
+    before = battle.cached_damage(char, enemy)
+    battle.apply_status(char, 'strength_up', 1)
+    assert battle.cached_damage(char, enemy) == before + 5
+
+    battle.end_round()
+    assert battle.cached_damage(char, enemy) == before
+
 # ============================================================================
 # DATA LOADING INTEGRATION TESTS
 # ============================================================================
@@ -249,6 +864,20 @@ def test_load_game_data():
         assert 'type' in item
         assert 'cost' in item
 
+def test_item_catalog_queries():
+    """Test indexed catalog queries by type, cost range and effect stat"""
+    items = game_data.load_items("data/items.txt")
+    index = game_data.build_item_index(items)
+
+    cheap_weapons = game_data.query_items(index, item_type='weapon', max_cost=200)
+    expected = [item for item in items.values() if item['type'] == 'weapon' and item['cost'] <= 200]
+    assert sorted(i['item_id'] for i in cheap_weapons) == sorted(i['item_id'] for i in expected)
+    assert [i['cost'] for i in cheap_weapons] == sorted(i['cost'] for i in cheap_weapons)
+
+    magic_armor = game_data.query_item_ids(index, item_type='armor', stat='magic')
+    assert magic_armor == ['magic_robe']
+    assert game_data.query_item_ids(index, min_cost=1000) == []
+
 def test_data_validation():
     """Test that data validation works"""
     valid_quest = {
@@ -274,6 +903,119 @@ def test_data_validation():
     
     assert game_data.validate_item_data(valid_item) == True
 
+# ============================================================================
+# ANALYTICS TESTS
+# ============================================================================
+
+def test_save_summary_leaderboard(tmp_path):
+    """Test leaderboard and class stats built from saves, and refreshes"""
+    save_dir = str(tmp_path)
+    for name, char_class, level, gold in [("Ann", "Mage", 5, 300), ("Bo", "Warrior", 9, 100),
+                                          ("Cy", "Mage", 2, 50)]:
+        char = character_manager.create_character(name, char_class)
+        char['level'], char['gold'] = level, gold
+        character_manager.save_character(char, save_dir)
+
+    summary = analytics.SaveSummary(save_dir)
+    assert summary.refresh() == 3
+    assert [row['name'] for row in summary.top(2)] == ["Bo", "Ann"]
+    assert summary.group_by_class('gold')['Mage']['total'] == 350
+
+    # Only the changed save is re-read; deleted saves drop out
+    char = character_manager.load_character("Cy", save_dir)
+    char['level'] = 20
+    char['completed_quests'] = ['first_steps']
+    character_manager.save_character(char, save_dir)
+    os.utime(os.path.join(save_dir, "Cy_save.txt"), (1, 1))  # Don't rely on clock resolution
+    character_manager.delete_character("Bo", save_dir)
+    assert summary.refresh() == 2
+    assert summary.top(1)[0] == {'name': "Cy", 'class': "Mage", 'level': 20, 'gold': 50, 'quests': 1}
+    assert 'Warrior' not in summary.group_by_class('level')
+
+    # A saved summary reloads without re-reading unchanged saves
+    summary_file = str(tmp_path / "summary.txt")
+    summary.save(summary_file)
+    reloaded = analytics.SaveSummary.load(summary_file, save_dir)
+    assert reloaded.refresh() == 0
+    assert reloaded.top(2) == summary.top(2)
+
+def test_leaderboard_follows_game_saves(tmp_path, capsys):
+    """Test that saving in game keeps the summary file current for the leaderboard command"""
+    import main
+    save_dir, summary_file = str(tmp_path / "saves"), str(tmp_path / "summary.txt")
+    for name, gold in [("Ann", 300), ("Bo", 50)]:
+        char = character_manager.create_character(name, "Mage")
+        char['gold'] = gold
+        character_manager.save_character(char, save_dir)
+    leaderboard = ["leaderboard", "--save-dir", save_dir, "--summary-file", summary_file, "--by", "gold"]
+    assert main.main(leaderboard) == 0
+    assert "1. Ann (Mage)" in capsys.readouterr().out
+
+    quests = game_data.load_quests("data/quests.txt")
+    items = game_data.load_items("data/items.txt")
+    session = game_session.GameSession(quests, items, save_directory=save_dir, summary_file=summary_file)
+    session.run(['1', 'Zed', '1', '6', '3'])  # New Warrior, save and quit
+    summary = analytics.SaveSummary.load(summary_file, save_dir)
+    assert summary.refresh() == 0  # The new save is already in the summary
+    assert [row['name'] for row in summary.top(3, 'gold')] == ["Ann", "Zed", "Bo"]
+
+    capsys.readouterr()
+    assert main.main(leaderboard + ["--class", "Warrior"]) == 0
+    assert "1. Zed (Warrior) - Level 1, Gold 100" in capsys.readouterr().out
+    with open(summary_file) as f:
+        assert len(f.readlines()) == 3  # Rewritten without the appended line
+
+def test_numpy_export_round_trip(tmp_path):
+    """Test that exported arrays match the quest, item and character dicts"""
+    numpy = pytest.importorskip("numpy")
+    import data_export
+    quests = game_data.load_quests("data/quests.txt")
+    items = game_data.load_items("data/items.txt")
+    save_dir = str(tmp_path / "saves")
+    char = character_manager.create_character("ExportTest", "Cleric")
+    char['completed_quests'] = ['first_steps']
+    inventory_system.add_items(char, {'health_potion': 3})
+    character_manager.save_character(char, save_dir)
+
+    counts = data_export.export_all(quests, items, str(tmp_path), save_dir, chunk_size=3)
+    assert counts == {'quests.npy': len(quests), 'items.npy': len(items), 'characters.npy': 1}
+    assert not list(tmp_path.glob("*.part"))
+
+    quest_rows = data_export.array_to_dicts(numpy.load(str(tmp_path / "quests.npy")))
+    for row in quest_rows:
+        quest = quests[row['quest_id']]
+        assert row == {name: quest[name] for name, _ in data_export.QUEST_FIELDS}
+    item_rows = data_export.array_to_dicts(numpy.load(str(tmp_path / "items.npy")))
+    for row in item_rows:
+        item = items[row['item_id']]
+        assert (row['effect_stat'], row['effect_value']) == inventory_system.parse_item_effect(item['effect'])
+        assert row['cost'] == item['cost'] and row['stack_size'] == item.get('stack_size', 1)
+    [row] = data_export.array_to_dicts(numpy.load(str(tmp_path / "characters.npy")))
+    assert row['name'] == "ExportTest" and row['class'] == "Cleric"
+    assert row['gold'] == char['gold'] and row['completed_quests'] == 1 and row['inventory_items'] == 3
+
+def test_npy_header_format():
+    """Test the .npy header bytes (no NumPy needed)"""
+    import ast
+    import struct
+    import data_export
+    descr = [('name', '<U8'), ('level', '<i8')]
+    header = data_export.npy_header(descr, 3)
+
+    assert header[:8] == b"\x93NUMPY\x02\x00"
+    (length,) = struct.unpack("<I", header[8:12])
+    assert len(header) == 12 + length and len(header) % 64 == 0
+    assert header.endswith(b"\n")
+    assert ast.literal_eval(header[12:].decode("latin1")) == {
+        'descr': descr, 'fortran_order': False, 'shape': (3,)}
+
+def test_numpy_export_requires_numpy(monkeypatch):
+    """Test that the exporter explains a missing NumPy"""
+    import data_export
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    with pytest.raises(ImportError, match="NumPy"):
+        data_export.quests_to_array({})
+
 # ============================================================================
 # FULL GAME WORKFLOW TEST
 # ============================================================================
@@ -320,6 +1062,183 @@ def test_complete_game_workflow():
     # Cleanup
     character_manager.delete_character("WorkflowTest")
 
+def test_scripted_game_session(tmp_path):
+    """Test playing a whole game through a GameSession command script"""
+    quests = game_data.load_quests("data/quests.txt")
+    items = game_data.load_items("data/items.txt")
+    save_dir = str(tmp_path)
+    session = game_session.GameSession(quests, items, save_directory=save_dir)
+    transcript = session.run(['1', 'SessionTest', '5', '2',            # Bad class, then Mage
+                              '3', '4', 'first_steps', '6', 'first_steps', '7',
+                              '5', '2', 'health_potion', '2', '6', '8',
+                              '6'])
+    assert "Invalid choice." in transcript
+    assert "Quest 'first_steps' completed!" in transcript
+    assert session.state == 'main_menu' and session.character is None
+
+    loaded = character_manager.load_character("SessionTest", save_dir)
+    assert loaded['class'] == "Mage"
+    assert loaded['completed_quests'] == ['first_steps']
+    assert loaded['inventory'] == ['health_potion', 'health_potion']
+    assert loaded['gold'] == 100 + quests['first_steps']['reward_gold'] - 50
+
+    # Sessions are independent: a second one loads the save on its own
+    other = game_session.GameSession(quests, items, save_directory=save_dir)
+    assert "Loaded character 'SessionTest'" in other.run(['2', '1'])
+    assert other.prompt == "Choose an action (1-6): "
+    other.handle('6')
+    assert other.handle('3').strip() == "Thanks for playing Quest Chronicles!"
+    assert other.finished and other.handle('1') == ""
+
+def test_session_log_replay(tmp_path):
+    """Test recording sessions to a log and replaying them"""
+    quests = game_data.load_quests("data/quests.txt")
+    items = game_data.load_items("data/items.txt")
+    session = game_session.GameSession(quests, items, save_directory=str(tmp_path))
+    session.run(['1', 'ReplayTest', '1', '2', '6', '3'])
+    log = str(tmp_path / "sessions.log")
+    game_session.write_session_log([session.history, ['3']], log)
+    assert game_session.read_session_log(log) == [session.history, ['3']]
+    assert game_session.replay_sessions(game_session.read_session_log(log) * 3,
+                                        quests, items, save_directory=str(tmp_path)) == 21
+
+def test_game_server_isolates_sessions(tmp_path):
+    """Test that concurrent connections share the frozen catalog but not characters"""
+    import asyncio
+    quests = game_data.freeze_catalog(game_data.load_quests("data/quests.txt"))
+    items = game_data.freeze_catalog(game_data.load_items("data/items.txt"))
+    with pytest.raises(TypeError):
+        quests['first_steps']['reward_xp'] = 0
+    server = game_server.GameServer(quests, items, shop_system.Shop(items), str(tmp_path))
+
+    async def send(reader, writer, command):
+        writer.write(command.encode() + b"\n")
+        return (await reader.readuntil(game_server.REPLY_END)).decode()
+
+    async def play():
+        listener = await server.start(port=0)
+        port = listener.sockets[0].getsockname()[1]
+        first = await asyncio.open_connection("127.0.0.1", port)
+        second = await asyncio.open_connection("127.0.0.1", port)
+        for reader, _ in (first, second):
+            assert "MAIN MENU" in (await reader.readuntil(game_server.REPLY_END)).decode()
+        for command in ['1', 'Alpha', '1', '3', '4', 'first_steps']:
+            await send(*first, command)
+        for command in ['1', 'Beta', '2', '3']:
+            await send(*second, command)
+        available = await send(*second, '2')
+        active = await send(*second, '1')
+        await send(*second, '7')
+        await send(*second, '6')
+        goodbye = await send(*second, '3')
+        at_eof = await second[0].read()
+        first[1].close()
+        listener.close()
+        await listener.wait_closed()
+        return available, active, goodbye, at_eof
+
+    available, active, goodbye, at_eof = asyncio.run(play())
+    assert "First Steps" in available and "First Steps" not in active
+    assert goodbye.endswith("Thanks for playing Quest Chronicles!\n\0") and at_eof == b""
+    assert server.total_sessions == 2 and server.commands == 15
+    assert character_manager.list_saved_characters(str(tmp_path)) == ["Beta"]
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="prefork mode needs os.fork")
+def test_prefork_workers_share_catalog():
+    """Test that forked workers see the catalog loaded before forking"""
+    import gc
+    quests = game_data.freeze_catalog(game_data.load_quests("data/quests.txt"))
+    ready_read, ready_write = os.pipe()
+    game_server.freeze_shared_state()
+    try:
+        pids = game_server.fork_workers(2, lambda number: os.write(
+            ready_write, f"{number}:{quests['first_steps']['reward_xp']};".encode()))
+        for pid in pids:
+            _, status = os.waitpid(pid, 0)
+            assert os.waitstatus_to_exitcode(status) == 0
+    finally:
+        gc.unfreeze()
+    os.close(ready_write)
+    replies = os.read(ready_read, 100).decode()
+    os.close(ready_read)
+    assert sorted(replies.split(";")[:2]) == ["0:50", "1:50"]
+
+    usage = game_server.process_memory()
+    if usage is not None:
+        assert usage['rss'] >= usage['pss'] > 0
+
+def test_cli_batch_commands(tmp_path, capsys):
+    """Test the batch subcommands on a temporary save directory"""
+    import main
+    save_dir = str(tmp_path)
+    for name in ("Ann", "Bob", "Cy"):
+        character_manager.save_character(character_manager.create_character(name, "Rogue"), save_dir)
+    (tmp_path / "Broken_save.txt").write_text("NAME: Broken\n")
+
+    assert main.main(["validate"]) == 0
+    assert main.main(["grant", "--save-dir", save_dir, "--all", "--gold", "25", "--xp", "100",
+                      "--workers", "2"]) == 1
+    assert "Broken: InvalidSaveDataError" in capsys.readouterr().out
+    bob = character_manager.load_character("Bob", save_dir)
+    assert bob['gold'] == 125 and bob['level'] == 2
+
+    assert main.main(["migrate", "--save-dir", save_dir, "--workers", "1"]) == 1
+    assert "quest_stats" in character_manager.load_character("Ann", save_dir)
+    assert main.main(["delete", "--save-dir", save_dir, "Broken", "Nobody"]) == 1
+    capsys.readouterr()
+    assert main.main(["list", "--save-dir", save_dir, "--sort", "gold"]) == 0
+    assert capsys.readouterr().out.splitlines()[-1] == "3 characters"
+
+def test_cli_simulation_is_seeded():
+    """Test that simulations repeat exactly for a seed, however many workers run them"""
+    import batch_jobs
+    settings = {'class': 'Warrior', 'level': 3, 'enemy': 'orc', 'seed': 11}
+    battles = list(range(150))
+    one = batch_jobs.run_batch("Simulating", batch_jobs.simulate_battles, battles, 1, settings)
+    two = batch_jobs.run_batch("Simulating", batch_jobs.simulate_battles, battles, 2, settings)
+    assert len(one) == 150 and sorted(one) == sorted(two)
+    assert {winner for winner, _, _ in one} <= {'player', 'enemy', 'escaped'}
+
+def test_profiling_hooks(tmp_path, monkeypatch):
+    """Test the timing decorator, both when disabled and enabled, and saved stats"""
+    import profiling
+    def battle_round(x):
+        return x * 2
+    monkeypatch.setattr(profiling, "ENABLED", False)
+    assert profiling.timed("test.round")(battle_round) is battle_round
+
+    monkeypatch.setattr(profiling, "ENABLED", True)
+    monkeypatch.setattr(profiling, "TIMERS", {})
+    timed_round = profiling.timed("test.round")(battle_round)
+    assert timed_round.__name__ == "battle_round"
+    assert [timed_round(i) for i in range(5)] == [0, 2, 4, 6, 8]
+    timer = profiling.TIMERS["test.round"]
+    assert timer.count == 5 and timer.total_ns >= timer.max_ns > 0
+
+    stats_file = str(tmp_path / "profile.txt")
+    profiling.accumulate_stats(stats_file)
+    profiling.accumulate_stats(stats_file)
+    [saved] = profiling.load_stats(stats_file).values()
+    assert saved.count == 10 and saved.total_ns == 2 * timer.total_ns
+    assert saved.percentile(0.99) >= saved.percentile(0.5) >= 1
+
+    (tmp_path / "bad.txt").write_text("COUNT: 3\n")
+    with pytest.raises(ValueError):
+        profiling.load_stats(str(tmp_path / "bad.txt"))
+
+def test_profile_environment_variable(tmp_path):
+    """Test that QC_PROFILE=<file> collects timings that the profile command prints"""
+    import subprocess
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    stats_file = str(tmp_path / "profile.txt")
+    env = dict(os.environ, QC_PROFILE=stats_file)
+    subprocess.run([sys.executable, "main.py", "validate"], cwd=root, env=env, check=True,
+                   capture_output=True)
+    env.pop("QC_PROFILE")
+    result = subprocess.run([sys.executable, "main.py", "profile", stats_file], cwd=root, env=env,
+                            check=True, capture_output=True, text=True)
+    assert "game_data.load_quests" in result.stdout and "game_data.load_items" in result.stdout
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
 
@@ -40,6 +40,31 @@ def test_combat_system_module_exists():
     import combat_system
     assert combat_system is not None
 
+def test_shop_system_module_exists():
+    """Test that shop_system module can be imported"""
+    import shop_system
+    assert shop_system is not None
+
+def test_game_events_module_exists():
+    """Test that game_events module can be imported"""
+    import game_events
+    assert game_events is not None
+
+def test_analytics_module_exists():
+    """Test that analytics module can be imported"""
+    import analytics
+    assert analytics is not None
+
+def test_game_session_module_exists():
+    """Test that game_session module can be imported"""
+    import game_session
+    assert game_session is not None
+
+def test_game_server_module_exists():
+    """Test that game_server module can be imported"""
+    import game_server
+    assert game_server is not None
+
 def test_main_module_exists():
     """Test that main module can be imported"""
     import main
@@ -129,6 +154,29 @@ def test_combat_system_functions_exist():
     assert hasattr(combat_system.SimpleBattle, 'player_turn')
     assert hasattr(combat_system.SimpleBattle, 'enemy_turn')
 
+# Test the main menu shows without importing the game subsystems
+def test_main_menu_starts_lazily():
+    """Test that subsystems and catalogs load only once the player leaves the main menu"""
+    import subprocess
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = (
+        "import sys, main\n"
+        "session = main.new_session()\n"
+        "assert 'MAIN MENU' in session.start()\n"
+        "heavy = ('character_manager', 'game_data', 'combat_system', 'inventory_system',\n"
+        "         'quest_handler', 'shop_system')\n"
+        "print(sorted(name for name in heavy if name in sys.modules))\n"
+        "session.handle('1')\n"
+        "print(sorted(name for name in heavy if name in sys.modules), len(main.all_quests) > 0)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == [
+        "[]",
+        "['character_manager', 'combat_system', 'game_data', 'inventory_system', 'quest_handler', "
+        "'shop_system'] True"
+    ]
+
 # Test main module functions exist
 def test_main_functions_exist():
     """Test that main module has required functions"""